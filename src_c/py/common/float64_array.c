@@ -0,0 +1,91 @@
+#include "float64_array.h"
+
+
+static int has_attr_value(PyObject *obj, const char *name, PyObject *value) {
+    PyObject *attr = PyObject_GetAttrString(obj, name);
+    if (!attr)
+        return -1;
+
+    int result = PyObject_RichCompareBool(attr, value, Py_EQ);
+    Py_DECREF(attr);
+
+    return result;
+}
+
+
+int float64_array_check(PyObject *view) {
+    PyObject *format = PyUnicode_FromString("d");
+    if (!format)
+        return -1;
+
+    int result = has_attr_value(view, "format", format);
+    Py_DECREF(format);
+    if (result < 1)
+        return result;
+
+    PyObject *ndim = PyLong_FromLong(1);
+    if (!ndim)
+        return -1;
+
+    result = has_attr_value(view, "ndim", ndim);
+    Py_DECREF(ndim);
+
+    return result;
+}
+
+
+int float64_array_copy(PyObject *view, double *data, Py_ssize_t len) {
+    // limited api doesn't provide access to buffer memory - items are
+    // copied by slice assignment to memory view of destination which
+    // copies contiguous memory with single memcpy
+    PyObject *bytes_view = PyMemoryView_FromMemory(
+        (char *)data, len * sizeof(double), PyBUF_WRITE);
+    if (!bytes_view)
+        return -1;
+
+    PyObject *data_view = PyObject_CallMethod(bytes_view, "cast", "s", "d");
+    Py_DECREF(bytes_view);
+    if (!data_view)
+        return -1;
+
+    PyObject *slice = PySlice_New(NULL, NULL, NULL);
+    if (!slice) {
+        Py_DECREF(data_view);
+        return -1;
+    }
+
+    int result = PyObject_SetItem(data_view, slice, view);
+    Py_DECREF(slice);
+    Py_DECREF(data_view);
+
+    return result;
+}
+
+
+PyObject *float64_array_new(const double *data, Py_ssize_t len) {
+    PyObject *array_module = PyImport_ImportModule("array");
+    if (!array_module)
+        return NULL;
+
+    PyObject *obj = PyObject_CallMethod(array_module, "array", "s", "d");
+    Py_DECREF(array_module);
+    if (!obj)
+        return NULL;
+
+    PyObject *bytes_view = PyMemoryView_FromMemory(
+        (char *)data, len * sizeof(double), PyBUF_READ);
+    if (!bytes_view) {
+        Py_DECREF(obj);
+        return NULL;
+    }
+
+    PyObject *result = PyObject_CallMethod(obj, "frombytes", "O", bytes_view);
+    Py_DECREF(bytes_view);
+    if (!result) {
+        Py_DECREF(obj);
+        return NULL;
+    }
+
+    Py_DECREF(result);
+    return obj;
+}
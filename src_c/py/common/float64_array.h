@@ -0,0 +1,34 @@
+#ifndef PY_COMMON_FLOAT64_ARRAY_H
+#define PY_COMMON_FLOAT64_ARRAY_H
+
+#include <Python.h>
+
+// memory view flags are part of limited api since python 3.11
+#ifndef PyBUF_READ
+#define PyBUF_READ 0x100
+#endif
+
+#ifndef PyBUF_WRITE
+#define PyBUF_WRITE 0x200
+#endif
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+// returns 1 if memory view is one-dimensional view of native doubles (such
+// as view of array.array('d')), 0 if it is not or -1 on error
+int float64_array_check(PyObject *view);
+
+// copy items of float64 memory view to len doubles starting at data
+// (len should be equal to memory view length)
+int float64_array_copy(PyObject *view, double *data, Py_ssize_t len);
+
+// returns new array.array('d') with copy of len doubles starting at data
+PyObject *float64_array_new(const double *data, Py_ssize_t len);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,54 @@
+#include "key_cache.h"
+
+
+static key_cache_entry_t *get_entry(key_cache_t *cache, uintptr_t key) {
+    return cache->entries + ((key ^ (key >> 4)) & (KEY_CACHE_SIZE - 1));
+}
+
+
+void key_cache_init(key_cache_t *cache) {
+    for (size_t i = 0; i < KEY_CACHE_SIZE; ++i)
+        cache->entries[i] =
+            (key_cache_entry_t){.key = 0, .obj = NULL, .misses = 0};
+}
+
+
+void key_cache_clear(key_cache_t *cache) {
+    for (size_t i = 0; i < KEY_CACHE_SIZE; ++i) {
+        key_cache_entry_t *entry = cache->entries + i;
+
+        Py_XDECREF(entry->obj);
+        *entry = (key_cache_entry_t){.key = 0, .obj = NULL, .misses = 0};
+    }
+}
+
+
+PyObject *key_cache_get(key_cache_t *cache, uintptr_t key) {
+    key_cache_entry_t *entry = get_entry(cache, key);
+
+    if (!entry->obj || entry->key != key) {
+        entry->misses++;
+        return NULL;
+    }
+
+    entry->misses = 0;
+    Py_INCREF(entry->obj);
+    return entry->obj;
+}
+
+
+key_cache_entry_t *key_cache_reserve(key_cache_t *cache, uintptr_t key) {
+    key_cache_entry_t *entry = get_entry(cache, key);
+
+    if (entry->obj && entry->misses < KEY_CACHE_EVICTION_MISSES)
+        return NULL;
+
+    return entry;
+}
+
+
+void key_cache_set(key_cache_entry_t *entry, uintptr_t key, PyObject *obj) {
+    Py_INCREF(obj);
+    Py_XDECREF(entry->obj);
+    *entry = (key_cache_entry_t){.key = key, .obj = obj, .misses = 0};
+}
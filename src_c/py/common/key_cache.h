@@ -0,0 +1,57 @@
+#ifndef PY_COMMON_KEY_CACHE_H
+#define PY_COMMON_KEY_CACHE_H
+
+#include <Python.h>
+#include <stdint.h>
+
+// number of cached keys (power of 2)
+#define KEY_CACHE_SIZE 256
+
+// number of misses since last hit after which cached key is replaced
+#define KEY_CACHE_EVICTION_MISSES 8
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+typedef struct {
+    uintptr_t key;
+    PyObject *obj;
+    size_t misses;
+} key_cache_entry_t;
+
+// direct mapped cache of python strings converted from interpreter strings
+// identified by key (string address or atom) - key with the same hash as
+// cached key is cached only after cached key wasn't used for multiple
+// lookups (keys used only once don't evict frequently used keys)
+//
+// cache holds strong references to python strings - interpreter strings
+// must be referenced by caller while their keys are cached so that keys
+// can not be reused for other strings
+typedef struct {
+    key_cache_entry_t entries[KEY_CACHE_SIZE];
+} key_cache_t;
+
+
+void key_cache_init(key_cache_t *cache);
+
+// release all cached python strings - should be called with GIL held
+void key_cache_clear(key_cache_t *cache);
+
+// returns new reference to cached python string or NULL if key is not
+// cached
+PyObject *key_cache_get(key_cache_t *cache, uintptr_t key);
+
+// returns entry which should be replaced with key or NULL if key should
+// not be cached
+key_cache_entry_t *key_cache_reserve(key_cache_t *cache, uintptr_t key);
+
+// replace entry content with key and new reference to python string -
+// should be called with GIL held
+void key_cache_set(key_cache_entry_t *entry, uintptr_t key, PyObject *obj);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,15 @@
+#ifndef PY_COMMON_MONOTONIC_H
+#define PY_COMMON_MONOTONIC_H
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+// monotonic clock time in seconds
+double get_monotonic_time(void);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -2,6 +2,7 @@
 
 #include "js_to_py.h"
 #include "module.h"
+#include "monotonic.h"
 #include "safe_call.h"
 #include "stash.h"
 
@@ -13,8 +14,42 @@ static void fatal_handler(void *udata, const char *msg) {
 }
 
 
+#ifdef DUK_USE_EXEC_TIMEOUT_CHECK
+duk_bool_t duktape_exec_timeout_check(void *udata) {
+    Interpreter *inter = udata;
+
+    if (!inter || !inter->deadline || get_monotonic_time() < inter->deadline)
+        return 0;
+
+    inter->timed_out = 1;
+    return 1;
+}
+#endif
+
+
 static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
                                  PyObject *kwds) {
+    PyObject *timeout = Py_None;
+    if (!PyArg_ParseTuple(args, "|O", &timeout))
+        return NULL;
+
+    double timeout_sec = 0;
+    if (timeout != Py_None) {
+#ifndef DUK_USE_EXEC_TIMEOUT_CHECK
+        PyErr_SetString(PyExc_ValueError, "timeout not supported");
+        return NULL;
+#endif
+
+        timeout_sec = PyFloat_AsDouble(timeout);
+        if (PyErr_Occurred())
+            return NULL;
+
+        if (timeout_sec <= 0) {
+            PyErr_SetString(PyExc_ValueError, "invalid timeout");
+            return NULL;
+        }
+    }
+
     Interpreter *self = (Interpreter *)PyType_GenericAlloc(type, 0);
     if (!self)
         return NULL;
@@ -22,6 +57,11 @@ static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
     self->jsfunction_type = NULL;
     self->ctx = NULL;
     self->next_stash_id = 1;
+    self->timeout = timeout_sec;
+    self->deadline = 0;
+    self->depth = 0;
+    self->timed_out = 0;
+    key_cache_init(&self->key_cache);
 
     ModuleState *state = PyType_GetModuleState(type);
     if (!state) {
@@ -32,7 +72,7 @@ static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
     Py_INCREF(state->jsfunction_type);
     self->jsfunction_type = state->jsfunction_type;
 
-    self->ctx = duk_create_heap(NULL, NULL, NULL, NULL, fatal_handler);
+    self->ctx = duk_create_heap(NULL, NULL, NULL, self, fatal_handler);
     if (!self->ctx)
         goto error;
 
@@ -43,6 +83,18 @@ static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
     }
     duk_pop(self->ctx);
 
+    if (safe_call_js(self->ctx, init_key_cache, NULL, 0)) {
+        PyErr_SetString(PyExc_Exception, duk_safe_to_string(self->ctx, -1));
+        goto error;
+    }
+    duk_pop(self->ctx);
+
+    if (safe_call_js(self->ctx, init_buffer_types, NULL, 0)) {
+        PyErr_SetString(PyExc_Exception, duk_safe_to_string(self->ctx, -1));
+        goto error;
+    }
+    duk_pop(self->ctx);
+
     return (PyObject *)self;
 
 error:
@@ -65,6 +117,8 @@ static void Interpreter_dealloc(Interpreter *self) {
     if (self->ctx)
         duk_destroy_heap(self->ctx);
 
+    key_cache_clear(&self->key_cache);
+
     if (self->jsfunction_type)
         Py_DECREF(self->jsfunction_type);
 
@@ -74,20 +128,87 @@ static void Interpreter_dealloc(Interpreter *self) {
 }
 
 
+typedef struct {
+    const char *code;
+    size_t code_len;
+} code_data_t;
+
+
+// ( -- buf ) with data
+static duk_ret_t dump_code(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+    code_data_t *data = cctx->data;
+
+    duk_compile_lstring(ctx, DUK_COMPILE_EVAL, data->code, data->code_len);
+    duk_dump_function(ctx);
+
+    return 1;
+}
+
+
+// ( -- fn ) with data
+static duk_ret_t load_code(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+    code_data_t *data = cctx->data;
+
+    void *buf = duk_push_fixed_buffer(ctx, data->code_len);
+    memcpy(buf, data->code, data->code_len);
+    duk_load_function(ctx);
+
+    return 1;
+}
+
+
 static PyObject *Interpreter_eval(Interpreter *self, PyObject *args) {
-    Py_ssize_t input_len;
-    const char *input = PyUnicode_AsUTF8AndSize(args, &input_len);
-    if (!input)
-        return NULL;
+    duk_int_t err;
+
+    if (PyBytes_Check(args)) {
+        char *input;
+        Py_ssize_t input_len;
+        if (PyBytes_AsStringAndSize(args, &input, &input_len))
+            return NULL;
 
-    PyThreadState *state = PyEval_SaveThread();
+        code_data_t load_data = {.code = input, .code_len = input_len};
+        if (safe_call_js(self->ctx, load_code, &load_data, 0)) {
+            PyErr_SetString(PyExc_Exception,
+                            duk_safe_to_string(self->ctx, -1));
+            duk_pop(self->ctx);
+            return NULL;
+        }
 
-    duk_int_t err = duk_peval_lstring(self->ctx, input, input_len);
+        if (interpreter_enter(self)) {
+            interpreter_exit(self);
+            return NULL;
+        }
 
-    PyEval_RestoreThread(state);
+        PyThreadState *state = PyEval_SaveThread();
+
+        err = duk_pcall(self->ctx, 0);
+
+        PyEval_RestoreThread(state);
+        interpreter_exit(self);
+
+    } else {
+        Py_ssize_t input_len;
+        const char *input = PyUnicode_AsUTF8AndSize(args, &input_len);
+        if (!input)
+            return NULL;
+
+        if (interpreter_enter(self)) {
+            interpreter_exit(self);
+            return NULL;
+        }
+
+        PyThreadState *state = PyEval_SaveThread();
+
+        err = duk_peval_lstring(self->ctx, input, input_len);
+
+        PyEval_RestoreThread(state);
+        interpreter_exit(self);
+    }
 
     if (err) {
-        PyErr_SetString(PyExc_Exception, duk_safe_to_string(self->ctx, -1));
+        interpreter_raise_error(self);
         return NULL;
     }
 
@@ -95,10 +216,35 @@ static PyObject *Interpreter_eval(Interpreter *self, PyObject *args) {
 }
 
 
+static PyObject *Interpreter_dump(Interpreter *self, PyObject *args) {
+    Py_ssize_t input_len;
+    const char *input = PyUnicode_AsUTF8AndSize(args, &input_len);
+    if (!input)
+        return NULL;
+
+    code_data_t dump_data = {.code = input, .code_len = input_len};
+    if (safe_call_js(self->ctx, dump_code, &dump_data, 0)) {
+        PyErr_SetString(PyExc_Exception, duk_safe_to_string(self->ctx, -1));
+        duk_pop(self->ctx);
+        return NULL;
+    }
+
+    duk_size_t buf_len;
+    void *buf = duk_get_buffer_data(self->ctx, -1, &buf_len);
+    PyObject *result = PyBytes_FromStringAndSize(buf, buf_len);
+    duk_pop(self->ctx);
+
+    return result;
+}
+
+
 static PyMethodDef interpreter_methods[] = {
     {.ml_name = "eval",
      .ml_meth = (PyCFunction)Interpreter_eval,
      .ml_flags = METH_O},
+    {.ml_name = "dump",
+     .ml_meth = (PyCFunction)Interpreter_dump,
+     .ml_flags = METH_O},
     {NULL}};
 
 
@@ -119,3 +265,40 @@ static PyType_Spec interpreter_type_spec = {
 PyObject *create_interpreter_type(PyObject *module) {
     return PyType_FromModuleAndSpec(module, &interpreter_type_spec, NULL);
 }
+
+
+int interpreter_enter(Interpreter *inter) {
+    if (inter->depth++) {
+        if (!inter->deadline || get_monotonic_time() < inter->deadline)
+            return 0;
+
+        inter->timed_out = 1;
+        PyErr_SetString(PyExc_TimeoutError, "execution timeout");
+        return -1;
+    }
+
+    inter->timed_out = 0;
+    inter->deadline =
+        (inter->timeout ? get_monotonic_time() + inter->timeout : 0);
+    return 0;
+}
+
+
+void interpreter_exit(Interpreter *inter) {
+    if (--inter->depth)
+        return;
+
+    inter->deadline = 0;
+}
+
+
+void interpreter_raise_error(Interpreter *inter) {
+    if (inter->timed_out) {
+        PyErr_SetString(PyExc_TimeoutError, "execution timeout");
+
+    } else {
+        PyErr_SetString(PyExc_Exception, duk_safe_to_string(inter->ctx, -1));
+    }
+
+    duk_pop(inter->ctx);
+}
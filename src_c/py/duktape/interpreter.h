@@ -4,6 +4,7 @@
 #include <Python.h>
 #include <duktape.h>
 
+#include "key_cache.h"
 #include "stash.h"
 
 #ifdef __cplusplus
@@ -15,11 +16,27 @@ typedef struct {
     PyObject *jsfunction_type;
     duk_context *ctx;
     stash_id_t next_stash_id;
+    double timeout;
+    double deadline;
+    size_t depth;
+    int timed_out;
+    key_cache_t key_cache;
 } Interpreter;
 
 
 PyObject *create_interpreter_type(PyObject *module);
 
+// start execution of js code (sets deadline for outermost execution) -
+// returns -1 and raises TimeoutError if deadline of outer execution has
+// already expired (interpreter_exit should be called regardless of result)
+int interpreter_enter(Interpreter *inter);
+
+// end execution of js code
+void interpreter_exit(Interpreter *inter);
+
+// raise python error based on js error on top of stack
+void interpreter_raise_error(Interpreter *inter);
+
 #ifdef __cplusplus
 }
 #endif
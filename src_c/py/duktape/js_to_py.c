@@ -1,8 +1,17 @@
 #include "js_to_py.h"
 
+#include "float64_array.h"
+#include "interpreter.h"
 #include "jsfunction.h"
 
 
+static Interpreter *get_interpreter(duk_context *ctx) {
+    duk_memory_functions funcs;
+    duk_get_memory_functions(ctx, &funcs);
+    return funcs.udata;
+}
+
+
 // ( null -- ) without data
 static PyObject *pop_null(safe_call_ctx_t *cctx) {
     duk_context *ctx = cctx->ctx;
@@ -51,21 +60,59 @@ static PyObject *pop_string(safe_call_ctx_t *cctx) {
 }
 
 
+// ( obj -- obj )
+static int is_instance(duk_context *ctx, const char *ctor_key) {
+    duk_push_heap_stash(ctx);
+    duk_get_prop_string(ctx, -1, ctor_key);
+    duk_bool_t result = duk_instanceof(ctx, -3, -1);
+    duk_pop_2(ctx);
+
+    return result;
+}
+
+
+// ( buf -- ) without data
+static PyObject *pop_bytes(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+
+    duk_size_t size;
+    void *data = duk_get_buffer_data(ctx, -1, &size);
+    PyObject *obj = safe_call_add(cctx, PyBytes_FromStringAndSize(data, size));
+    duk_pop(ctx);
+
+    return obj;
+}
+
+
+// ( arr -- ) without data
+static PyObject *pop_float64_array(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+
+    duk_size_t size;
+    void *data = duk_get_buffer_data(ctx, -1, &size);
+    PyObject *obj =
+        safe_call_add(cctx, float64_array_new(data, size / sizeof(double)));
+    duk_pop(ctx);
+
+    return obj;
+}
+
+
 // ( arr -- ) without data
 static PyObject *pop_array(safe_call_ctx_t *cctx) {
     duk_context *ctx = cctx->ctx;
 
-    PyObject *obj = safe_call_add(cctx, PyList_New(0));
+    // holes are converted to None (same as undefined elements)
+    duk_size_t len = duk_get_length(ctx, -1);
+
+    PyObject *obj = safe_call_add(cctx, PyList_New(len));
     if (!obj) {
         duk_pop(ctx);
         return NULL;
     }
 
-    duk_enum(ctx, -1, DUK_ENUM_ARRAY_INDICES_ONLY);
-    duk_remove(ctx, -2);
-
-    while (duk_next(ctx, -1, 1)) {
-        duk_remove(ctx, -2);
+    for (duk_size_t i = 0; i < len; ++i) {
+        duk_get_prop_index(ctx, -1, i);
 
         PyObject *obj_i = js_to_py(cctx);
         if (!obj_i) {
@@ -73,10 +120,8 @@ static PyObject *pop_array(safe_call_ctx_t *cctx) {
             return NULL;
         }
 
-        if (PyList_Append(obj, obj_i) < 0) {
-            duk_pop(ctx);
-            return NULL;
-        }
+        Py_INCREF(obj_i);
+        PyList_SetItem(obj, i, obj_i);
     }
 
     duk_pop(ctx);
@@ -84,6 +129,39 @@ static PyObject *pop_array(safe_call_ctx_t *cctx) {
 }
 
 
+// ( str -- ) without data
+static PyObject *pop_key(safe_call_ctx_t *cctx, Interpreter *inter) {
+    duk_context *ctx = cctx->ctx;
+
+    // same keys are usually repeated in many objects
+    uintptr_t key = (uintptr_t)duk_get_heapptr(ctx, -1);
+    PyObject *obj = (inter ? key_cache_get(&inter->key_cache, key) : NULL);
+
+    if (!obj) {
+        duk_size_t str_len;
+        const char *str = duk_get_lstring(ctx, -1, &str_len);
+
+        obj = PyUnicode_FromStringAndSize(str, str_len);
+        key_cache_entry_t *entry =
+            ((obj && inter) ? key_cache_reserve(&inter->key_cache, key)
+                            : NULL);
+
+        if (entry) {
+            duk_push_heap_stash(ctx);
+            duk_get_prop_literal(ctx, -1, "key_cache");
+            duk_dup(ctx, -3);
+            duk_put_prop_index(ctx, -2, entry - inter->key_cache.entries);
+            duk_pop_2(ctx);
+
+            key_cache_set(entry, key, obj);
+        }
+    }
+
+    duk_pop(ctx);
+    return safe_call_add(cctx, obj);
+}
+
+
 // ( obj -- ) without data
 static PyObject *pop_object(safe_call_ctx_t *cctx) {
     duk_context *ctx = cctx->ctx;
@@ -94,6 +172,8 @@ static PyObject *pop_object(safe_call_ctx_t *cctx) {
         return NULL;
     }
 
+    Interpreter *inter = get_interpreter(ctx);
+
     duk_enum(ctx, -1, DUK_ENUM_OWN_PROPERTIES_ONLY);
     duk_remove(ctx, -2);
 
@@ -104,8 +184,8 @@ static PyObject *pop_object(safe_call_ctx_t *cctx) {
             return NULL;
         }
 
-        PyObject *obj_key = js_to_py(cctx);
-        if (!obj_value) {
+        PyObject *obj_key = pop_key(cctx, inter);
+        if (!obj_key) {
             duk_pop(ctx);
             return NULL;
         }
@@ -137,15 +217,64 @@ PyObject *js_to_py(safe_call_ctx_t *cctx) {
     if (duk_is_string(ctx, -1))
         return pop_string(cctx);
 
-    if (duk_is_array(ctx, -1))
-        return pop_array(cctx);
-
     if (duk_is_function(ctx, -1))
         return (PyObject *)create_jsfunction(cctx);
 
-    if (duk_is_object(ctx, -1))
+    if (duk_is_buffer_data(ctx, -1)) {
+        // plain buffers, array buffers and uint8 arrays (including node.js
+        // buffers) are converted to bytes
+        if (duk_is_buffer(ctx, -1) || is_instance(ctx, "uint8_array") ||
+            is_instance(ctx, "array_buffer"))
+            return pop_bytes(cctx);
+
+        if (is_instance(ctx, "float64_array"))
+            return pop_float64_array(cctx);
+    }
+
+    if (!duk_is_object(ctx, -1)) {
+        PyErr_SetString(PyExc_Exception, "unsupported value type");
+        return NULL;
+    }
+
+    if (!duk_is_array(ctx, -1))
         return pop_object(cctx);
 
-    PyErr_SetString(PyExc_Exception, "unsupported value type");
-    return NULL;
+    return pop_array(cctx);
+}
+
+
+// ( -- ) without data
+duk_ret_t init_key_cache(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+
+    // cached js strings are referenced from heap stash so that their
+    // addresses can not be reused for other strings
+    duk_push_heap_stash(ctx);
+    duk_push_array(ctx);
+    duk_put_prop_literal(ctx, -2, "key_cache");
+    duk_pop(ctx);
+
+    return 0;
+}
+
+
+// ( -- ) without data
+duk_ret_t init_buffer_types(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+
+    // constructors are obtained before global can be modified by scripts
+    duk_push_heap_stash(ctx);
+
+    duk_get_global_literal(ctx, "ArrayBuffer");
+    duk_put_prop_literal(ctx, -2, "array_buffer");
+
+    duk_get_global_literal(ctx, "Uint8Array");
+    duk_put_prop_literal(ctx, -2, "uint8_array");
+
+    duk_get_global_literal(ctx, "Float64Array");
+    duk_put_prop_literal(ctx, -2, "float64_array");
+
+    duk_pop(ctx);
+
+    return 0;
 }
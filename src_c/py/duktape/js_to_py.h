@@ -10,6 +10,12 @@
 extern "C" {
 #endif
 
+// ( -- ) without data
+duk_ret_t init_key_cache(safe_call_ctx_t *cctx);
+
+// ( -- ) without data
+duk_ret_t init_buffer_types(safe_call_ctx_t *cctx);
+
 // ( any -- ) without data
 PyObject *js_to_py(safe_call_ctx_t *cctx);
 
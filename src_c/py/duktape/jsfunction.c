@@ -77,15 +77,21 @@ static PyObject *JsFunction_call(JsFunction *self, PyObject *args,
         }
     }
 
+    if (interpreter_enter(inter)) {
+        interpreter_exit(inter);
+        duk_pop_n(ctx, args_size + 1);
+        return NULL;
+    }
+
     PyThreadState *state = PyEval_SaveThread();
 
     duk_int_t err = duk_pcall(ctx, args_size);
 
     PyEval_RestoreThread(state);
+    interpreter_exit(inter);
 
     if (err) {
-        PyErr_SetString(PyExc_Exception, duk_safe_to_string(ctx, -1));
-        duk_pop(ctx);
+        interpreter_raise_error(inter);
         return NULL;
     }
 
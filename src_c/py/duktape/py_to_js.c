@@ -1,5 +1,8 @@
 #include "py_to_js.h"
 
+#include <string.h>
+
+#include "float64_array.h"
 #include "pyfunction.h"
 
 
@@ -65,6 +68,83 @@ static duk_ret_t push_str(safe_call_ctx_t *cctx) {
 }
 
 
+// ( ptr -- arr ) without data
+static duk_ret_t push_bytes(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+
+    PyObject *obj = duk_get_pointer(ctx, -1);
+    duk_pop(ctx);
+
+    char *v;
+    Py_ssize_t v_len;
+
+    if (PyByteArray_Check(obj)) {
+        v = PyByteArray_AsString(obj);
+        v_len = PyByteArray_Size(obj);
+
+    } else {
+        // memory view is copied to bytes
+        if (!PyBytes_Check(obj)) {
+            obj = safe_call_add(cctx, PyBytes_FromObject(obj));
+            if (!obj)
+                return duk_error(ctx, DUK_ERR_ERROR, "invalid bytes");
+        }
+
+        if (PyBytes_AsStringAndSize(obj, &v, &v_len))
+            return duk_error(ctx, DUK_ERR_ERROR, "invalid bytes");
+    }
+
+    // data is copied because js code can modify typed array
+    void *data = duk_push_fixed_buffer(ctx, v_len);
+    memcpy(data, v, v_len);
+
+    duk_push_buffer_object(ctx, -1, 0, v_len, DUK_BUFOBJ_UINT8ARRAY);
+    duk_remove(ctx, -2);
+
+    return 1;
+}
+
+
+// ( ptr -- arr ) without data
+static duk_ret_t push_buffer(safe_call_ctx_t *cctx) {
+    duk_context *ctx = cctx->ctx;
+
+    PyObject *obj = duk_get_pointer(ctx, -1);
+    duk_pop(ctx);
+
+    PyObject *view = safe_call_add(cctx, PyMemoryView_FromObject(obj));
+    if (!view) {
+        PyErr_Clear();
+        return duk_error(ctx, DUK_ERR_TYPE_ERROR, "unsupported type");
+    }
+
+    // views of doubles are converted to Float64Array and all other buffers
+    // are converted to Uint8Array of raw bytes
+    int is_float64 = float64_array_check(view);
+    if (is_float64 < 0)
+        return duk_error(ctx, DUK_ERR_ERROR, "invalid buffer");
+
+    if (!is_float64) {
+        duk_push_pointer(ctx, view);
+        return push_bytes(cctx);
+    }
+
+    Py_ssize_t len = PyObject_Size(view);
+    if (len < 0)
+        return duk_error(ctx, DUK_ERR_ERROR, "invalid float64 array size");
+
+    void *data = duk_push_fixed_buffer(ctx, len * sizeof(double));
+    if (float64_array_copy(view, data, len))
+        return duk_error(ctx, DUK_ERR_ERROR, "convert float64 array error");
+
+    duk_push_buffer_object(ctx, -1, 0, len * sizeof(double),
+                           DUK_BUFOBJ_FLOAT64ARRAY);
+    duk_remove(ctx, -2);
+
+    return 1;
+}
+
+
 // ( ptr -- arr ) without data
 static duk_ret_t push_arr(safe_call_ctx_t *cctx) {
     duk_context *ctx = cctx->ctx;
@@ -140,6 +220,9 @@ duk_ret_t py_to_js(safe_call_ctx_t *cctx) {
     if (PyUnicode_Check(obj))
         return push_str(cctx);
 
+    if (PyBytes_Check(obj) || PyByteArray_Check(obj))
+        return push_bytes(cctx);
+
     if (PyCallable_Check(obj))
         return create_pyfunction(cctx);
 
@@ -149,8 +232,7 @@ duk_ret_t py_to_js(safe_call_ctx_t *cctx) {
     if (PyDict_Check(obj))
         return push_obj(cctx);
 
-    duk_pop(ctx);
-    return duk_error(ctx, DUK_ERR_TYPE_ERROR, "unsupported type");
+    return push_buffer(cctx);
 }
 
 
@@ -71,7 +71,7 @@ PyObject *safe_call_add(safe_call_ctx_t *cctx, PyObject *obj) {
         return NULL;
 
     while (cctx->objs_size <= cctx->objs_len) {
-        size_t objs_size = cctx->objs_size + 1024;
+        size_t objs_size = (cctx->objs_size ? cctx->objs_size * 2 : 1024);
         PyObject **objs =
             PyMem_Realloc(cctx->objs, objs_size * sizeof(PyObject *));
         if (!objs) {
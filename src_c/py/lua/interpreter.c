@@ -6,6 +6,7 @@
 #include "error.h"
 #include "module.h"
 #include "lua_to_py.h"
+#include "monotonic.h"
 #include "pyobject.h"
 #include "util.h"
 
@@ -23,15 +24,70 @@ static const luaL_Reg libs[] = {{LUA_GNAME, luaopen_base},
 
 
 static void *l_alloc(void *ud, void *ptr, size_t osize, size_t nsize) {
-    if (nsize)
-        return realloc(ptr, nsize);
+    Interpreter *self = ud;
 
-    free(ptr);
-    return NULL;
+    if (!ptr)
+        osize = 0;
+
+    if (!nsize) {
+        free(ptr);
+        self->memory_usage -= osize;
+        return NULL;
+    }
+
+    if (self->memory_limit && nsize > osize &&
+        self->memory_usage - osize + nsize > self->memory_limit)
+        return NULL;
+
+    void *new_ptr = realloc(ptr, nsize);
+    if (!new_ptr)
+        return NULL;
+
+    self->memory_usage = self->memory_usage - osize + nsize;
+    return new_ptr;
+}
+
+
+static void timeout_hook(lua_State *L, lua_Debug *ar) {
+    Interpreter *inter = get_interpreter(L);
+    if (!inter || !inter->deadline || get_monotonic_time() < inter->deadline)
+        return;
+
+    inter->timed_out = 1;
+    luaL_error(L, "execution timeout");
+}
+
+
+static int timeout_protected_call_k(lua_State *L, int status,
+                                    lua_KContext ctx) {
+    Interpreter *inter = get_interpreter(L);
+    if (inter && inter->timed_out)
+        return luaL_error(L, "execution timeout");
+
+    return lua_gettop(L);
+}
+
+
+static int timeout_protected_call(lua_State *L) {
+    lua_pushvalue(L, lua_upvalueindex(1));
+    lua_insert(L, 1);
+    lua_callk(L, lua_gettop(L) - 1, LUA_MULTRET, 0, timeout_protected_call_k);
+
+    return timeout_protected_call_k(L, LUA_OK, 0);
+}
+
+
+// [-0, +0, e] - wraps function in table on top of stack
+static void wrap_protected_call(lua_State *L, const char *name) {
+    lua_getfield(L, -1, name);
+    lua_pushcclosure(L, timeout_protected_call, 1);
+    lua_setfield(L, -2, name);
 }
 
 
 static int init_lua_state(lua_State *L) {
+    Interpreter *inter = lua_touserdata(L, 1);
+
     lua_rawsetp(L, LUA_REGISTRYINDEX, &interpreter_key);
 
     for (const luaL_Reg *lib = libs; lib->func; lib++) {
@@ -40,6 +96,19 @@ static int init_lua_state(lua_State *L) {
     }
 
     init_pyobject(L);
+    init_key_cache(L);
+
+    // errors caught by protected calls are raised again after timeout
+    if (inter->timeout) {
+        lua_pushglobaltable(L);
+        wrap_protected_call(L, "pcall");
+        wrap_protected_call(L, "xpcall");
+        lua_pop(L, 1);
+
+        lua_getglobal(L, LUA_COLIBNAME);
+        wrap_protected_call(L, "resume");
+        lua_pop(L, 1);
+    }
 
     return 0;
 }
@@ -47,12 +116,56 @@ static int init_lua_state(lua_State *L) {
 
 static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
                                  PyObject *kwds) {
+    PyObject *memory_limit = Py_None;
+    const char *gc_mode = NULL;
+    PyObject *timeout = Py_None;
+    if (!PyArg_ParseTuple(args, "|OzO", &memory_limit, &gc_mode, &timeout))
+        return NULL;
+
+    int gc_param;
+    if (!gc_mode || strcmp(gc_mode, "incremental") == 0) {
+        gc_param = LUA_GCINC;
+
+    } else if (strcmp(gc_mode, "generational") == 0) {
+        gc_param = LUA_GCGEN;
+
+    } else {
+        PyErr_SetString(PyExc_ValueError, "invalid gc mode");
+        return NULL;
+    }
+
+    size_t limit = 0;
+    if (memory_limit != Py_None) {
+        limit = PyLong_AsSize_t(memory_limit);
+        if (PyErr_Occurred())
+            return NULL;
+    }
+
+    double timeout_sec = 0;
+    if (timeout != Py_None) {
+        timeout_sec = PyFloat_AsDouble(timeout);
+        if (PyErr_Occurred())
+            return NULL;
+
+        if (timeout_sec <= 0) {
+            PyErr_SetString(PyExc_ValueError, "invalid timeout");
+            return NULL;
+        }
+    }
+
     Interpreter *self = (Interpreter *)PyType_GenericAlloc(type, 0);
     if (!self)
         return NULL;
 
     self->luafunction_type = NULL;
     self->L = NULL;
+    self->memory_usage = 0;
+    self->memory_limit = limit;
+    self->timeout = timeout_sec;
+    self->deadline = 0;
+    self->depth = 0;
+    self->timed_out = 0;
+    key_cache_init(&self->key_cache);
 
     ModuleState *state = PyType_GetModuleState(type);
     if (!state) {
@@ -63,9 +176,11 @@ static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
     Py_INCREF(state->luafunction_type);
     self->luafunction_type = state->luafunction_type;
 
-    self->L = lua_newstate(l_alloc, NULL);
-    if (!self->L)
+    self->L = lua_newstate(l_alloc, self);
+    if (!self->L) {
+        PyErr_SetString(PyExc_Exception, "error creating lua state");
         goto error;
+    }
 
     lua_pushcfunction(self->L, init_lua_state);
     lua_pushlightuserdata(self->L, self);
@@ -77,6 +192,16 @@ static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
 
     clear_lua_stack(self->L);
 
+    if (gc_param == LUA_GCGEN) {
+        lua_gc(self->L, LUA_GCGEN, 0, 0);
+
+    } else {
+        lua_gc(self->L, LUA_GCINC, 0, 0, 0);
+    }
+
+    if (self->timeout)
+        lua_sethook(self->L, timeout_hook, LUA_MASKCOUNT, 1000);
+
     return (PyObject *)self;
 
 error:
@@ -100,6 +225,8 @@ static void Interpreter_dealloc(Interpreter *self) {
     if (self->L)
         lua_close(self->L);
 
+    key_cache_clear(&self->key_cache);
+
     if (self->luafunction_type)
         Py_DECREF(self->luafunction_type);
 
@@ -109,16 +236,60 @@ static void Interpreter_dealloc(Interpreter *self) {
 }
 
 
+typedef struct {
+    char *data;
+    size_t len;
+    size_t size;
+} dump_buffer_t;
+
+
+static int dump_writer(lua_State *L, const void *p, size_t sz, void *ud) {
+    dump_buffer_t *buf = ud;
+
+    if (buf->len + sz > buf->size) {
+        size_t size = (buf->len + sz) * 2;
+        char *data = PyMem_Realloc(buf->data, size);
+        if (!data)
+            return 1;
+
+        buf->data = data;
+        buf->size = size;
+    }
+
+    memcpy(buf->data + buf->len, p, sz);
+    buf->len += sz;
+
+    return 0;
+}
+
+
 static PyObject *Interpreter_load(Interpreter *self, PyObject *args) {
-    const char *code;
-    Py_ssize_t code_len;
+    PyObject *code_obj;
     const char *name;
-    if (!PyArg_ParseTuple(args, "s#z", &code, &code_len, &name))
+    if (!PyArg_ParseTuple(args, "Oz", &code_obj, &name))
         return NULL;
 
+    char *code;
+    Py_ssize_t code_len;
+    const char *mode;
+
+    if (PyBytes_Check(code_obj)) {
+        if (PyBytes_AsStringAndSize(code_obj, &code, &code_len))
+            return NULL;
+
+        mode = "b";
+
+    } else {
+        code = (char *)PyUnicode_AsUTF8AndSize(code_obj, &code_len);
+        if (!code)
+            return NULL;
+
+        mode = "t";
+    }
+
     PyThreadState *state = PyEval_SaveThread();
 
-    int err = luaL_loadbufferx(self->L, code, code_len, name, "t");
+    int err = luaL_loadbufferx(self->L, code, code_len, name, mode);
 
     PyEval_RestoreThread(state);
 
@@ -151,10 +322,64 @@ done:
 }
 
 
+static PyObject *Interpreter_dump(Interpreter *self, PyObject *args) {
+    const char *code;
+    Py_ssize_t code_len;
+    const char *name;
+    if (!PyArg_ParseTuple(args, "s#z", &code, &code_len, &name))
+        return NULL;
+
+    PyThreadState *state = PyEval_SaveThread();
+
+    int err = luaL_loadbufferx(self->L, code, code_len, name, "t");
+
+    PyEval_RestoreThread(state);
+
+    PyObject *result = NULL;
+
+    if (err) {
+        py_raise_lua_error(self->L);
+        goto done;
+    }
+
+    dump_buffer_t buf = {.data = NULL, .len = 0, .size = 0};
+    err = lua_dump(self->L, dump_writer, &buf, 0);
+    if (err) {
+        PyErr_SetString(PyExc_Exception, "dump error");
+
+    } else {
+        result = PyBytes_FromStringAndSize(buf.data, buf.len);
+    }
+
+    PyMem_Free(buf.data);
+
+done:
+
+    clear_lua_stack(self->L);
+
+    return result;
+}
+
+
+static PyObject *Interpreter_get_memory_usage(Interpreter *self,
+                                              void *closure) {
+    return PyLong_FromSize_t(self->memory_usage);
+}
+
+
 static PyMethodDef interpreter_methods[] = {
     {.ml_name = "load",
      .ml_meth = (PyCFunction)Interpreter_load,
      .ml_flags = METH_VARARGS},
+    {.ml_name = "dump",
+     .ml_meth = (PyCFunction)Interpreter_dump,
+     .ml_flags = METH_VARARGS},
+    {NULL}};
+
+
+static PyGetSetDef interpreter_getset[] = {
+    {.name = "memory_usage",
+     .get = (getter)Interpreter_get_memory_usage},
     {NULL}};
 
 
@@ -162,6 +387,7 @@ static PyType_Slot interpreter_type_slots[] = {
     {Py_tp_new, Interpreter_new},
     {Py_tp_dealloc, Interpreter_dealloc},
     {Py_tp_methods, interpreter_methods},
+    {Py_tp_getset, interpreter_getset},
     {0, NULL}};
 
 
@@ -177,6 +403,31 @@ PyObject *create_interpreter_type(PyObject *module) {
 }
 
 
+int interpreter_enter(Interpreter *inter) {
+    if (inter->depth++) {
+        if (!inter->deadline || get_monotonic_time() < inter->deadline)
+            return 0;
+
+        inter->timed_out = 1;
+        PyErr_SetString(PyExc_TimeoutError, "execution timeout");
+        return -1;
+    }
+
+    inter->timed_out = 0;
+    inter->deadline =
+        (inter->timeout ? get_monotonic_time() + inter->timeout : 0);
+    return 0;
+}
+
+
+void interpreter_exit(Interpreter *inter) {
+    if (--inter->depth)
+        return;
+
+    inter->deadline = 0;
+}
+
+
 // [-0, +0, -]
 Interpreter *get_interpreter(lua_State *L) {
     lua_rawgetp(L, LUA_REGISTRYINDEX, &interpreter_key);
@@ -4,6 +4,8 @@
 #include <Python.h>
 #include <lua.h>
 
+#include "key_cache.h"
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -12,11 +14,26 @@ typedef struct {
     PyObject ob_base;
     PyObject *luafunction_type;
     lua_State *L;
+    size_t memory_usage;
+    size_t memory_limit;
+    double timeout;
+    double deadline;
+    size_t depth;
+    int timed_out;
+    key_cache_t key_cache;
 } Interpreter;
 
 
 PyObject *create_interpreter_type(PyObject *module);
 
+// start execution of lua code (sets deadline for outermost execution) -
+// returns -1 and raises TimeoutError if deadline of outer execution has
+// already expired (interpreter_exit should be called regardless of result)
+int interpreter_enter(Interpreter *inter);
+
+// end execution of lua code
+void interpreter_exit(Interpreter *inter);
+
 // [-0, +1, e]
 Interpreter *get_interpreter(lua_State *L);
 
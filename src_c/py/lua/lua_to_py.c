@@ -2,10 +2,14 @@
 
 #include <lauxlib.h>
 
+#include "interpreter.h"
 #include "luafunction.h"
 #include "pyobject.h"
 
 
+static int key_cache_key;
+
+
 static int lua_nil_to_py(lua_State *L) {
     lua_pop(L, 1);
 
@@ -59,6 +63,13 @@ static int lua_string_to_py(lua_State *L) {
 
     new_pyobject(L);
     PyObject *obj = PyUnicode_FromStringAndSize(val, val_len);
+
+    // strings which are not valid utf-8 are converted to bytes
+    if (!obj && PyErr_ExceptionMatches(PyExc_UnicodeDecodeError)) {
+        PyErr_Clear();
+        obj = PyBytes_FromStringAndSize(val, val_len);
+    }
+
     set_pyobject(L, -1, obj);
 
     lua_insert(L, -2);
@@ -72,14 +83,19 @@ static int lua_sequence_to_py(lua_State *L) {
     new_pyobject(L);
     lua_insert(L, -2);
 
-    PyObject *obj = PyList_New(0);
+    // sequence ends with first nil element - raw length (border) is used
+    // only as size hint
+    size_t len = lua_rawlen(L, -1);
+
+    PyObject *obj = PyList_New(len);
     set_pyobject(L, -2, obj);
     if (!obj) {
         lua_pop(L, 1);
         return 1;
     }
 
-    for (size_t i = 0; lua_rawgeti(L, -1, i + 1) != LUA_TNIL; ++i) {
+    size_t i = 0;
+    for (; lua_rawgeti(L, -1, i + 1) != LUA_TNIL; ++i) {
         lua_to_py(L);
         PyObject *val = get_pyobject(L, -1);
         if (!val) {
@@ -88,7 +104,11 @@ static int lua_sequence_to_py(lua_State *L) {
             return 1;
         }
 
-        if (PyList_Append(obj, val)) {
+        if (i < len) {
+            Py_INCREF(val);
+            PyList_SetItem(obj, i, val);
+
+        } else if (PyList_Append(obj, val)) {
             lua_pop(L, 2);
             set_pyobject(L, -1, NULL);
             return 1;
@@ -99,10 +119,53 @@ static int lua_sequence_to_py(lua_State *L) {
 
     lua_pop(L, 2);
 
+    if (i < len && PyList_SetSlice(obj, i, len, NULL)) {
+        set_pyobject(L, -1, NULL);
+        return 1;
+    }
+
     return 1;
 }
 
 
+// [-0, +0, e] - returns new reference
+static PyObject *lua_key_to_py(lua_State *L, Interpreter *inter) {
+    // same keys are usually repeated in many tables
+    int cacheable = inter && lua_type(L, -1) == LUA_TSTRING;
+    uintptr_t cache_key = (cacheable ? (uintptr_t)lua_tostring(L, -1) : 0);
+    if (cacheable) {
+        PyObject *key = key_cache_get(&inter->key_cache, cache_key);
+        if (key)
+            return key;
+    }
+
+    size_t key_len;
+    const char *key_str = lua_tolstring(L, -1, &key_len);
+    if (!key_str) {
+        PyErr_SetString(PyExc_Exception, "unsupported object key");
+        return NULL;
+    }
+
+    PyObject *key = PyUnicode_FromStringAndSize(key_str, key_len);
+    if (!key || !cacheable)
+        return key;
+
+    key_cache_entry_t *entry = key_cache_reserve(&inter->key_cache, cache_key);
+    if (!entry)
+        return key;
+
+    // array part of registry table is preallocated so setting its element
+    // doesn't raise memory errors
+    lua_rawgetp(L, LUA_REGISTRYINDEX, &key_cache_key);
+    lua_pushvalue(L, -2);
+    lua_rawseti(L, -2, entry - inter->key_cache.entries + 1);
+    lua_pop(L, 1);
+
+    key_cache_set(entry, cache_key, key);
+    return key;
+}
+
+
 static int lua_table_to_py(lua_State *L) {
     new_pyobject(L);
     lua_insert(L, -2);
@@ -114,15 +177,13 @@ static int lua_table_to_py(lua_State *L) {
         return 1;
     }
 
+    Interpreter *inter = get_interpreter(L);
+
     lua_pushnil(L);
     while (lua_next(L, -2)) {
         if (!lua_isstring(L, -2))
             return luaL_error(L, "unsupported object key");
 
-        const char *key = lua_tolstring(L, -2, NULL);
-        if (!key)
-            return luaL_error(L, "unsupported object key");
-
         lua_to_py(L);
         PyObject *val = get_pyobject(L, -1);
         if (!val) {
@@ -131,7 +192,18 @@ static int lua_table_to_py(lua_State *L) {
             return 1;
         }
 
-        if (PyDict_SetItemString(obj, key, val)) {
+        lua_pushvalue(L, -2);
+        PyObject *key = lua_key_to_py(L, inter);
+        lua_pop(L, 1);
+        if (!key) {
+            lua_pop(L, 3);
+            set_pyobject(L, -1, NULL);
+            return 1;
+        }
+
+        int err = PyDict_SetItem(obj, key, val);
+        Py_DECREF(key);
+        if (err) {
             lua_pop(L, 3);
             set_pyobject(L, -1, NULL);
             return 1;
@@ -182,3 +254,12 @@ int lua_to_py(lua_State *L) {
 
     return luaL_error(L, "invalid lua type");
 }
+
+
+// [-0, +0, e]
+void init_key_cache(lua_State *L) {
+    // cached lua strings are referenced from registry so that their
+    // addresses can not be reused for other strings
+    lua_createtable(L, KEY_CACHE_SIZE, 0);
+    lua_rawsetp(L, LUA_REGISTRYINDEX, &key_cache_key);
+}
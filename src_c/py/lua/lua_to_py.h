@@ -8,6 +8,9 @@
 extern "C" {
 #endif
 
+// [-0, +0, e]
+void init_key_cache(lua_State *L);
+
 // [-1, +1, e]
 int lua_to_py(lua_State *L);
 
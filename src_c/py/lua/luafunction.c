@@ -67,14 +67,27 @@ static PyObject *LuaFunction_call(LuaFunction *self, PyObject *args,
         }
     }
 
+    if (interpreter_enter(self->inter)) {
+        interpreter_exit(self->inter);
+        goto done;
+    }
+
     PyThreadState *state = PyEval_SaveThread();
 
     int err = lua_pcall(L, args_size, 1, 0);
 
     PyEval_RestoreThread(state);
 
+    interpreter_exit(self->inter);
+
     if (err) {
-        py_raise_lua_error(L);
+        if (self->inter->timed_out) {
+            PyErr_SetString(PyExc_TimeoutError, "execution timeout");
+
+        } else {
+            py_raise_lua_error(L);
+        }
+
         goto done;
     }
 
@@ -1,9 +1,13 @@
 #include "py_to_lua.h"
 
+#include <limits.h>
+
 #include <lauxlib.h>
 
 #include "error.h"
+#include "float64_array.h"
 #include "pyfunction.h"
+#include "pyobject.h"
 
 
 static int py_int_to_lua(lua_State *L, PyObject *obj) {
@@ -37,12 +41,95 @@ static int py_str_to_lua(lua_State *L, PyObject *obj) {
 }
 
 
+static int py_bytes_to_lua(lua_State *L, PyObject *obj) {
+    // lua strings are arbitrary byte sequences
+    if (PyByteArray_Check(obj)) {
+        lua_pushlstring(L, PyByteArray_AsString(obj), PyByteArray_Size(obj));
+        return 1;
+    }
+
+    // memory view is copied to bytes which are kept alive by pyobject
+    // userdata in case pushing string raises lua error
+    int has_tmp = !PyBytes_Check(obj);
+    if (has_tmp) {
+        new_pyobject(L);
+        obj = PyBytes_FromObject(obj);
+        set_pyobject(L, -1, obj);
+        if (!obj)
+            return lua_raise_py_error(L, "convert bytes error");
+    }
+
+    char *v;
+    Py_ssize_t v_len;
+    if (PyBytes_AsStringAndSize(obj, &v, &v_len))
+        return lua_raise_py_error(L, "convert bytes error");
+
+    lua_pushlstring(L, v, v_len);
+
+    if (has_tmp)
+        lua_remove(L, -2);
+
+    return 1;
+}
+
+
+static int py_float64_array_to_lua(lua_State *L, PyObject *view) {
+    Py_ssize_t len = PyObject_Size(view);
+    if (len < 0 || len > INT_MAX)
+        return lua_raise_py_error(L, "invalid float64 array size");
+
+    // items are copied to userdata memory (released by lua gc in case of
+    // lua error) and stored as numbers in array part of table
+    double *data = lua_newuserdatauv(L, len * sizeof(double), 0);
+    if (float64_array_copy(view, data, len))
+        return lua_raise_py_error(L, "convert float64 array error");
+
+    lua_createtable(L, len, 0);
+
+    for (int i = 0; i < len; ++i) {
+        lua_pushnumber(L, data[i]);
+        lua_rawseti(L, -2, i + 1);
+    }
+
+    lua_remove(L, -2);
+    return 1;
+}
+
+
+static int py_buffer_to_lua(lua_State *L, PyObject *obj) {
+    // memory view is kept alive by pyobject userdata in case of lua error
+    new_pyobject(L);
+    PyObject *view = PyMemoryView_FromObject(obj);
+    set_pyobject(L, -1, view);
+    if (!view) {
+        PyErr_Clear();
+        return luaL_error(L, "unsupported type");
+    }
+
+    // views of doubles are converted to tables of numbers and all other
+    // buffers are converted to strings of raw bytes
+    int is_float64 = float64_array_check(view);
+    if (is_float64 < 0)
+        return lua_raise_py_error(L, "invalid buffer");
+
+    if (is_float64) {
+        py_float64_array_to_lua(L, view);
+
+    } else {
+        py_bytes_to_lua(L, view);
+    }
+
+    lua_remove(L, -2);
+    return 1;
+}
+
+
 static int py_list_to_lua(lua_State *L, PyObject *obj) {
     Py_ssize_t len = PyList_Size(obj);
-    if (len < 0)
+    if (len < 0 || len > INT_MAX)
         return lua_raise_py_error(L, "invalid list size");
 
-    lua_newtable(L);
+    lua_createtable(L, len, 0);
 
     for (size_t i = 0; i < len; ++i) {
         PyObject *obj_i = PyList_GetItem(obj, i);
@@ -60,7 +147,11 @@ static int py_list_to_lua(lua_State *L, PyObject *obj) {
 
 
 static int py_dict_to_lua(lua_State *L, PyObject *obj) {
-    lua_newtable(L);
+    Py_ssize_t len = PyDict_Size(obj);
+    if (len < 0 || len > INT_MAX)
+        return lua_raise_py_error(L, "invalid dict size");
+
+    lua_createtable(L, 0, len);
 
     PyObject *obj_k, *obj_v;
     Py_ssize_t i = 0;
@@ -107,6 +198,9 @@ int py_to_lua(lua_State *L) {
     if (PyUnicode_Check(obj))
         return py_str_to_lua(L, obj);
 
+    if (PyBytes_Check(obj) || PyByteArray_Check(obj))
+        return py_bytes_to_lua(L, obj);
+
     if (PyCallable_Check(obj)) {
         return create_pyfunction(L, obj);
     }
@@ -117,5 +211,5 @@ int py_to_lua(lua_State *L) {
     if (PyDict_Check(obj))
         return py_dict_to_lua(L, obj);
 
-    return luaL_error(L, "unsupported type");
+    return py_buffer_to_lua(L, obj);
 }
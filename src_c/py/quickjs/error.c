@@ -1,5 +1,7 @@
 #include "error.h"
 
+#include "runtime.h"
+
 
 JSValue js_throw_py_err(JSContext *ctx, const char *alternative) {
     PyObject *ptype;
@@ -51,12 +53,22 @@ done:
 PyObject *py_raise_js_exc(JSContext *ctx) {
     JSValue exc = JS_GetException(ctx);
 
+    Runtime *runtime = JS_GetRuntimeOpaque(JS_GetRuntime(ctx));
+    if (runtime && runtime->timed_out) {
+        JS_FreeValue(ctx, exc);
+
+        PyErr_SetString(PyExc_TimeoutError, "execution timeout");
+        return NULL;
+    }
+
     if (!JS_IsError(ctx, exc)) {
         const char *exc_str = JS_ToCString(ctx, exc);
         JS_FreeValue(ctx, exc);
 
-        PyErr_SetString(PyExc_Exception, exc_str);
-        JS_FreeCString(ctx, exc_str);
+        PyErr_SetString(PyExc_Exception, (exc_str ? exc_str : "error"));
+
+        if (exc_str)
+            JS_FreeCString(ctx, exc_str);
 
         return NULL;
     }
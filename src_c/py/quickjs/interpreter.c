@@ -1,5 +1,6 @@
 #include "interpreter.h"
 
+#include "error.h"
 #include "js_to_py.h"
 #include "module.h"
 #include "pyfunction.h"
@@ -7,14 +8,33 @@
 
 static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
                                  PyObject *kwds) {
+    PyObject *runtime = Py_None;
+    PyObject *timeout = Py_None;
+    if (!PyArg_ParseTuple(args, "|OO", &runtime, &timeout))
+        return NULL;
+
+    double timeout_sec = 0;
+    if (timeout != Py_None) {
+        timeout_sec = PyFloat_AsDouble(timeout);
+        if (PyErr_Occurred())
+            return NULL;
+
+        if (timeout_sec <= 0) {
+            PyErr_SetString(PyExc_ValueError, "invalid timeout");
+            return NULL;
+        }
+    }
+
     Interpreter *self = (Interpreter *)PyType_GenericAlloc(type, 0);
     if (!self)
         return NULL;
 
     self->jsfunction_type = NULL;
-    self->rt = NULL;
+    self->runtime = NULL;
     self->ctx = NULL;
-    self->pyfunction_cid = JS_INVALID_CLASS_ID;
+    self->uint8_array_ctor = JS_UNDEFINED;
+    self->float64_array_ctor = JS_UNDEFINED;
+    self->timeout = timeout_sec;
 
     ModuleState *state = PyType_GetModuleState(type);
     if (!state) {
@@ -25,51 +45,62 @@ static PyObject *Interpreter_new(PyTypeObject *type, PyObject *args,
     Py_INCREF(state->jsfunction_type);
     self->jsfunction_type = state->jsfunction_type;
 
-    self->rt = JS_NewRuntime();
-    if (!self->rt)
-        goto error;
-
-    self->ctx = JS_NewContext(self->rt);
-    if (!self->ctx)
-        goto error;
+    if (runtime == Py_None) {
+        self->runtime =
+            (Runtime *)PyObject_CallNoArgs(state->runtime_type);
+        if (!self->runtime)
+            goto error;
+
+    } else {
+        if (!PyObject_TypeCheck(runtime,
+                                (PyTypeObject *)state->runtime_type)) {
+            PyErr_SetString(PyExc_TypeError, "invalid runtime");
+            goto error;
+        }
+
+        Py_INCREF(runtime);
+        self->runtime = (Runtime *)runtime;
+    }
 
-    self->pyfunction_cid = create_pyfunction_class(self->rt);
-    if (self->pyfunction_cid == JS_INVALID_CLASS_ID)
+    runtime_acquire(self->runtime);
+    self->ctx = JS_NewContext(self->runtime->rt);
+    if (self->ctx) {
+        // constructor is obtained before global can be modified by scripts
+        JSValue global = JS_GetGlobalObject(self->ctx);
+        self->uint8_array_ctor =
+            JS_GetPropertyStr(self->ctx, global, "Uint8Array");
+        self->float64_array_ctor =
+            JS_GetPropertyStr(self->ctx, global, "Float64Array");
+        JS_FreeValue(self->ctx, global);
+    }
+    runtime_release(self->runtime);
+    if (!self->ctx) {
+        PyErr_SetString(PyExc_Exception, "error creating context");
         goto error;
+    }
 
-    JS_SetRuntimeOpaque(self->rt, self);
     JS_SetContextOpaque(self->ctx, self);
 
     return (PyObject *)self;
 
 error:
 
-    if (self->ctx) {
-        JS_FreeContext(self->ctx);
-        self->ctx = NULL;
-    }
-
-    if (self->rt) {
-        JS_FreeRuntime(self->rt);
-        self->rt = NULL;
-    }
-
-    if (self->jsfunction_type) {
-        Py_DECREF(self->jsfunction_type);
-        self->jsfunction_type = NULL;
-    }
-
     Py_DECREF(self);
     return NULL;
 }
 
 
 static void Interpreter_dealloc(Interpreter *self) {
-    if (self->ctx)
-        JS_FreeContext(self->ctx);
+    if (self->ctx) {
+        runtime_free_value(self->runtime, self->uint8_array_ctor);
+        runtime_free_value(self->runtime, self->float64_array_ctor);
 
-    if (self->rt)
-        JS_FreeRuntime(self->rt);
+        JS_SetContextOpaque(self->ctx, NULL);
+        runtime_free_context(self->runtime, self->ctx);
+    }
+
+    if (self->runtime)
+        Py_DECREF(self->runtime);
 
     if (self->jsfunction_type)
         Py_DECREF(self->jsfunction_type);
@@ -80,20 +111,86 @@ static void Interpreter_dealloc(Interpreter *self) {
 }
 
 
-static PyObject *Interpreter_eval(Interpreter *self, PyObject *args) {
+static PyObject *eval(Interpreter *self, PyObject *args) {
+    JSValue val;
+
+    if (PyBytes_Check(args)) {
+        char *input;
+        Py_ssize_t input_len;
+        if (PyBytes_AsStringAndSize(args, &input, &input_len))
+            return NULL;
+
+        JSValue fn = JS_ReadObject(self->ctx, (const uint8_t *)input,
+                                   input_len, JS_READ_OBJ_BYTECODE);
+        if (JS_IsException(fn))
+            return py_raise_js_exc(self->ctx);
+
+        PyThreadState *state = PyEval_SaveThread();
+
+        val = JS_EvalFunction(self->ctx, fn);
+
+        PyEval_RestoreThread(state);
+
+    } else {
+        Py_ssize_t input_len;
+        const char *input = PyUnicode_AsUTF8AndSize(args, &input_len);
+        if (!input)
+            return NULL;
+
+        PyThreadState *state = PyEval_SaveThread();
+
+        val = JS_Eval(self->ctx, input, input_len, "", JS_EVAL_TYPE_GLOBAL);
+
+        PyEval_RestoreThread(state);
+    }
+
+    PyObject *result = js_val_to_py_obj(self->ctx, val);
+    JS_FreeValue(self->ctx, val);
+
+    return result;
+}
+
+
+static PyObject *dump(Interpreter *self, PyObject *args) {
     Py_ssize_t input_len;
     const char *input = PyUnicode_AsUTF8AndSize(args, &input_len);
     if (!input)
         return NULL;
 
-    PyThreadState *state = PyEval_SaveThread();
+    JSValue fn = JS_Eval(self->ctx, input, input_len, "",
+                         JS_EVAL_TYPE_GLOBAL | JS_EVAL_FLAG_COMPILE_ONLY);
+    if (JS_IsException(fn))
+        return py_raise_js_exc(self->ctx);
 
-    JSValue val = JS_Eval(self->ctx, input, input_len, "", JS_EVAL_TYPE_GLOBAL);
+    size_t buf_len;
+    uint8_t *buf =
+        JS_WriteObject(self->ctx, &buf_len, fn, JS_WRITE_OBJ_BYTECODE);
+    JS_FreeValue(self->ctx, fn);
+    if (!buf)
+        return py_raise_js_exc(self->ctx);
 
-    PyEval_RestoreThread(state);
+    PyObject *result = PyBytes_FromStringAndSize((const char *)buf, buf_len);
+    js_free(self->ctx, buf);
 
-    PyObject *result = js_val_to_py_obj(self->ctx, val);
-    JS_FreeValue(self->ctx, val);
+    return result;
+}
+
+
+static PyObject *Interpreter_eval(Interpreter *self, PyObject *args) {
+    runtime_acquire(self->runtime);
+    PyObject *result =
+        (runtime_set_deadline(self->runtime, self->timeout) ? NULL
+                                                            : eval(self, args));
+    runtime_release(self->runtime);
+
+    return result;
+}
+
+
+static PyObject *Interpreter_dump(Interpreter *self, PyObject *args) {
+    runtime_acquire(self->runtime);
+    PyObject *result = dump(self, args);
+    runtime_release(self->runtime);
 
     return result;
 }
@@ -103,6 +200,9 @@ static PyMethodDef interpreter_methods[] = {
     {.ml_name = "eval",
      .ml_meth = (PyCFunction)Interpreter_eval,
      .ml_flags = METH_O},
+    {.ml_name = "dump",
+     .ml_meth = (PyCFunction)Interpreter_dump,
+     .ml_flags = METH_O},
     {NULL}};
 
 
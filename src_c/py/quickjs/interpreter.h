@@ -4,9 +4,7 @@
 #include <Python.h>
 #include <quickjs.h>
 
-#ifndef JS_INVALID_CLASS_ID
-#define JS_INVALID_CLASS_ID 0
-#endif
+#include "runtime.h"
 
 #ifdef __cplusplus
 extern "C" {
@@ -15,9 +13,11 @@ extern "C" {
 typedef struct {
     PyObject ob_base;
     PyObject *jsfunction_type;
-    JSRuntime *rt;
+    Runtime *runtime;
     JSContext *ctx;
-    JSClassID pyfunction_cid;
+    JSValue uint8_array_ctor;
+    JSValue float64_array_ctor;
+    double timeout;
 } Interpreter;
 
 
@@ -1,7 +1,9 @@
 #include "js_to_py.h"
 
 #include "error.h"
+#include "float64_array.h"
 #include "jsfunction.h"
+#include "runtime.h"
 
 
 static void free_js_props(JSContext *ctx, JSPropertyEnum *props, size_t len) {
@@ -16,8 +18,14 @@ static void free_js_props(JSContext *ctx, JSPropertyEnum *props, size_t len) {
 
 
 static ssize_t get_js_arr_length(JSContext *ctx, JSValueConst arr) {
+    Runtime *runtime = JS_GetRuntimeOpaque(JS_GetRuntime(ctx));
+    JSValue val = JS_GetProperty(ctx, arr, runtime->length_atom);
+
+    // length of array shorter than 2^31 is always int
+    if (JS_VALUE_GET_TAG(val) == JS_TAG_INT)
+        return JS_VALUE_GET_INT(val);
+
     uint64_t length;
-    JSValue val = JS_GetPropertyStr(ctx, arr, "length");
     int err = JS_ToIndex(ctx, &length, val);
     JS_FreeValue(ctx, val);
     return (err < 0 ? -1 : length);
@@ -25,13 +33,100 @@ static ssize_t get_js_arr_length(JSContext *ctx, JSValueConst arr) {
 
 
 static PyObject *js_str_to_py_obj(JSContext *ctx, JSValueConst val) {
-    const char *val_str = JS_ToCString(ctx, val);
-    PyObject *obj = PyUnicode_FromString(val_str);
+    // ASCII strings are returned without copying and python decodes them
+    // with its ASCII fast path
+    size_t val_str_len;
+    const char *val_str = JS_ToCStringLen(ctx, &val_str_len, val);
+    if (!val_str)
+        return py_raise_js_exc(ctx);
+
+    PyObject *obj = PyUnicode_FromStringAndSize(val_str, val_str_len);
     JS_FreeCString(ctx, val_str);
     return obj;
 }
 
 
+static PyObject *js_atom_to_py_obj(JSContext *ctx, JSAtom atom) {
+    JSValue val = JS_AtomToString(ctx, atom);
+    if (JS_IsException(val))
+        return py_raise_js_exc(ctx);
+
+    PyObject *obj = js_str_to_py_obj(ctx, val);
+    JS_FreeValue(ctx, val);
+    return obj;
+}
+
+
+static PyObject *js_key_to_py_obj(JSContext *ctx, JSAtom atom) {
+    // same keys are usually repeated in many objects
+    Runtime *runtime = JS_GetRuntimeOpaque(JS_GetRuntime(ctx));
+    PyObject *obj = key_cache_get(&runtime->key_cache, atom);
+    if (obj)
+        return obj;
+
+    obj = js_atom_to_py_obj(ctx, atom);
+    if (!obj)
+        return NULL;
+
+    key_cache_entry_t *entry = key_cache_reserve(&runtime->key_cache, atom);
+    if (!entry)
+        return obj;
+
+    // cached atom reference prevents reuse of atom for different string
+    JS_DupAtom(ctx, atom);
+    if (entry->obj)
+        JS_FreeAtom(ctx, entry->key);
+
+    key_cache_set(entry, atom, obj);
+    return obj;
+}
+
+
+static PyObject *js_buffer_to_py_obj(JSContext *ctx, JSValueConst val) {
+    size_t size;
+    uint8_t *data = JS_GetArrayBuffer(ctx, &size, val);
+    if (!data)
+        return py_raise_js_exc(ctx);
+
+    return PyBytes_FromStringAndSize((const char *)data, size);
+}
+
+
+static PyObject *js_uint8_arr_to_py_obj(JSContext *ctx, JSValueConst val) {
+    size_t offset;
+    size_t length;
+    JSValue buffer = JS_GetTypedArrayBuffer(ctx, val, &offset, &length, NULL);
+    if (JS_IsException(buffer))
+        return py_raise_js_exc(ctx);
+
+    size_t size;
+    uint8_t *data = JS_GetArrayBuffer(ctx, &size, buffer);
+    JS_FreeValue(ctx, buffer);
+    if (!data)
+        return py_raise_js_exc(ctx);
+
+    return PyBytes_FromStringAndSize((const char *)data + offset, length);
+}
+
+
+static PyObject *js_float64_arr_to_py_obj(JSContext *ctx, JSValueConst val) {
+    size_t offset;
+    size_t length;
+    JSValue buffer = JS_GetTypedArrayBuffer(ctx, val, &offset, &length, NULL);
+    if (JS_IsException(buffer))
+        return py_raise_js_exc(ctx);
+
+    size_t size;
+    uint8_t *data = JS_GetArrayBuffer(ctx, &size, buffer);
+    JS_FreeValue(ctx, buffer);
+    if (!data)
+        return py_raise_js_exc(ctx);
+
+    return float64_array_new((const double *)(data + offset),
+                             length / sizeof(double));
+}
+
+
 static PyObject *js_arr_to_py_obj(JSContext *ctx, JSValueConst val) {
     ssize_t length = get_js_arr_length(ctx, val);
     if (length < 0) {
@@ -78,11 +173,10 @@ static PyObject *js_obj_to_py_obj(JSContext *ctx, JSValueConst val) {
     }
 
     for (size_t i = 0; i < props_len; ++i) {
-        const char *key = JS_AtomToCString(ctx, props[i].atom);
+        PyObject *key = js_key_to_py_obj(ctx, props[i].atom);
         if (!key) {
             Py_DECREF(obj);
             free_js_props(ctx, props, props_len);
-            PyErr_SetString(PyExc_Exception, "unsupported object key");
             return NULL;
         }
 
@@ -90,14 +184,14 @@ static PyObject *js_obj_to_py_obj(JSContext *ctx, JSValueConst val) {
         PyObject *obj_i = js_val_to_py_obj(ctx, val_i);
         JS_FreeValue(ctx, val_i);
         if (!obj_i) {
-            JS_FreeCString(ctx, key);
+            Py_DECREF(key);
             Py_DECREF(obj);
             free_js_props(ctx, props, props_len);
             return NULL;
         }
 
-        int err = PyDict_SetItemString(obj, key, obj_i);
-        JS_FreeCString(ctx, key);
+        int err = PyDict_SetItem(obj, key, obj_i);
+        Py_DECREF(key);
         Py_DECREF(obj_i);
         if (err < 0) {
             Py_DECREF(obj);
@@ -138,9 +232,21 @@ PyObject *js_val_to_py_obj(JSContext *ctx, JSValueConst val) {
     if (JS_IsArray(ctx, val))
         return js_arr_to_py_obj(ctx, val);
 
-    if (JS_IsObject(val))
-        return js_obj_to_py_obj(ctx, val);
+    if (!JS_IsObject(val)) {
+        PyErr_SetString(PyExc_Exception, "unsupported value type");
+        return NULL;
+    }
+
+    Runtime *runtime = JS_GetRuntimeOpaque(JS_GetRuntime(ctx));
+
+    if (JS_GetOpaque(val, runtime->uint8_array_cid))
+        return js_uint8_arr_to_py_obj(ctx, val);
+
+    if (JS_GetOpaque(val, runtime->array_buffer_cid))
+        return js_buffer_to_py_obj(ctx, val);
+
+    if (JS_GetOpaque(val, runtime->float64_array_cid))
+        return js_float64_arr_to_py_obj(ctx, val);
 
-    PyErr_SetString(PyExc_Exception, "unsupported value type");
-    return NULL;
+    return js_obj_to_py_obj(ctx, val);
 }
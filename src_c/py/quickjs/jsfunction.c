@@ -25,7 +25,7 @@ static PyObject *JsFunction_new(PyTypeObject *type, PyObject *args,
 
 static void JsFunction_dealloc(JsFunction *self) {
     if (self->inter) {
-        JS_FreeValue(self->inter->ctx, self->fn);
+        runtime_free_value(self->inter->runtime, self->fn);
         Py_DECREF(self->inter);
     }
 
@@ -35,13 +35,7 @@ static void JsFunction_dealloc(JsFunction *self) {
 }
 
 
-static PyObject *JsFunction_call(JsFunction *self, PyObject *args,
-                                 PyObject *kwargs) {
-    if (!self->inter || JS_IsUninitialized(self->fn)) {
-        PyErr_SetString(PyExc_Exception, "function not initialized");
-        return NULL;
-    }
-
+static PyObject *call(JsFunction *self, PyObject *args) {
     Py_ssize_t args_size = PyTuple_Size(args);
     if (args_size < 0) {
         PyErr_SetString(PyExc_Exception, "invalid args length");
@@ -80,6 +74,25 @@ static PyObject *JsFunction_call(JsFunction *self, PyObject *args,
 }
 
 
+static PyObject *JsFunction_call(JsFunction *self, PyObject *args,
+                                 PyObject *kwargs) {
+    if (!self->inter || JS_IsUninitialized(self->fn)) {
+        PyErr_SetString(PyExc_Exception, "function not initialized");
+        return NULL;
+    }
+
+    Runtime *runtime = self->inter->runtime;
+
+    runtime_acquire(runtime);
+    PyObject *result =
+        (runtime_set_deadline(runtime, self->inter->timeout) ? NULL
+                                                             : call(self, args));
+    runtime_release(runtime);
+
+    return result;
+}
+
+
 static PyType_Slot jsfunction_type_slots[] = {
     {Py_tp_new, JsFunction_new},
     {Py_tp_dealloc, JsFunction_dealloc},
@@ -2,6 +2,7 @@
 
 #include "interpreter.h"
 #include "jsfunction.h"
+#include "runtime.h"
 
 
 static int module_exec(PyObject *module) {
@@ -11,6 +12,7 @@ static int module_exec(PyObject *module) {
 
     state->interpreter_type = NULL;
     state->jsfunction_type = NULL;
+    state->runtime_type = NULL;
 
     state->interpreter_type = create_interpreter_type(module);
     if (!state->interpreter_type)
@@ -20,16 +22,28 @@ static int module_exec(PyObject *module) {
     if (!state->jsfunction_type)
         goto error;
 
+    state->runtime_type = create_runtime_type(module);
+    if (!state->runtime_type)
+        goto error;
+
     if (PyModule_AddObjectRef(module, "Interpreter", state->interpreter_type))
         goto error;
 
     if (PyModule_AddObjectRef(module, "JsFunction", state->jsfunction_type))
         goto error;
 
+    if (PyModule_AddObjectRef(module, "Runtime", state->runtime_type))
+        goto error;
+
     return 0;
 
 error:
 
+    if (state->runtime_type) {
+        Py_DECREF(state->runtime_type);
+        state->runtime_type = NULL;
+    }
+
     if (state->jsfunction_type) {
         Py_DECREF(state->jsfunction_type);
         state->jsfunction_type = NULL;
@@ -51,6 +65,7 @@ static void module_free(PyObject *module) {
 
     Py_XDECREF(state->interpreter_type);
     Py_XDECREF(state->jsfunction_type);
+    Py_XDECREF(state->runtime_type);
 }
 
 
@@ -10,6 +10,7 @@ extern "C" {
 typedef struct {
     PyObject *interpreter_type;
     PyObject *jsfunction_type;
+    PyObject *runtime_type;
 } ModuleState;
 
 #ifdef __cplusplus
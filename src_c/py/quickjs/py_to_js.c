@@ -1,6 +1,8 @@
 #include "py_to_js.h"
 
 #include "error.h"
+#include "float64_array.h"
+#include "interpreter.h"
 #include "pyfunction.h"
 
 
@@ -32,9 +34,104 @@ static JSValue py_str_to_js_val(JSContext *ctx, PyObject *obj) {
 }
 
 
+static JSValue py_bytes_to_js_val(JSContext *ctx, PyObject *obj) {
+    char *v;
+    Py_ssize_t v_len;
+    PyObject *bytes = NULL;
+
+    if (PyByteArray_Check(obj)) {
+        v = PyByteArray_AsString(obj);
+        v_len = PyByteArray_Size(obj);
+
+    } else {
+        // memory view is copied to bytes
+        if (!PyBytes_Check(obj)) {
+            bytes = PyBytes_FromObject(obj);
+            if (!bytes)
+                return js_throw_py_err(ctx, "invalid bytes");
+
+            obj = bytes;
+        }
+
+        if (PyBytes_AsStringAndSize(obj, &v, &v_len)) {
+            Py_XDECREF(bytes);
+            return js_throw_py_err(ctx, "invalid bytes");
+        }
+    }
+
+    // data is copied because js code can modify typed array
+    JSValue buffer = JS_NewArrayBufferCopy(ctx, (uint8_t *)v, v_len);
+    Py_XDECREF(bytes);
+    if (JS_IsException(buffer))
+        return buffer;
+
+    Interpreter *inter = JS_GetContextOpaque(ctx);
+    JSValue val = JS_CallConstructor(ctx, inter->uint8_array_ctor, 1,
+                                     (JSValueConst *)&buffer);
+    JS_FreeValue(ctx, buffer);
+    return val;
+}
+
+
+static JSValue py_float64_array_to_js_val(JSContext *ctx, PyObject *view) {
+    Py_ssize_t len = PyObject_Size(view);
+    if (len < 0 || len > INT32_MAX / sizeof(double))
+        return js_throw_py_err(ctx, "invalid float64 array size");
+
+    JSValue buffer = JS_NewArrayBufferCopy(ctx, NULL, len * sizeof(double));
+    if (JS_IsException(buffer))
+        return buffer;
+
+    size_t size;
+    uint8_t *data = JS_GetArrayBuffer(ctx, &size, buffer);
+    if (!data) {
+        JS_FreeValue(ctx, buffer);
+        return JS_EXCEPTION;
+    }
+
+    if (float64_array_copy(view, (double *)data, len)) {
+        JS_FreeValue(ctx, buffer);
+        return js_throw_py_err(ctx, "convert float64 array error");
+    }
+
+    Interpreter *inter = JS_GetContextOpaque(ctx);
+    JSValue val = JS_CallConstructor(ctx, inter->float64_array_ctor, 1,
+                                     (JSValueConst *)&buffer);
+    JS_FreeValue(ctx, buffer);
+    return val;
+}
+
+
+static JSValue py_buffer_to_js_val(JSContext *ctx, PyObject *obj) {
+    PyObject *view = PyMemoryView_FromObject(obj);
+    if (!view) {
+        PyErr_Clear();
+        return JS_Throw(ctx, JS_NewString(ctx, "unsupported type"));
+    }
+
+    // views of doubles are converted to Float64Array and all other buffers
+    // are converted to Uint8Array of raw bytes
+    int is_float64 = float64_array_check(view);
+    JSValue val;
+
+    if (is_float64 < 0) {
+        val = js_throw_py_err(ctx, "invalid buffer");
+
+    } else if (is_float64) {
+        val = py_float64_array_to_js_val(ctx, view);
+
+    } else {
+        val = py_bytes_to_js_val(ctx, view);
+    }
+
+    Py_DECREF(view);
+    return val;
+}
+
+
 static JSValue py_list_to_js_val(JSContext *ctx, PyObject *obj) {
     Py_ssize_t len = PyList_Size(obj);
-    if (len < 0)
+    if (len < 0 || len > UINT32_MAX)
         return js_throw_py_err(ctx, "invalid list size");
 
     JSValue val = JS_NewArray(ctx);
@@ -54,7 +151,9 @@ static JSValue py_list_to_js_val(JSContext *ctx, PyObject *obj) {
             return val_i;
         }
 
-        int err = JS_SetPropertyInt64(ctx, val, i, val_i);
+        // defining own property skips setter lookup on prototype chain
+        int err = JS_DefinePropertyValueUint32(ctx, val, i, val_i,
+                                               JS_PROP_C_W_E);
         if (err < 0) {
             JS_FreeValue(ctx, val);
             return JS_Throw(ctx, JS_NewString(ctx, "error setting item"));
@@ -74,19 +173,28 @@ static JSValue py_dict_to_js_val(JSContext *ctx, PyObject *obj) {
     Py_ssize_t i = 0;
 
     while (PyDict_Next(obj, &i, &obj_k, &obj_v)) {
-        const char *key = PyUnicode_AsUTF8AndSize(obj_k, NULL);
+        Py_ssize_t key_len;
+        const char *key = PyUnicode_AsUTF8AndSize(obj_k, &key_len);
         if (!key) {
             JS_FreeValue(ctx, val);
             return js_throw_py_err(ctx, "invalid key");
         }
 
         JSValue val_i = py_obj_to_js_val(ctx, obj_v);
-        if (JS_IsException(val)) {
+        if (JS_IsException(val_i)) {
             JS_FreeValue(ctx, val);
             return val_i;
         }
 
-        int err = JS_SetPropertyStr(ctx, val, key, val_i);
+        JSAtom atom = JS_NewAtomLen(ctx, key, key_len);
+        if (atom == JS_ATOM_NULL) {
+            JS_FreeValue(ctx, val_i);
+            JS_FreeValue(ctx, val);
+            return JS_EXCEPTION;
+        }
+
+        int err = JS_DefinePropertyValue(ctx, val, atom, val_i, JS_PROP_C_W_E);
+        JS_FreeAtom(ctx, atom);
         if (err < 0) {
             JS_FreeValue(ctx, val);
             return JS_Throw(ctx, JS_NewString(ctx, "error setting item"));
@@ -113,6 +221,9 @@ JSValue py_obj_to_js_val(JSContext *ctx, PyObject *obj) {
     if (PyUnicode_Check(obj))
         return py_str_to_js_val(ctx, obj);
 
+    if (PyBytes_Check(obj) || PyByteArray_Check(obj))
+        return py_bytes_to_js_val(ctx, obj);
+
     if (PyCallable_Check(obj))
         return create_pyfunction(ctx, obj);
 
@@ -122,5 +233,5 @@ JSValue py_obj_to_js_val(JSContext *ctx, PyObject *obj) {
     if (PyDict_Check(obj))
         return py_dict_to_js_val(ctx, obj);
 
-    return JS_Throw(ctx, JS_NewString(ctx, "unsupported type"));
+    return py_buffer_to_js_val(ctx, obj);
 }
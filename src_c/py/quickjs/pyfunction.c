@@ -4,6 +4,7 @@
 #include "interpreter.h"
 #include "js_to_py.h"
 #include "py_to_js.h"
+#include "runtime.h"
 
 
 static JSValue get_function_proto(JSContext *ctx) {
@@ -21,11 +22,11 @@ static JSValue get_function_proto(JSContext *ctx) {
 
 
 static void PyFunction_finalizer(JSRuntime *rt, JSValue val) {
-    Interpreter *inter = JS_GetRuntimeOpaque(rt);
-    if (!inter)
+    Runtime *runtime = JS_GetRuntimeOpaque(rt);
+    if (!runtime)
         return;
 
-    PyObject *fn = JS_GetOpaque(val, inter->pyfunction_cid);
+    PyObject *fn = JS_GetOpaque(val, runtime->pyfunction_cid);
     if (!fn)
         return;
 
@@ -43,7 +44,7 @@ static JSValue PyFunction_call(JSContext *ctx, JSValueConst func_obj,
         return JS_Throw(ctx,
                         JS_NewString(ctx, "interpreter initialization error"));
 
-    PyObject *fn = JS_GetOpaque(func_obj, inter->pyfunction_cid);
+    PyObject *fn = JS_GetOpaque(func_obj, inter->runtime->pyfunction_cid);
     if (!fn)
         return JS_Throw(ctx,
                         JS_NewString(ctx, "function initialization error"));
@@ -118,7 +119,8 @@ JSValue create_pyfunction(JSContext *ctx, PyObject *fn) {
     if (JS_IsException(proto))
         return proto;
 
-    JSValue val = JS_NewObjectProtoClass(ctx, proto, inter->pyfunction_cid);
+    JSValue val =
+        JS_NewObjectProtoClass(ctx, proto, inter->runtime->pyfunction_cid);
     JS_FreeValue(ctx, proto);
     if (JS_IsException(val))
         return val;
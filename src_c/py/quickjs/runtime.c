@@ -0,0 +1,389 @@
+#include "runtime.h"
+
+#include "monotonic.h"
+#include "pyfunction.h"
+
+
+static void free_pending(Runtime *self) {
+    for (size_t i = 0; i < self->pending_vals_len; ++i)
+        JS_FreeValueRT(self->rt, self->pending_vals[i]);
+    self->pending_vals_len = 0;
+
+    for (size_t i = 0; i < self->pending_ctxs_len; ++i)
+        JS_FreeContext(self->pending_ctxs[i]);
+    self->pending_ctxs_len = 0;
+}
+
+
+static int interrupt_handler(JSRuntime *rt, void *opaque) {
+    Runtime *self = opaque;
+
+    if (!self->deadline || get_monotonic_time() < self->deadline)
+        return 0;
+
+    self->timed_out = 1;
+    return 1;
+}
+
+
+static int try_acquire(Runtime *self) {
+    unsigned long ident = PyThread_get_thread_ident();
+
+    if (self->depth && self->owner == ident) {
+        self->depth += 1;
+        return 1;
+    }
+
+    if (!PyThread_acquire_lock(self->lock, NOWAIT_LOCK))
+        return 0;
+
+    self->owner = ident;
+    self->depth = 1;
+
+    JS_UpdateStackTop(self->rt);
+    free_pending(self);
+
+    return 1;
+}
+
+
+static int add_pending(void **items, size_t *len, size_t *size,
+                       size_t item_size, const void *item) {
+    if (*len >= *size) {
+        size_t new_size = *size + 64;
+        void *new_items = PyMem_Realloc(*items, new_size * item_size);
+        if (!new_items)
+            return -1;
+
+        *items = new_items;
+        *size = new_size;
+    }
+
+    memcpy((char *)*items + *len * item_size, item, item_size);
+    *len += 1;
+
+    return 0;
+}
+
+
+static int parse_size(PyObject *obj, size_t *size) {
+    if (obj == Py_None)
+        return 0;
+
+    *size = PyLong_AsSize_t(obj);
+    if (PyErr_Occurred())
+        return -1;
+
+    return 1;
+}
+
+
+static JSAtom create_atom(JSRuntime *rt, const char *str) {
+    // atoms are shared by all runtime's contexts
+    JSContext *ctx = JS_NewContextRaw(rt);
+    if (!ctx)
+        return JS_ATOM_NULL;
+
+    JSAtom atom = JS_NewAtom(ctx, str);
+    JS_FreeContext(ctx);
+    return atom;
+}
+
+
+static JSClassID find_class_id(JSValueConst obj) {
+    // opaque pointer is returned only if object has provided class id
+    for (JSClassID cid = 1; cid < 256; ++cid) {
+        if (JS_GetOpaque(obj, cid))
+            return cid;
+    }
+
+    return JS_INVALID_CLASS_ID;
+}
+
+
+static int init_buffer_class_ids(Runtime *self) {
+    // builtin class ids are not part of public api - they are found by
+    // probing sample objects
+    JSContext *ctx = JS_NewContextRaw(self->rt);
+    if (!ctx) {
+        PyErr_SetString(PyExc_Exception, "error creating context");
+        return -1;
+    }
+
+    JS_AddIntrinsicBaseObjects(ctx);
+    JS_AddIntrinsicTypedArrays(ctx);
+
+    double data = 0;
+    JSValue buffer =
+        JS_NewArrayBufferCopy(ctx, (uint8_t *)&data, sizeof(data));
+    JSValue global = JS_GetGlobalObject(ctx);
+    JSValue uint8_ctor = JS_GetPropertyStr(ctx, global, "Uint8Array");
+    JSValue uint8_arr =
+        JS_CallConstructor(ctx, uint8_ctor, 1, (JSValueConst *)&buffer);
+    JSValue float64_ctor = JS_GetPropertyStr(ctx, global, "Float64Array");
+    JSValue float64_arr =
+        JS_CallConstructor(ctx, float64_ctor, 1, (JSValueConst *)&buffer);
+
+    self->array_buffer_cid = find_class_id(buffer);
+    self->uint8_array_cid = find_class_id(uint8_arr);
+    self->float64_array_cid = find_class_id(float64_arr);
+
+    JS_FreeValue(ctx, float64_arr);
+    JS_FreeValue(ctx, float64_ctor);
+    JS_FreeValue(ctx, uint8_arr);
+    JS_FreeValue(ctx, uint8_ctor);
+    JS_FreeValue(ctx, global);
+    JS_FreeValue(ctx, buffer);
+    JS_FreeContext(ctx);
+
+    const char *missing = NULL;
+    if (self->array_buffer_cid == JS_INVALID_CLASS_ID) {
+        missing = "ArrayBuffer";
+
+    } else if (self->uint8_array_cid == JS_INVALID_CLASS_ID) {
+        missing = "Uint8Array";
+
+    } else if (self->float64_array_cid == JS_INVALID_CLASS_ID) {
+        missing = "Float64Array";
+    }
+
+    if (missing) {
+        PyErr_Format(PyExc_Exception,
+                     "error initializing classes: %s class id not found",
+                     missing);
+        return -1;
+    }
+
+    return 0;
+}
+
+
+static PyObject *Runtime_new(PyTypeObject *type, PyObject *args,
+                             PyObject *kwds) {
+    PyObject *memory_limit = Py_None;
+    PyObject *gc_threshold = Py_None;
+    if (!PyArg_ParseTuple(args, "|OO", &memory_limit, &gc_threshold))
+        return NULL;
+
+    size_t memory_limit_size;
+    int has_memory_limit = parse_size(memory_limit, &memory_limit_size);
+    if (has_memory_limit < 0)
+        return NULL;
+
+    size_t gc_threshold_size;
+    int has_gc_threshold = parse_size(gc_threshold, &gc_threshold_size);
+    if (has_gc_threshold < 0)
+        return NULL;
+
+    Runtime *self = (Runtime *)PyType_GenericAlloc(type, 0);
+    if (!self)
+        return NULL;
+
+    self->rt = NULL;
+    self->pyfunction_cid = JS_INVALID_CLASS_ID;
+    self->length_atom = JS_ATOM_NULL;
+    self->array_buffer_cid = JS_INVALID_CLASS_ID;
+    self->uint8_array_cid = JS_INVALID_CLASS_ID;
+    self->float64_array_cid = JS_INVALID_CLASS_ID;
+    key_cache_init(&self->key_cache);
+    self->lock = NULL;
+    self->owner = 0;
+    self->depth = 0;
+    self->deadline = 0;
+    self->timed_out = 0;
+    self->pending_vals = NULL;
+    self->pending_vals_len = 0;
+    self->pending_vals_size = 0;
+    self->pending_ctxs = NULL;
+    self->pending_ctxs_len = 0;
+    self->pending_ctxs_size = 0;
+
+    self->lock = PyThread_allocate_lock();
+    if (!self->lock) {
+        PyErr_SetString(PyExc_Exception, "error creating lock");
+        goto error;
+    }
+
+    self->rt = JS_NewRuntime();
+    if (!self->rt) {
+        PyErr_SetString(PyExc_Exception, "error creating runtime");
+        goto error;
+    }
+
+    self->pyfunction_cid = create_pyfunction_class(self->rt);
+    if (self->pyfunction_cid == JS_INVALID_CLASS_ID) {
+        PyErr_SetString(PyExc_Exception, "error creating function class");
+        goto error;
+    }
+
+    self->length_atom = create_atom(self->rt, "length");
+    if (self->length_atom == JS_ATOM_NULL) {
+        PyErr_SetString(PyExc_Exception, "error creating atom");
+        goto error;
+    }
+
+    if (init_buffer_class_ids(self))
+        goto error;
+
+    if (has_memory_limit)
+        JS_SetMemoryLimit(self->rt, memory_limit_size);
+
+    if (has_gc_threshold)
+        JS_SetGCThreshold(self->rt, gc_threshold_size);
+
+    JS_SetRuntimeOpaque(self->rt, self);
+    JS_SetInterruptHandler(self->rt, interrupt_handler, self);
+
+    return (PyObject *)self;
+
+error:
+
+    Py_DECREF(self);
+    return NULL;
+}
+
+
+static void Runtime_dealloc(Runtime *self) {
+    if (self->rt) {
+        free_pending(self);
+        for (size_t i = 0; i < KEY_CACHE_SIZE; ++i) {
+            key_cache_entry_t *entry = self->key_cache.entries + i;
+            if (entry->obj)
+                JS_FreeAtomRT(self->rt, entry->key);
+        }
+        key_cache_clear(&self->key_cache);
+
+        if (self->length_atom != JS_ATOM_NULL)
+            JS_FreeAtomRT(self->rt, self->length_atom);
+
+        JS_FreeRuntime(self->rt);
+    }
+
+    if (self->lock)
+        PyThread_free_lock(self->lock);
+
+    PyMem_Free(self->pending_vals);
+    PyMem_Free(self->pending_ctxs);
+
+    PyTypeObject *tp = Py_TYPE(self);
+    PyObject_Free(self);
+    Py_DECREF(tp);
+}
+
+
+static PyObject *Runtime_get_memory_usage(Runtime *self, void *closure) {
+    JSMemoryUsage usage;
+
+    runtime_acquire(self);
+    JS_ComputeMemoryUsage(self->rt, &usage);
+    runtime_release(self);
+
+    return PyLong_FromLongLong(usage.malloc_size);
+}
+
+
+static PyGetSetDef runtime_getset[] = {
+    {.name = "memory_usage", .get = (getter)Runtime_get_memory_usage},
+    {NULL}};
+
+
+static PyType_Slot runtime_type_slots[] = {{Py_tp_new, Runtime_new},
+                                           {Py_tp_dealloc, Runtime_dealloc},
+                                           {Py_tp_getset, runtime_getset},
+                                           {0, NULL}};
+
+
+static PyType_Spec runtime_type_spec = {
+    .name = "hat.controller.interpreters._quickjs.Runtime",
+    .basicsize = sizeof(Runtime),
+    .flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HEAPTYPE,
+    .slots = runtime_type_slots};
+
+
+PyObject *create_runtime_type(PyObject *module) {
+    return PyType_FromModuleAndSpec(module, &runtime_type_spec, NULL);
+}
+
+
+void runtime_acquire(Runtime *runtime) {
+    if (try_acquire(runtime))
+        return;
+
+    PyThreadState *state = PyEval_SaveThread();
+
+    PyThread_acquire_lock(runtime->lock, WAIT_LOCK);
+
+    PyEval_RestoreThread(state);
+
+    runtime->owner = PyThread_get_thread_ident();
+    runtime->depth = 1;
+
+    JS_UpdateStackTop(runtime->rt);
+    free_pending(runtime);
+}
+
+
+void runtime_release(Runtime *runtime) {
+    runtime->depth -= 1;
+    if (runtime->depth)
+        return;
+
+    runtime->owner = 0;
+    runtime->deadline = 0;
+    runtime->timed_out = 0;
+    PyThread_release_lock(runtime->lock);
+}
+
+
+int runtime_set_deadline(Runtime *runtime, double timeout) {
+    if (runtime->depth > 1) {
+        if (!runtime->deadline || get_monotonic_time() < runtime->deadline)
+            return 0;
+
+        runtime->timed_out = 1;
+        PyErr_SetString(PyExc_TimeoutError, "execution timeout");
+        return -1;
+    }
+
+    runtime->timed_out = 0;
+    runtime->deadline = (timeout ? get_monotonic_time() + timeout : 0);
+    return 0;
+}
+
+
+void runtime_free_value(Runtime *runtime, JSValue val) {
+    if (try_acquire(runtime)) {
+        JS_FreeValueRT(runtime->rt, val);
+        runtime_release(runtime);
+        return;
+    }
+
+    if (!add_pending((void **)&runtime->pending_vals,
+                     &runtime->pending_vals_len, &runtime->pending_vals_size,
+                     sizeof(JSValue), &val))
+        return;
+
+    // value can not be postponed - wait for runtime lock
+    runtime_acquire(runtime);
+    JS_FreeValueRT(runtime->rt, val);
+    runtime_release(runtime);
+}
+
+
+void runtime_free_context(Runtime *runtime, JSContext *ctx) {
+    if (try_acquire(runtime)) {
+        JS_FreeContext(ctx);
+        runtime_release(runtime);
+        return;
+    }
+
+    if (!add_pending((void **)&runtime->pending_ctxs,
+                     &runtime->pending_ctxs_len, &runtime->pending_ctxs_size,
+                     sizeof(JSContext *), &ctx))
+        return;
+
+    // context can not be postponed - wait for runtime lock
+    runtime_acquire(runtime);
+    JS_FreeContext(ctx);
+    runtime_release(runtime);
+}
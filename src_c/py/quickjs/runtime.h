@@ -0,0 +1,67 @@
+#ifndef PY_QUICKJS_RUNTIME_H
+#define PY_QUICKJS_RUNTIME_H
+
+#include <Python.h>
+#include <pythread.h>
+#include <quickjs.h>
+
+#include "key_cache.h"
+
+#ifndef JS_INVALID_CLASS_ID
+#define JS_INVALID_CLASS_ID 0
+#endif
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+typedef struct {
+    PyObject ob_base;
+    JSRuntime *rt;
+    JSClassID pyfunction_cid;
+    JSAtom length_atom;
+    JSClassID array_buffer_cid;
+    JSClassID uint8_array_cid;
+    JSClassID float64_array_cid;
+    key_cache_t key_cache;
+    PyThread_type_lock lock;
+    unsigned long owner;
+    size_t depth;
+    double deadline;
+    int timed_out;
+    JSValue *pending_vals;
+    size_t pending_vals_len;
+    size_t pending_vals_size;
+    JSContext **pending_ctxs;
+    size_t pending_ctxs_len;
+    size_t pending_ctxs_size;
+} Runtime;
+
+
+PyObject *create_runtime_type(PyObject *module);
+
+// acquire runtime lock (reentrant) - should be called with GIL held
+void runtime_acquire(Runtime *runtime);
+
+// release runtime lock - should be called with GIL held
+void runtime_release(Runtime *runtime);
+
+// set execution deadline (timeout in seconds or 0) if runtime lock is not
+// acquired recursively - should be called after runtime_acquire
+// (returns -1 and raises TimeoutError if deadline of outer execution has
+// already expired)
+int runtime_set_deadline(Runtime *runtime, double timeout);
+
+// free value or postpone freeing until runtime lock is acquired (if
+// postponing fails, waits for runtime lock) - should be called with GIL held
+void runtime_free_value(Runtime *runtime, JSValue val);
+
+// free context or postpone freeing until runtime lock is acquired (if
+// postponing fails, waits for runtime lock) - should be called with GIL held
+void runtime_free_context(Runtime *runtime, JSContext *ctx);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
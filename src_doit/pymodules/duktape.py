@@ -7,6 +7,7 @@ from .. import common
 
 
 __all__ = ['task_pymodules_duktape',
+           'task_pymodules_duktape_src',
            'task_pymodules_duktape_obj',
            'task_pymodules_duktape_dep',
            'task_pymodules_duktape_cleanup']
@@ -14,14 +15,24 @@ __all__ = ['task_pymodules_duktape',
 
 duktape_path = (common.src_py_dir / 'hat/controller/interpreters/_duktape'
                 ).with_suffix(common.py_ext_suffix)
+duktape_peru_src_dir = common.peru_dir / 'duktape/src'
+duktape_src_dir = common.build_pymodules_dir / 'duktape_src'
 duktape_src_paths = [*(common.src_c_dir / 'py/duktape').rglob('*.c'),
-                     *(common.peru_dir / 'duktape/src').rglob('*.c')]
+                     *(common.src_c_dir / 'py/common').rglob('*.c'),
+                     duktape_src_dir / 'duktape.c']
+duktape_config_overrides = [
+    '#define DUK_USE_INTERRUPT_COUNTER',
+    '#define DUK_USE_EXEC_TIMEOUT_CHECK(udata) '
+    'duktape_exec_timeout_check(udata)',
+    'duk_bool_t duktape_exec_timeout_check(void *udata);',
+    '#define DUK_USE_JSON_STRINGIFY_FASTPATH']
 duktape_build_dir = (common.build_pymodules_dir / 'duktape' /
                      f'{common.target_platform.name.lower()}_'
                      f'{common.target_py_version.name.lower()}')
 duktape_c_flags = [
     *get_py_c_flags(py_limited_api=common.py_limited_api),
-    f"-I{common.peru_dir / 'duktape/src'}",
+    f"-I{duktape_src_dir}",
+    f"-I{common.src_c_dir / 'py/common'}",
     '-fPIC',
     '-D_GNU_SOURCE',
     '-O2',
@@ -36,6 +47,7 @@ duktape_build = CBuild(src_paths=duktape_src_paths,
                        ld_flags=duktape_ld_flags,
                        ld_libs=duktape_ld_libs,
                        task_dep=['pymodules_duktape_cleanup',
+                                 'pymodules_duktape_src',
                                  'peru'])
 
 
@@ -44,6 +56,37 @@ def task_pymodules_duktape():
     yield from duktape_build.get_task_lib(duktape_path)
 
 
+def task_pymodules_duktape_src():
+    """Generate pymodules duktape sources
+
+    Duktape sources are copied from peru directory with additional
+    configuration overrides (required for execution timeout check) added to
+    duk_config.h.
+
+    """
+
+    def generate():
+        duktape_src_dir.mkdir(parents=True, exist_ok=True)
+
+        for src_path in duktape_peru_src_dir.iterdir():
+            data = src_path.read_bytes()
+
+            if src_path.name == 'duk_config.h':
+                data = data.replace(
+                    b'/* __OVERRIDE_DEFINES__ */',
+                    '\n'.join(duktape_config_overrides).encode())
+
+            dst_path = duktape_src_dir / src_path.name
+            if dst_path.exists() and dst_path.read_bytes() == data:
+                continue
+
+            dst_path.write_bytes(data)
+
+    return {'actions': [generate],
+            'task_dep': ['peru'],
+            'uptodate': [False]}
+
+
 def task_pymodules_duktape_obj():
     """Build pymodules duktape .o files"""
     yield from duktape_build.get_task_objs()
@@ -43,6 +43,7 @@ lua_lib_files = ['lauxlib.c',
                  'lutf8lib.c']
 lua_files = [*lua_core_files, *lua_lib_files]
 lua_src_paths = [*(common.src_c_dir / 'py/lua').rglob('*.c'),
+                 *(common.src_c_dir / 'py/common').rglob('*.c'),
                  *((common.peru_dir / 'lua/src') / i
                    for i in lua_files)]
 lua_build_dir = (common.build_pymodules_dir / 'lua' /
@@ -51,6 +52,7 @@ lua_build_dir = (common.build_pymodules_dir / 'lua' /
 lua_c_flags = [
     *get_py_c_flags(py_limited_api=common.py_limited_api),
     f"-I{common.peru_dir / 'lua/src'}",
+    f"-I{common.src_c_dir / 'py/common'}",
     '-fPIC',
     '-D_GNU_SOURCE',
     '-O2',
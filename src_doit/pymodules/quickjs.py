@@ -17,6 +17,7 @@ quickjs_path = (common.src_py_dir / 'hat/controller/interpreters/_quickjs'
 quickjs_files = ['cutils.c', 'dtoa.c', 'libregexp.c', 'libunicode.c',
                  'quickjs.c', 'unicode_gen.c']
 quickjs_src_paths = [*(common.src_c_dir / 'py/quickjs').rglob('*.c'),
+                     *(common.src_c_dir / 'py/common').rglob('*.c'),
                      *((common.peru_dir / 'quickjs') / i
                        for i in quickjs_files)]
 quickjs_build_dir = (common.build_pymodules_dir / 'quickjs' /
@@ -25,6 +26,7 @@ quickjs_build_dir = (common.build_pymodules_dir / 'quickjs' /
 quickjs_c_flags = [
     *get_py_c_flags(py_limited_api=common.py_limited_api),
     f"-I{common.peru_dir / 'quickjs'}",
+    f"-I{common.src_c_dir / 'py/common'}",
     '-fPIC',
     '-D_GNU_SOURCE',
     '-DCONFIG_VERSION="2025-04-26"',
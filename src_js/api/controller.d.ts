@@ -10,8 +10,18 @@ export interface Trigger {
     data: JsonData;
 }
 
+export type PostUnits<T> = {
+    [K in keyof T]: (T[K] extends (...args: infer A) => any
+                     ? (...args: A) => void
+                     : PostUnits<T[K]>);
+};
+
 declare global {
     interface Units {}
 
     const units: Units;
+
+    // non-blocking calls - calls are queued and executed in order,
+    // results are discarded and errors are logged
+    const unitsPost: PostUnits<Units>;
 }
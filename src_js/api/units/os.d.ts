@@ -6,6 +6,9 @@ type Unit = {
     readFile: (path: FilePath) => string;
     writeFile: (path: FilePath, text: string) => void;
     appendFile: (path: FilePath, text: string) => void;
+    readBinaryFile: (path: FilePath) => Uint8Array;
+    writeBinaryFile: (path: FilePath, data: Uint8Array | string) => void;
+    appendBinaryFile: (path: FilePath, data: Uint8Array | string) => void;
     deleteFile: (path: FilePath) => void;
     execute: (args: string[]) => void;
 };
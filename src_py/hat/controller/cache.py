@@ -0,0 +1,164 @@
+"""Persistent compiled code cache
+
+Compiled code (interpreter specific bytecode) is stored in cache directory as
+files named by cache key. Cache key is hash of engine identifier and code
+source, so changes of engine build (Python version, interpreter extension
+module) or code source result in different cache key.
+
+Cached bytecode is loaded without validation - cache directory should be
+writable only by trusted users.
+
+Number of cached entries can be limited - when limit is exceeded, least
+recently used entries are removed. Cache entries are not removed otherwise,
+so entries of no longer used code and engines accumulate in unlimited cache.
+
+"""
+
+from pathlib import Path
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+
+from hat.controller import interpreters
+from hat.controller.interpreters import _duktape
+from hat.controller.interpreters import _lua
+from hat.controller.interpreters import _quickjs
+
+
+mlog = logging.getLogger(__name__)
+
+
+class CodeCache:
+    """Compiled code cache
+
+    Errors during reading or writing of cache files are logged and
+    otherwise ignored.
+
+    If `max_count` is not ``None``, cache holds at most `max_count` entries.
+    Least recently used entries are removed (usage is tracked with
+    modification time of cache files).
+
+    """
+
+    def __init__(self,
+                 path: Path,
+                 max_count: int | None = None):
+        self._path = path
+        self._max_count = max_count
+
+    @property
+    def path(self) -> Path:
+        """Cache directory path"""
+        return self._path
+
+    @property
+    def max_count(self) -> int | None:
+        """Maximum number of cached entries"""
+        return self._max_count
+
+    def get(self, key: str) -> bytes | None:
+        """Get cached data (``None`` if data is not cached)"""
+        path = self._path / key
+
+        try:
+            data = path.read_bytes()
+
+            if self._max_count is not None:
+                os.utime(path)
+
+            return data
+
+        except FileNotFoundError:
+            return None
+
+        except Exception as e:
+            mlog.warning('error reading cache %s: %s', key, e, exc_info=e)
+            return None
+
+    def set(self, key: str, data: bytes):
+        """Set cached data"""
+        tmp_path = self._path / f'{key}.{os.getpid()}.{threading.get_ident()}'
+
+        try:
+            self._path.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            tmp_path.replace(self._path / key)
+
+        except Exception as e:
+            mlog.warning('error writing cache %s: %s', key, e, exc_info=e)
+
+            with contextlib.suppress(Exception):
+                tmp_path.unlink(missing_ok=True)
+
+            return
+
+        if self._max_count is not None:
+            self._remove_unused()
+
+    def _remove_unused(self):
+        try:
+            entries = []
+            for entry in os.scandir(self._path):
+                # temporary files (containing '.') are skipped
+                if '.' in entry.name or not entry.is_file():
+                    continue
+
+                with contextlib.suppress(FileNotFoundError):
+                    entries.append((entry.stat().st_mtime, entry.path))
+
+            if len(entries) <= self._max_count:
+                return
+
+            entries.sort()
+            for _, path in entries[:len(entries) - self._max_count]:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+        except Exception as e:
+            mlog.warning('error removing unused cache entries: %s', e,
+                         exc_info=e)
+
+
+def get_cache_key(interpreter: interpreters.Interpreter,
+                  *segments: str
+                  ) -> str:
+    """Get cache key for code compiled by interpreter
+
+    Segments should contain code source and all other properties (e.g. code
+    name) that affect compilation result.
+
+    """
+    key = hashlib.sha256(_get_engine_id(type(interpreter)).encode())
+    for segment in segments:
+        key.update(b'\x00')
+        key.update(segment.encode('utf-8', 'surrogatepass'))
+
+    return key.hexdigest()
+
+
+@functools.cache
+def _get_engine_id(interpreter_cls):
+    if issubclass(interpreter_cls, interpreters.PyInterpreter):
+        return (f'{interpreter_cls.__name__} '
+                f'{sys.implementation.cache_tag} '
+                f'{importlib.util.MAGIC_NUMBER.hex()}')
+
+    if issubclass(interpreter_cls, interpreters.Duktape):
+        extension_module = _duktape
+
+    elif issubclass(interpreter_cls, interpreters.Lua):
+        extension_module = _lua
+
+    elif issubclass(interpreter_cls, interpreters.QuickJS):
+        extension_module = _quickjs
+
+    else:
+        raise ValueError('unsupported interpreter type')
+
+    engine_hash = hashlib.sha256(Path(extension_module.__file__).read_bytes())
+    return f'{interpreter_cls.__name__} {engine_hash.hexdigest()}'
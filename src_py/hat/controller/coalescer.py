@@ -0,0 +1,181 @@
+"""Trigger coalescer
+
+Triggers matching coalescing rule are grouped by their type and name. Pending
+triggers with the same type and name are collapsed into the newest one.
+
+Each rule can define optional debounce and throttle windows:
+
+    * debounce - trigger is passed only after no trigger with the same type
+      and name was received for debounce period
+    * throttle - at most one trigger with the same type and name is passed
+      in each throttle period (first trigger is passed immediately, newest of
+      subsequent triggers is passed at the end of period)
+
+If both windows are defined, debounced triggers are additionally throttled.
+Triggers that don't match any rule are passed immediately. Relative order of
+triggers with different type or name is not preserved.
+
+"""
+
+from collections.abc import Callable, Iterable
+import asyncio
+import typing
+
+from hat import json
+
+from hat.controller import common
+import hat.controller.matcher
+
+
+class CoalescingRule(typing.NamedTuple):
+    type_query: common.TriggerQuery
+    name_query: common.TriggerQuery
+    debounce: float | None = None
+    """debounce period in seconds"""
+    throttle: float | None = None
+    """throttle period in seconds"""
+
+
+TriggerCb: typing.TypeAlias = Callable[[common.Trigger], None]
+
+
+class Coalescer:
+    """Trigger coalescer
+
+    Coalescer must be created and used from within asyncio event loop
+    thread. Passed triggers are notified with `trigger_cb`.
+
+    If multiple rules match trigger, first matching rule is applied.
+
+    """
+
+    def __init__(self,
+                 rules: Iterable[CoalescingRule],
+                 trigger_cb: TriggerCb):
+        self._trigger_cb = trigger_cb
+        self._loop = asyncio.get_running_loop()
+        self._matcher = hat.controller.matcher.Matcher(
+            (rule.type_query, rule.name_query, rule) for rule in rules)
+        self._states = {}
+        self._coalesced_count = 0
+        self._closed = False
+
+    @property
+    def pending_count(self) -> int:
+        """Number of triggers waiting to be passed"""
+        return sum((state.pending is not None) + (state.ready is not None)
+                   for state in self._states.values())
+
+    @property
+    def coalesced_count(self) -> int:
+        """Number of triggers replaced with newer triggers"""
+        return self._coalesced_count
+
+    def close(self):
+        """Close coalescer and discard pending triggers"""
+        self._closed = True
+
+        for state in self._states.values():
+            if state.debounce_handle:
+                state.debounce_handle.cancel()
+
+            if state.throttle_handle:
+                state.throttle_handle.cancel()
+
+        self._states = {}
+
+    def process(self, trigger: common.Trigger):
+        """Process trigger"""
+        if self._closed:
+            return
+
+        rules = self._matcher.match(trigger)
+        if not rules:
+            self._trigger_cb(trigger)
+            return
+
+        key = trigger.type, trigger.name
+        state = self._states.get(key)
+        if state is None:
+            state = _State(rules[0])
+            self._states[key] = state
+
+        debounce = state.rule.debounce or 0
+
+        if state.pending is not None:
+            self._coalesced_count += 1
+
+        state.pending = trigger
+        state.debounce_deadline = self._loop.time() + debounce
+
+        if state.debounce_handle:
+            return
+
+        if debounce:
+            state.debounce_handle = self._loop.call_at(
+                state.debounce_deadline, self._on_debounce, key, state)
+
+        else:
+            state.debounce_handle = self._loop.call_soon(
+                self._on_debounce, key, state)
+
+    def _on_debounce(self, key, state):
+        state.debounce_handle = None
+
+        if self._loop.time() < state.debounce_deadline:
+            state.debounce_handle = self._loop.call_at(
+                state.debounce_deadline, self._on_debounce, key, state)
+            return
+
+        if state.ready is not None:
+            self._coalesced_count += 1
+
+        state.ready = state.pending
+        state.pending = None
+
+        if not state.throttle_handle:
+            self._pass_ready(key, state)
+
+    def _on_throttle(self, key, state):
+        state.throttle_handle = None
+
+        if state.ready is not None:
+            self._pass_ready(key, state)
+
+        elif not state.debounce_handle:
+            del self._states[key]
+
+    def _pass_ready(self, key, state):
+        trigger, state.ready = state.ready, None
+
+        if state.rule.throttle:
+            state.throttle_handle = self._loop.call_later(
+                state.rule.throttle, self._on_throttle, key, state)
+
+        elif not state.debounce_handle:
+            del self._states[key]
+
+        self._trigger_cb(trigger)
+
+
+def get_coalescing_rules(conf: json.Data) -> Iterable[CoalescingRule]:
+    """Get coalescing rules from controller configuration"""
+    for rule_conf in conf.get('coalescing', []):
+        yield CoalescingRule(
+            type_query=tuple(rule_conf['type'].split('/')),
+            name_query=tuple(rule_conf['name'].split('/')),
+            debounce=rule_conf.get('debounce'),
+            throttle=rule_conf.get('throttle'))
+
+
+class _State:
+    __slots__ = ['rule', 'pending', 'ready', 'debounce_deadline',
+                 'debounce_handle', 'throttle_handle']
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.pending = None
+        self.ready = None
+        self.debounce_deadline = 0
+        self.debounce_handle = None
+        self.throttle_handle = None
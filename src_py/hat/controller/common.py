@@ -20,6 +20,14 @@ TriggerType: typing.TypeAlias = tuple[str, ...]
 TriggerName: typing.TypeAlias = tuple[str, ...]
 """Trigger name"""
 
+TriggerQuery: typing.TypeAlias = tuple[str, ...]
+"""Trigger type or name query
+
+Segment ``?`` matches exactly one segment. Last segment ``*`` matches zero or
+more segments.
+
+"""
+
 FunctionName: typing.TypeAlias = str
 """Function name (segments are delimited by '.')"""
 
@@ -35,6 +43,8 @@ class Trigger(typing.NamedTuple):
     type: TriggerType
     name: TriggerName
     data: json.Data
+    priority: int = 0
+    """triggers with higher priority are processed first"""
 
 
 class Unit(aio.Resource):
@@ -78,12 +88,18 @@ class UnitInfo(typing.NamedTuple):
     repository will be used for additional validation of unit configuration
     with JSON schema id.
 
+    Functions listed in `thread_safe_functions` are called directly from
+    environment's execution thread, without switching to asyncio event loop
+    thread. `Unit.call` implementation for these functions must be regular
+    function (not coroutine) which can be safely called from any thread.
+
     """
     name: UnitName
     functions: set[FunctionName]
     create: CreateUnit
     json_schema_id: str | None = None
     json_schema_repo: json.SchemaRepository | None = None
+    thread_safe_functions: Collection[FunctionName] = frozenset()
 
 
 def import_unit_info(py_module_str: str) -> UnitInfo:
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+from pathlib import Path
 import collections
 import logging
 
@@ -5,7 +7,12 @@ from hat import aio
 from hat import json
 
 from hat.controller import common
+import hat.controller.cache
+import hat.controller.coalescer
 import hat.controller.environment
+import hat.controller.interpreters
+import hat.controller.matcher
+import hat.controller.queue
 
 
 mlog = logging.getLogger(__name__)
@@ -15,12 +22,32 @@ async def create_engine(conf: json.Data,
                         trigger_queue_size: int = 4096):
     engine = Engine()
     engine._async_group = aio.Group()
-    engine._trigger_queue = aio.Queue(trigger_queue_size)
+    engine._trigger_queue = hat.controller.queue.TriggerQueue(
+        trigger_queue_size)
+    engine._priorities = []
+    engine._priority_matcher = hat.controller.matcher.Matcher()
+    engine._env_matcher = hat.controller.matcher.Matcher()
     engine._envs = collections.deque()
+    engine._coalescer = hat.controller.coalescer.Coalescer(
+        hat.controller.coalescer.get_coalescing_rules(conf),
+        engine._route_trigger)
     engine._infos = collections.deque()
 
     proxies = collections.deque()
 
+    code_cache_size = conf.get('code_cache_size', 4096)
+    code_cache = (
+        hat.controller.cache.CodeCache(
+            Path(conf['code_cache_path']),
+            max_count=(code_cache_size if code_cache_size > 0 else None))
+        if conf.get('code_cache_path') else None)
+    quickjs_runtimes = {}
+
+    for type_query, name_query, priority in get_trigger_priorities(conf):
+        engine._priority_matcher.add(type_query, name_query,
+                                     len(engine._priorities))
+        engine._priorities.append(priority)
+
     try:
         for unit_conf in conf['units']:
             info = common.import_unit_info(unit_conf['module'])
@@ -28,7 +55,7 @@ async def create_engine(conf: json.Data,
                 raise Exception('duplicate unit name')
 
             unit = await aio.call(info.create, unit_conf,
-                                  engine._trigger_queue.put)
+                                  engine._raise_trigger)
             await _bind_resource(engine.async_group, unit)
 
             proxy = hat.controller.environment.UnitProxy(unit, info)
@@ -36,10 +63,26 @@ async def create_engine(conf: json.Data,
             engine._infos.append(info)
 
         for env_conf in conf['environments']:
-            env = hat.controller.environment.Environment(env_conf, proxies)
+            quickjs_runtime_name = env_conf.get('quickjs_runtime')
+            if (quickjs_runtime_name is not None and
+                    quickjs_runtime_name not in quickjs_runtimes):
+                quickjs_runtimes[quickjs_runtime_name] = \
+                    hat.controller.interpreters.QuickJSRuntime(
+                        memory_limit=env_conf.get('memory_limit'),
+                        gc_threshold=env_conf.get('gc_threshold'))
+
+            env = hat.controller.environment.Environment(
+                env_conf, proxies,
+                code_cache=code_cache,
+                quickjs_runtime=quickjs_runtimes.get(quickjs_runtime_name))
             await _bind_resource(engine.async_group, env)
             engine._envs.append(env)
 
+            trigger_queries = hat.controller.environment.get_trigger_queries(
+                env_conf)
+            for type_query, name_query, _ in trigger_queries:
+                engine._env_matcher.add(type_query, name_query, env)
+
         engine.async_group.spawn(engine._trigger_loop)
 
     except BaseException:
@@ -55,13 +98,31 @@ class Engine(aio.Resource):
     def async_group(self):
         return self._async_group
 
+    @property
+    def trigger_latencies(self
+                          ) -> dict[int, hat.controller.queue.LatencyStats]:
+        """Engine trigger queue latency statistics for each priority"""
+        return self._trigger_queue.latencies
+
+    async def _raise_trigger(self, trigger):
+        rule_indexes = self._priority_matcher.match(trigger)
+        if rule_indexes:
+            priority = self._priorities[rule_indexes[0]]
+            trigger = trigger._replace(priority=priority)
+
+        await self._trigger_queue.put(trigger)
+
     async def _trigger_loop(self):
         try:
             while True:
-                trigger = await self._trigger_queue.get()
+                entry = await self._trigger_queue.get()
+                self._coalescer.process(entry.trigger)
 
+                # environments keep triggers which don't fit into their
+                # queues (BLOCK overflow policy) - next trigger is dequeued
+                # only after they are delivered
                 for env in self._envs:
-                    await env.enqueue_trigger(trigger)
+                    await env.wait_delivery()
 
         except Exception as e:
             mlog.error('trigger loop error: %s', e, exc_info=e)
@@ -69,6 +130,27 @@ class Engine(aio.Resource):
         finally:
             self.close()
             self._trigger_queue.close()
+            self._coalescer.close()
+
+    def _route_trigger(self, trigger):
+        try:
+            for env in self._env_matcher.match(trigger):
+                env.enqueue_trigger(trigger)
+
+        except Exception as e:
+            mlog.error('trigger routing error: %s', e, exc_info=e)
+            self.close()
+
+
+def get_trigger_priorities(conf: json.Data
+                           ) -> Iterable[tuple[common.TriggerQuery,
+                                               common.TriggerQuery,
+                                               int]]:
+    """Get type and name queries of trigger priority rules"""
+    for rule_conf in conf.get('priorities', []):
+        yield (tuple(rule_conf['type'].split('/')),
+               tuple(rule_conf['name'].split('/')),
+               rule_conf['priority'])
 
 
 async def _bind_resource(async_group, resource):
@@ -1,14 +1,21 @@
-from collections.abc import Collection
+from collections.abc import Collection, Iterable
 import asyncio
+import collections
+import enum
+import functools
 import logging
+import time
 import typing
 
 from hat import aio
 from hat import json
 
 from hat.controller import common
+import hat.controller.cache
 import hat.controller.evaluators
 import hat.controller.interpreters
+import hat.controller.matcher
+import hat.controller.queue
 
 
 mlog = logging.getLogger(__name__)
@@ -19,23 +26,71 @@ class UnitProxy(typing.NamedTuple):
     info: common.UnitInfo
 
 
+class ReplicaKey(enum.Enum):
+    """Trigger property used for selecting environment replica"""
+    NAME = 'NAME'
+    TYPE = 'TYPE'
+    TYPE_NAME = 'TYPE_NAME'
+
+
 class Environment(aio.Resource):
+    """Environment
+
+    Each environment has one or more replicas. Each replica has its own
+    interpreter instance, executor thread and trigger queue. Triggers are
+    routed to replicas based on hash of configured replica key - triggers
+    with the same key are always processed by the same replica (in order
+    of their enqueueing) while triggers with different keys can be processed
+    in parallel.
+
+    Triggers which don't fit into replica's trigger queue with
+    `OverflowPolicy.BLOCK` are kept by environment and delivered to the
+    queue by replica's delivery task once the queue has available space.
+    Until they are delivered, `wait_delivery` blocks - engine waits for
+    delivery before dequeuing next trigger, which propagates backpressure
+    to units raising triggers.
+
+    If `code_cache` is provided, compiled code is stored in cache and reused
+    by replicas and subsequently created environments.
+
+    If `quickjs_runtime` is provided, QuickJS interpreters of all replicas
+    are created as part of this runtime (execution of all interpreters
+    sharing the same runtime is serialized). In that case, configured memory
+    limit and garbage collection threshold are ignored in favor of runtime's
+    settings.
+
+    """
 
     def __init__(self,
                  environment_conf: json.Data,
                  proxies: Collection[UnitProxy],
-                 trigger_queue_size: int = 4096):
+                 trigger_queue_size: int = 4096,
+                 code_cache: hat.controller.cache.CodeCache | None = None,
+                 quickjs_runtime: (hat.controller.interpreters.QuickJSRuntime |
+                                   None) = None):
         self._name = environment_conf['name']
         self._loop = asyncio.get_running_loop()
-        self._executor = aio.Executor(1, log_exceptions=False)
-        self._trigger_queue = aio.Queue(trigger_queue_size)
+        self._async_group = aio.Group()
+        self._trigger_batch_size = environment_conf.get('trigger_batch_size',
+                                                        1)
+        self._validate_unit_args = environment_conf.get('validate_unit_args',
+                                                        True)
+        self._code_cache = code_cache
+        self._quickjs_runtime = quickjs_runtime
+        self._lazy_actions = environment_conf.get('lazy_actions', False)
+        self._memory_limit = environment_conf.get('memory_limit')
+        self._gc_threshold = environment_conf.get('gc_threshold')
+        self._lua_gc_mode = hat.controller.interpreters.LuaGcMode(
+            environment_conf.get('lua_gc_mode', 'INCREMENTAL'))
+        self._execution_timeout = environment_conf.get('execution_timeout')
+        self._replica_key = ReplicaKey(environment_conf.get('replica_key',
+                                                            'NAME'))
+        self._trigger_lag = 0
+        self._overflow_policy = hat.controller.queue.OverflowPolicy(
+            environment_conf.get('trigger_queue_overflow', 'BLOCK'))
         self._proxies = {proxy.info.name: proxy for proxy in proxies}
-        self._last_trigger = None
-        self._action_triggers = {
-            action_conf['name']: [(tuple(trigger_conf['type'].split('/')),
-                                   tuple(trigger_conf['name'].split('/')))
-                                  for trigger_conf in action_conf['triggers']]
-            for action_conf in environment_conf['actions']}
+        self._matcher = hat.controller.matcher.Matcher(
+            get_trigger_queries(environment_conf))
 
         interpreter_type = hat.controller.interpreters.InterpreterType(
             environment_conf['interpreter'])
@@ -43,35 +98,190 @@ class Environment(aio.Resource):
         action_codes = {action_conf['name']: action_conf['code']
                         for action_conf in environment_conf['actions']}
 
-        self.async_group.spawn(self._run_loop, interpreter_type, init_code,
-                               action_codes)
+        self._replicas = []
+        for _ in range(environment_conf.get('replicas', 1)):
+            executor = aio.Executor(1, log_exceptions=False)
+            self.async_group.spawn(aio.call_on_cancel, executor.async_close)
+            self.async_group.spawn(aio.call_on_done, executor.wait_closing(),
+                                   self.close)
+
+            trigger_queue = hat.controller.queue.TriggerQueue(
+                maxsize=environment_conf.get('trigger_queue_size',
+                                             trigger_queue_size),
+                overflow_policy=self._overflow_policy,
+                starvation_limit=environment_conf.get(
+                    'trigger_starvation_limit', 16))
+
+            replica = _Replica(executor, trigger_queue)
+            self._replicas.append(replica)
+
+            self.async_group.spawn(self._run_loop, replica, interpreter_type,
+                                   init_code, action_codes)
+            self.async_group.spawn(self._post_loop, replica)
 
     @property
     def async_group(self) -> aio.Group:
-        return self._executor.async_group
+        return self._async_group
+
+    @property
+    def name(self) -> str:
+        """Environment name"""
+        return self._name
+
+    @property
+    def replicas_count(self) -> int:
+        """Number of environment replicas"""
+        return len(self._replicas)
+
+    @property
+    def trigger_lag(self) -> float:
+        """Time (in seconds) last dequeued trigger spent waiting in queue"""
+        return self._trigger_lag
+
+    @property
+    def queued_triggers_count(self) -> int:
+        """Number of triggers waiting to be processed"""
+        return sum(len(replica.trigger_queue) +
+                   len(replica.pending_triggers)
+                   for replica in self._replicas)
+
+    @property
+    def trigger_latencies(self
+                          ) -> dict[int, hat.controller.queue.LatencyStats]:
+        """Trigger queue latency statistics for each priority"""
+        return hat.controller.queue.merge_latencies(
+            replica.trigger_queue.latencies for replica in self._replicas)
+
+    @property
+    def dropped_triggers_count(self) -> int:
+        """Number of triggers dropped by trigger queue overflow policy"""
+        return sum(replica.trigger_queue.dropped_count
+                   for replica in self._replicas)
+
+    @property
+    def timed_out_actions_count(self) -> int:
+        """Number of actions aborted because of execution timeout"""
+        return sum(replica.timed_out_actions_count
+                   for replica in self._replicas)
+
+    def enqueue_trigger(self, trigger: common.Trigger):
+        """Enqueue trigger without blocking
+
+        If trigger queue is full, environment's trigger queue overflow policy
+        is applied. With `OverflowPolicy.BLOCK`, trigger is kept by
+        environment until it is delivered to trigger queue (see
+        `wait_delivery`).
+
+        """
+        if len(self._replicas) > 1:
+            if self._replica_key == ReplicaKey.NAME:
+                key = trigger.name
+
+            elif self._replica_key == ReplicaKey.TYPE:
+                key = trigger.type
+
+            elif self._replica_key == ReplicaKey.TYPE_NAME:
+                key = trigger.type, trigger.name
+
+            else:
+                raise ValueError('unsupported replica key')
+
+            replica = self._replicas[hash(key) % len(self._replicas)]
+
+        else:
+            replica = self._replicas[0]
+
+        trigger_queue_full = replica.trigger_queue.full()
+        if trigger_queue_full and not replica.trigger_queue_full:
+            mlog.warning('environment %s trigger queue full (lag %.3fs)',
+                         self._name, self._trigger_lag)
+        replica.trigger_queue_full = trigger_queue_full
+
+        if (replica.pending_triggers or
+                (trigger_queue_full and
+                 self._overflow_policy ==
+                 hat.controller.queue.OverflowPolicy.BLOCK)):
+            replica.pending_triggers.append(trigger)
+
+            if replica.delivered.is_set():
+                replica.delivered.clear()
+                self.async_group.spawn(self._delivery_loop, replica)
+
+            return
+
+        replica.trigger_queue.put_nowait(trigger)
+
+    async def wait_delivery(self):
+        """Wait until all triggers kept by environment are delivered to
+        trigger queues"""
+        for replica in self._replicas:
+            await replica.delivered.wait()
+
+    async def _delivery_loop(self, replica):
+        try:
+            while replica.pending_triggers:
+                await replica.trigger_queue.put(replica.pending_triggers[0])
+                replica.pending_triggers.popleft()
+
+        except aio.QueueClosedError:
+            replica.pending_triggers.clear()
 
-    async def enqueue_trigger(self, trigger: common.Trigger):
-        await self._trigger_queue.put(trigger)
+        except Exception as e:
+            mlog.error('environment %s delivery loop error: %s',
+                       self._name, e, exc_info=e)
+            replica.pending_triggers.clear()
+            self.close()
+
+        finally:
+            replica.delivered.set()
+
+    async def _run_loop(self, replica, interpreter_type, init_code,
+                        action_codes):
+        evaluator = None
 
-    async def _run_loop(self, interpreter_type, init_code, action_codes):
         try:
             infos = (proxy.info for proxy in self._proxies.values())
+            call_cb = functools.partial(self._ext_call, replica)
+            post_cb = functools.partial(self._ext_post, replica)
 
-            evaluator = await self._executor.spawn(
+            evaluator = await replica.executor.spawn(
                 hat.controller.evaluators.create_evaluator,
-                interpreter_type, action_codes, infos, self._ext_call)
-
-            await self._executor.spawn(self._ext_eval_init, evaluator,
-                                       init_code)
+                interpreter_type, action_codes, infos, call_cb,
+                post_cb=post_cb,
+                validate_args=self._validate_unit_args,
+                code_cache=self._code_cache,
+                lazy_actions=self._lazy_actions,
+                quickjs_runtime=self._quickjs_runtime,
+                memory_limit=self._memory_limit,
+                gc_threshold=self._gc_threshold,
+                lua_gc_mode=self._lua_gc_mode,
+                timeout=self._execution_timeout)
+
+            await replica.executor.spawn(self._ext_eval_init, evaluator,
+                                         init_code)
 
             while True:
-                self._last_trigger = await self._trigger_queue.get()
+                entry = await replica.trigger_queue.get()
+                self._trigger_lag = time.monotonic() - entry.enqueue_time
+
+                batch = []
+                while True:
+                    action_names = self._matcher.match(entry.trigger)
+                    if action_names:
+                        batch.append((entry.trigger, action_names))
+
+                    if (self._trigger_batch_size > 0 and
+                            len(batch) >= self._trigger_batch_size):
+                        break
+
+                    if replica.trigger_queue.empty():
+                        break
+
+                    entry = replica.trigger_queue.get_nowait()
 
-                action_names = self._get_matching_action_names(
-                    self._last_trigger)
-                for action_name in action_names:
-                    await self._executor.spawn(self._ext_eval_action,
-                                               evaluator, action_name)
+                if batch:
+                    await replica.executor.spawn(self._ext_eval_batch,
+                                                 replica, evaluator, batch)
 
         except Exception as e:
             mlog.error('environment %s run loop error: %s',
@@ -79,18 +289,61 @@ class Environment(aio.Resource):
 
         finally:
             self.close()
-            self._trigger_queue.close()
+            replica.trigger_queue.close()
+
+            if evaluator:
+                await aio.uncancellable(
+                    self._close_evaluator(replica, evaluator))
+
+    async def _close_evaluator(self, replica, evaluator):
+        await replica.executor.async_close()
+
+        try:
+            await self._loop.run_in_executor(None, evaluator.close)
+
+        except Exception as e:
+            mlog.error('environment %s evaluator close error: %s',
+                       self._name, e, exc_info=e)
+
+    async def _post_loop(self, replica):
+        try:
+            while True:
+                unit_name, function, args, trigger = \
+                    await replica.post_queue.get()
 
-    async def _call(self, unit_name, function, args):
+                try:
+                    await self._call(unit_name, function, args, trigger)
+
+                except Exception as e:
+                    mlog.error('environment %s unit %s function %s error: %s',
+                               self._name, unit_name, function, e,
+                               exc_info=e)
+
+        except Exception as e:
+            mlog.error('environment %s post loop error: %s',
+                       self._name, e, exc_info=e)
+
+        finally:
+            self.close()
+
+    async def _call(self, unit_name, function, args, trigger):
+        proxy = self._proxies[unit_name]
+        return await aio.call(proxy.unit.call, function, args, trigger)
+
+    def _ext_call(self, replica, unit_name, function, args):
         proxy = self._proxies[unit_name]
-        return await aio.call(proxy.unit.call, function, args,
-                              self._last_trigger)
+        if function in proxy.info.thread_safe_functions:
+            return proxy.unit.call(function, args, replica.last_trigger)
 
-    def _ext_call(self, unit_name, function, args):
-        coro = self._call(unit_name, function, args)
+        coro = self._call(unit_name, function, args, replica.last_trigger)
         future = asyncio.run_coroutine_threadsafe(coro, self._loop)
         return future.result()
 
+    def _ext_post(self, replica, unit_name, function, args):
+        self._loop.call_soon_threadsafe(
+            replica.post_queue.put_nowait,
+            (unit_name, function, args, replica.last_trigger))
+
     def _ext_eval_init(self, evaluator, code):
         try:
             evaluator.eval_code(code)
@@ -99,37 +352,51 @@ class Environment(aio.Resource):
             mlog.error("environment %s init error: %s",
                        self._name, e, exc_info=e)
 
-    def _ext_eval_action(self, evaluator, action_name):
+    def _ext_eval_batch(self, replica, evaluator, batch):
+        for trigger, action_names in batch:
+            replica.last_trigger = trigger
+
+            for action_name in action_names:
+                self._ext_eval_action(replica, evaluator, action_name)
+
+    def _ext_eval_action(self, replica, evaluator, action_name):
         try:
             evaluator.eval_action(action_name)
 
+        except TimeoutError:
+            replica.timed_out_actions_count += 1
+            mlog.error("environment %s action %s execution timeout",
+                       self._name, action_name)
+
         except Exception as e:
             mlog.error("environment %s action %s error: %s",
                        self._name, action_name, e, exc_info=e)
 
-    def _get_matching_action_names(self, trigger):
-        for action_name, action_triggers in self._action_triggers.items():
-            for type_query, name_query in action_triggers:
-                if not _match_query(trigger.type, type_query):
-                    continue
-
-                if not _match_query(trigger.name, name_query):
-                    continue
-
-                yield action_name
-                break
-
-
-def _match_query(value, query):
-    if query and query[-1] == '*':
-        query = query[:-1]
-        value = value[:len(query)]
-
-    if len(value) != len(query):
-        return False
-
-    for v, q in zip(value, query):
-        if q != '?' and v != q:
-            return False
 
-    return True
+def get_trigger_queries(environment_conf: json.Data
+                        ) -> Iterable[tuple[common.TriggerQuery,
+                                            common.TriggerQuery,
+                                            common.ActionName]]:
+    """Get type and name queries of environment action triggers"""
+    for action_conf in environment_conf['actions']:
+        for trigger_conf in action_conf['triggers']:
+            yield (tuple(trigger_conf['type'].split('/')),
+                   tuple(trigger_conf['name'].split('/')),
+                   action_conf['name'])
+
+
+class _Replica:
+    __slots__ = ['executor', 'trigger_queue', 'trigger_queue_full',
+                 'pending_triggers', 'delivered', 'post_queue',
+                 'last_trigger', 'timed_out_actions_count']
+
+    def __init__(self, executor, trigger_queue):
+        self.executor = executor
+        self.trigger_queue = trigger_queue
+        self.pending_triggers = collections.deque()
+        self.delivered = asyncio.Event()
+        self.delivered.set()
+        self.post_queue = aio.Queue()
+        self.trigger_queue_full = False
+        self.last_trigger = None
+        self.timed_out_actions_count = 0
@@ -1,44 +1,97 @@
 from collections.abc import Iterable
 
 from hat.controller import interpreters
+from hat.controller.cache import CodeCache
 from hat.controller.evaluators import common
-from hat.controller.evaluators.common import CallCb, Evaluator
+from hat.controller.evaluators.common import CallCb, PostCb, Evaluator
 from hat.controller.evaluators.js import JsEvaluator
 from hat.controller.evaluators.lua import LuaEvaluator
 from hat.controller.evaluators.py import PyEvaluator
+from hat.controller.evaluators.subpy import PySubinterpreterEvaluator
 
 
 __all__ = ['CallCb',
+           'PostCb',
            'Evaluator',
            'JsEvaluator',
            'LuaEvaluator',
            'PyEvaluator',
+           'PySubinterpreterEvaluator',
            'create_evaluator']
 
 
 def create_evaluator(interpreter_type: interpreters.InterpreterType,
                      action_codes: dict[common.ActionName, str],
                      infos: Iterable[common.UnitInfo],
-                     call_cb: CallCb
+                     call_cb: CallCb,
+                     post_cb: PostCb | None = None,
+                     validate_args: bool = True,
+                     code_cache: CodeCache | None = None,
+                     lazy_actions: bool = False,
+                     quickjs_runtime: (interpreters.QuickJSRuntime |
+                                       None) = None,
+                     memory_limit: int | None = None,
+                     gc_threshold: int | None = None,
+                     lua_gc_mode: interpreters.LuaGcMode = (
+                         interpreters.LuaGcMode.INCREMENTAL),
+                     timeout: float | None = None
                      ) -> Evaluator:
-    interpreter = interpreters.create_interpreter(interpreter_type)
+    """Create evaluator
+
+    Argument `validate_args` is used only by Python evaluators. Argument
+    `code_cache` is not used by Python sub-interpreter evaluator. Arguments
+    `quickjs_runtime`, `memory_limit`, `gc_threshold` and `lua_gc_mode` are
+    passed to `interpreters.create_interpreter`.
+
+    If `timeout` (in seconds) is set, each evaluation of code or action
+    which doesn't finish before timeout expires is aborted with
+    `TimeoutError`.
+
+    """
+    interpreter = interpreters.create_interpreter(
+        interpreter_type,
+        quickjs_runtime=quickjs_runtime,
+        memory_limit=memory_limit,
+        gc_threshold=gc_threshold,
+        lua_gc_mode=lua_gc_mode,
+        timeout=timeout)
 
     if isinstance(interpreter, interpreters.JsInterpreter):
         return JsEvaluator(interpreter=interpreter,
                            action_codes=action_codes,
                            infos=infos,
-                           call_cb=call_cb)
+                           call_cb=call_cb,
+                           post_cb=post_cb,
+                           code_cache=code_cache,
+                           lazy_actions=lazy_actions)
 
     if isinstance(interpreter, interpreters.LuaInterpreter):
         return LuaEvaluator(interpreter=interpreter,
                             action_codes=action_codes,
                             infos=infos,
-                            call_cb=call_cb)
+                            call_cb=call_cb,
+                            post_cb=post_cb,
+                            code_cache=code_cache,
+                            lazy_actions=lazy_actions)
 
     if isinstance(interpreter, interpreters.PyInterpreter):
         return PyEvaluator(interpreter=interpreter,
                            action_codes=action_codes,
                            infos=infos,
-                           call_cb=call_cb)
+                           call_cb=call_cb,
+                           post_cb=post_cb,
+                           validate_args=validate_args,
+                           code_cache=code_cache,
+                           lazy_actions=lazy_actions)
+
+    if isinstance(interpreter, interpreters.PySubinterpreter):
+        return PySubinterpreterEvaluator(interpreter=interpreter,
+                                         action_codes=action_codes,
+                                         infos=infos,
+                                         call_cb=call_cb,
+                                         post_cb=post_cb,
+                                         validate_args=validate_args,
+                                         lazy_actions=lazy_actions,
+                                         timeout=timeout)
 
     raise ValueError('unsupporter interpreter type')
@@ -0,0 +1,98 @@
+"""Python sub-interpreter bridge data encoding
+
+Data is encoded as JSON. Binary data and float64 arrays are encoded as
+hex strings wrapped in single key objects. Single key objects with
+reserved keys are escaped, so user data is never decoded as binary data.
+
+This module depends only on standard library - its source is also executed
+by Python sub-interpreter evaluator. Hex encoding is used instead of
+`base64` because its `binascii` extension module crashes isolated
+sub-interpreters at shutdown on CPython 3.12.1.
+
+"""
+
+import array
+import json
+import typing
+
+
+def encode(data: typing.Any) -> str:
+    """Encode data"""
+    encoder = _Encoder()
+    result = json.dumps(data, default=encoder.default)
+
+    # each occurrence of reserved key prefix which is not result of binary
+    # data encoding could be part of single key object which requires
+    # escaping (most data doesn't contain reserved prefix)
+    if result.count(_key_prefix) > encoder.count:
+        result = json.dumps(_escape(data), default=encoder.default)
+
+    return result
+
+
+def decode(data: str | bytes) -> typing.Any:
+    """Decode data"""
+    return json.loads(data, object_hook=_decode_object)
+
+
+class _Encoder:
+
+    def __init__(self):
+        self.count = 0
+
+    def default(self, obj):
+        if isinstance(obj, array.array) and obj.typecode == 'd':
+            self.count += 1
+            return {_float64_array_key: obj.tobytes().hex()}
+
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            self.count += 1
+            return {_bytes_key: obj.hex()}
+
+        raise TypeError(f'unsupported type {type(obj).__name__}')
+
+
+def _escape(data):
+    if isinstance(data, dict):
+        data = {k: _escape(v) for k, v in data.items()}
+
+        if len(data) == 1:
+            key, value = next(iter(data.items()))
+            if key in _reserved_keys:
+                return {_escaped_key: [key, value]}
+
+        return data
+
+    if isinstance(data, (list, tuple)):
+        return [_escape(i) for i in data]
+
+    return data
+
+
+def _decode_object(obj):
+    if len(obj) != 1:
+        return obj
+
+    key, value = next(iter(obj.items()))
+
+    if key == _bytes_key:
+        return bytes.fromhex(value)
+
+    if key == _float64_array_key:
+        return array.array('d', bytes.fromhex(value))
+
+    if key == _escaped_key:
+        return {value[0]: value[1]}
+
+    return obj
+
+
+_key_prefix = '"$hat_controller_'
+
+_bytes_key = '$hat_controller_bytes'
+
+_float64_array_key = '$hat_controller_float64_array'
+
+_escaped_key = '$hat_controller_escaped'
+
+_reserved_keys = frozenset([_bytes_key, _float64_array_key, _escaped_key])
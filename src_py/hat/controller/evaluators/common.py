@@ -1,17 +1,28 @@
 from hat.controller.common import *  # NOQA
 
-from collections.abc import Callable, Collection
+from collections.abc import Callable, Collection, Iterable
 
 import abc
+import functools
+import logging
 
 from hat import json
 
-from hat.controller.common import ActionName, UnitName, FunctionName
+from hat.controller.common import (ActionName,
+                                   UnitName,
+                                   FunctionName,
+                                   UnitInfo)
+
+
+mlog = logging.getLogger(__name__)
 
 
 CallCb = Callable[[UnitName, FunctionName, Collection[json.Data]],
                   json.Data]
 
+PostCb = Callable[[UnitName, FunctionName, Collection[json.Data]],
+                  None]
+
 
 class Evaluator(abc.ABC):
     """Code/action evaluator"""
@@ -23,3 +34,65 @@ class Evaluator(abc.ABC):
     @abc.abstractmethod
     def eval_action(self, action: ActionName):
         """Evaluate action"""
+
+    def close(self):
+        """Release evaluator resources"""
+
+
+def create_post_cb(call_cb: CallCb) -> PostCb:
+    """Create post callback based on call callback
+
+    Resulting post callback calls `call_cb` synchronously, discards its
+    result and logs errors.
+
+    """
+
+    def post_cb(unit_name, function, args):
+        try:
+            call_cb(unit_name, function, args)
+
+        except Exception as e:
+            mlog.error('unit %s function %s error: %s',
+                       unit_name, function, e, exc_info=e)
+
+    return post_cb
+
+
+def create_api(infos: Iterable[UnitInfo],
+               cb: CallCb | PostCb
+               ) -> dict[str, json.Data]:
+    """Create unit functions API
+
+    Resulting dictionary contains nested dictionary for each unit (with
+    function names split by "." into nested dictionaries) where leafs are
+    callables bound to unit and function name. Each callable passes its
+    arguments, as tuple, to `cb`.
+
+    Interpreter bridges convert callables into native host functions, so
+    scripts call `cb` without generated wrapper code.
+
+    """
+    api = {}
+    for info in infos:
+        unit_api = {}
+
+        for function in info.functions:
+            segments = function.split('.')
+            parent = unit_api
+
+            for segment in segments[:-1]:
+                if segment not in parent:
+                    parent[segment] = {}
+
+                parent = parent[segment]
+
+            parent[segments[-1]] = functools.partial(_api_fn, cb, info.name,
+                                                     function)
+
+        api[info.name] = unit_api
+
+    return api
+
+
+def _api_fn(cb, unit_name, function, *args):
+    return cb(unit_name, function, args)
@@ -3,82 +3,102 @@ from collections.abc import Iterable
 from hat import json
 
 from hat.controller import interpreters
+from hat.controller.cache import CodeCache, get_cache_key
 from hat.controller.evaluators import common
 
 
 class JsEvaluator(common.Evaluator):
+    """JavaScript evaluator
+
+    If `code_cache` is provided, compiled bytecode of actions and evaluated
+    code is stored in cache and reused by subsequently created evaluators.
+
+    If `lazy_actions` is ``True``, each action is compiled during its first
+    evaluation (instead of during evaluator creation).
+
+    """
 
     def __init__(self,
                  interpreter: interpreters.JsInterpreter,
                  action_codes: dict[common.ActionName, str],
                  infos: Iterable[common.UnitInfo],
-                 call_cb: common.CallCb):
+                 call_cb: common.CallCb,
+                 post_cb: common.PostCb | None = None,
+                 code_cache: CodeCache | None = None,
+                 lazy_actions: bool = False):
         self._interpreter = interpreter
+        self._code_cache = code_cache
+        self._action_codes = action_codes
         self._actions = {}
 
-        _init_interpreter(interpreter, infos, call_cb)
+        _init_interpreter(interpreter, infos, call_cb,
+                          post_cb or common.create_post_cb(call_cb))
 
-        for action, code in action_codes.items():
-            try:
-                self._actions[action] = interpreter.eval(
-                    _create_action_code(code))
-
-            except Exception as e:
-                raise Exception(f'action {action} error: {e}') from e
+        if not lazy_actions:
+            for action in action_codes.keys():
+                self._compile_action(action)
 
     def eval_code(self, code: str):
-        self._interpreter.eval(code)
-
-    def eval_action(self, action: common.ActionName):
-        self._actions[action]()
+        if not self._code_cache:
+            self._interpreter.eval(code)
+            return
 
+        key = get_cache_key(self._interpreter, 'code', code)
+        data = self._code_cache.get(key)
+        if data is None:
+            data = self._interpreter.dump(code)
+            self._code_cache.set(key, data)
 
-def _init_interpreter(interpreter, infos, call_cb):
-    api_code = _create_api_code(infos)
-    api_fn = interpreter.eval(api_code)
-    api_fn(call_cb)
+        self._interpreter.eval(data)
 
+    def eval_action(self, action: common.ActionName):
+        fn = self._actions.get(action)
+        if fn is None:
+            fn = self._compile_action(action)
 
-def _create_api_code(infos):
-    api_dict = _create_api(infos)
-    units = _encode_api(api_dict)
+        fn()
 
-    return f"var units; (function(f) {{ units = {units}; }})"
+    def _compile_action(self, action):
+        code = self._action_codes[action]
 
+        try:
+            fn = self._load_action(code)
 
-def _create_action_code(code):
-    return f"new Function({json.encode(code)})"
+        except Exception as e:
+            raise Exception(f'action {action} error: {e}') from e
 
+        self._actions[action] = fn
+        return fn
 
-def _create_api(infos):
-    api_dict = {}
-    for info in infos:
-        unit_api_dict = {}
+    def _load_action(self, code):
+        if not self._code_cache:
+            return self._interpreter.eval(_create_action_code(code))
 
-        for function in info.functions:
-            segments = function.split('.')
-            parent = unit_api_dict
+        key = get_cache_key(self._interpreter, 'action', code)
+        data = self._code_cache.get(key)
+        if data is None:
+            # function constructor validates that code is function body
+            self._interpreter.eval(_create_action_code(code))
 
-            for segment in segments[:-1]:
-                if segment not in parent:
-                    parent[segment] = {}
+            data = self._interpreter.dump(f"(function() {{\n{code}\n}})")
+            self._code_cache.set(key, data)
 
-                parent = parent[segment]
+        return self._interpreter.eval(data)
 
-            parent[segments[-1]] = (f"function() {{ return f("
-                                    f"'{info.name}', "
-                                    f"'{function}', "
-                                    f"Array.prototype.slice.call(arguments)"
-                                    f"); }}")
 
-        api_dict[info.name] = unit_api_dict
+def _init_interpreter(interpreter, infos, call_cb, post_cb):
+    infos = list(infos)
+    api_fn = interpreter.eval(_api_code)
+    api_fn(common.create_api(infos, call_cb),
+           common.create_api(infos, post_cb))
 
-    return api_dict
 
+def _create_action_code(code):
+    return f"new Function({json.encode(code)})"
 
-def _encode_api(x):
-    if isinstance(x, str):
-        return x
 
-    elements = (f"'{k}': {_encode_api(v)}" for k, v in x.items())
-    return f"{{{', '.join(elements)}}}"
+_api_code = ("var units, unitsPost; "
+             "(function(u, p) { "
+             "units = u; "
+             "unitsPost = p; "
+             "})")
@@ -1,77 +1,86 @@
 from collections.abc import Iterable
 
 from hat.controller import interpreters
+from hat.controller.cache import CodeCache, get_cache_key
 from hat.controller.evaluators import common
 
 
 class LuaEvaluator(common.Evaluator):
+    """Lua evaluator
+
+    If `code_cache` is provided, compiled bytecode of actions and evaluated
+    code is stored in cache and reused by subsequently created evaluators.
+
+    If `lazy_actions` is ``True``, each action is compiled during its first
+    evaluation (instead of during evaluator creation).
+
+    """
 
     def __init__(self,
                  interpreter: interpreters.LuaInterpreter,
                  action_codes: dict[common.ActionName, str],
                  infos: Iterable[common.UnitInfo],
-                 call_cb: common.CallCb):
+                 call_cb: common.CallCb,
+                 post_cb: common.PostCb | None = None,
+                 code_cache: CodeCache | None = None,
+                 lazy_actions: bool = False):
         self._interpreter = interpreter
+        self._code_cache = code_cache
+        self._action_codes = action_codes
         self._actions = {}
 
-        _init_interpreter(interpreter, infos, call_cb)
-
-        for action, code in action_codes.items():
-            try:
-                self._actions[action] = interpreter.load(code, action)
+        _init_interpreter(interpreter, infos, call_cb,
+                          post_cb or common.create_post_cb(call_cb))
 
-            except Exception as e:
-                raise Exception(f'action {action} error: {e}') from e
+        if not lazy_actions:
+            for action in action_codes.keys():
+                self._compile_action(action)
 
     def eval_code(self, code: str):
-        self._interpreter.load(code)()
+        self._load(code)()
 
     def eval_action(self, action: common.ActionName):
-        self._actions[action]()
-
-
-def _init_interpreter(interpreter, infos, call_cb):
-    api_code = _create_api_code(infos)
-    fn = interpreter.load(api_code)()
-    fn(call_cb)
-
-
-def _create_api_code(infos):
-    api_dict = _create_api(infos)
-    units = _encode_api(api_dict)
+        fn = self._actions.get(action)
+        if fn is None:
+            fn = self._compile_action(action)
 
-    return f"return (function(f) units = {units} end)"
+        fn()
 
+    def _compile_action(self, action):
+        code = self._action_codes[action]
 
-def _create_api(infos):
-    api_dict = {}
-    for info in infos:
-        unit_api_dict = {}
+        try:
+            fn = self._load(code, action)
 
-        for function in info.functions:
-            segments = function.split('.')
-            parent = unit_api_dict
+        except Exception as e:
+            raise Exception(f'action {action} error: {e}') from e
 
-            for segment in segments[:-1]:
-                if segment not in parent:
-                    parent[segment] = {}
+        self._actions[action] = fn
+        return fn
 
-                parent = parent[segment]
+    def _load(self, code, name=None):
+        if not self._code_cache:
+            return self._interpreter.load(code, name)
 
-            parent[segments[-1]] = (f"(function(...) return f("
-                                    f"'{info.name}', "
-                                    f"'{function}', "
-                                    f"{{...}}"
-                                    f") end)")
+        key = (get_cache_key(self._interpreter, 'code', code)
+               if name is None else
+               get_cache_key(self._interpreter, 'action', name, code))
+        data = self._code_cache.get(key)
+        if data is None:
+            data = self._interpreter.dump(code, name)
+            self._code_cache.set(key, data)
 
-        api_dict[info.name] = unit_api_dict
+        return self._interpreter.load(data, name)
 
-    return api_dict
 
+def _init_interpreter(interpreter, infos, call_cb, post_cb):
+    infos = list(infos)
+    api_fn = interpreter.load(_api_code)()
+    api_fn(common.create_api(infos, call_cb),
+           common.create_api(infos, post_cb))
 
-def _encode_api(x):
-    if isinstance(x, str):
-        return x
 
-    elements = (f"{k} = {_encode_api(v)}" for k, v in x.items())
-    return f"{{{', '.join(elements)}}}"
+_api_code = ("return (function(u, p) "
+             "units = u; "
+             "unitsPost = p "
+             "end)")
@@ -1,30 +1,116 @@
 from collections.abc import Iterable
 import functools
+import logging
+import marshal
+import types
 
 from hat.controller import interpreters
+from hat.controller.cache import CodeCache, get_cache_key
 from hat.controller.evaluators import common
+from hat.controller.evaluators import validation
+
+
+mlog = logging.getLogger(__name__)
 
 
 class PyEvaluator(common.Evaluator):
+    """Python evaluator
+
+    If `validate_args` is ``False``, unit function arguments are passed to
+    unit without checking that they are JSON data.
+
+    If `code_cache` is provided, marshaled code objects of actions and
+    evaluated code are stored in cache and reused by subsequently created
+    evaluators.
+
+    If `lazy_actions` is ``True``, each action is compiled during its first
+    evaluation (instead of during evaluator creation).
+
+    """
 
     def __init__(self,
                  interpreter: interpreters.PyInterpreter,
                  action_codes: dict[common.ActionName, str],
                  infos: Iterable[common.UnitInfo],
-                 call_cb: common.CallCb):
+                 call_cb: common.CallCb,
+                 post_cb: common.PostCb | None = None,
+                 validate_args: bool = True,
+                 code_cache: CodeCache | None = None,
+                 lazy_actions: bool = False):
         self._interpreter = interpreter
-        self._actions = action_codes
+        self._code_cache = code_cache
+        self._action_codes = action_codes
+        self._actions = {}
+
+        if not lazy_actions:
+            for action in action_codes.keys():
+                self._compile_action(action)
 
-        interpreter.globals['units'] = _create_units(infos, call_cb)
+        infos = list(infos)
+        interpreter.globals['units'] = _create_units(infos, call_cb,
+                                                     validate_args)
+        interpreter.globals['unitsPost'] = _create_units(
+            infos, post_cb or common.create_post_cb(call_cb), validate_args)
 
     def eval_code(self, code: str):
+        if self._code_cache:
+            code = self._compile(code)
+
         self._interpreter.eval(code, None)
 
     def eval_action(self, action: common.ActionName):
-        self._interpreter.eval(self._actions[action], {})
+        code = self._actions.get(action)
+        if code is None:
+            code = self._compile_action(action)
+
+        self._interpreter.eval(code, {})
+
+    def _compile_action(self, action):
+        source = self._action_codes[action]
+
+        try:
+            code = self._compile(source, action)
+
+        except Exception as e:
+            raise Exception(f'action {action} error: {e}') from e
+
+        self._actions[action] = code
+        return code
 
+    def _compile(self, code, name=None):
+        if not self._code_cache:
+            return self._interpreter.compile(code, name)
+
+        key = (get_cache_key(self._interpreter, 'code', code)
+               if name is None else
+               get_cache_key(self._interpreter, 'action', name, code))
+        data = self._code_cache.get(key)
+        if data is not None:
+            cached_code = _load_code(data)
+            if cached_code is not None:
+                return cached_code
+
+            # invalid cache entry is replaced with newly compiled code
+            mlog.warning('invalid cached code %s', key)
+
+        code = self._interpreter.compile(code, name)
+        self._code_cache.set(key, marshal.dumps(code))
+        return code
+
+
+def _load_code(data):
+    try:
+        code = marshal.loads(data)
+
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    return code if isinstance(code, types.CodeType) else None
+
+
+def _create_units(infos, call_cb, validate_args=True):
+    unit_fn = _unit_fn if validate_args else _unit_fn_unchecked
 
-def _create_units(infos, call_cb):
     units = type('units', (), {})
     for info in infos:
         unit = type(info.name, (), {})
@@ -39,7 +125,7 @@ def _create_units(infos, call_cb):
 
                 parent = getattr(parent, segment)
 
-            fn = functools.partial(_unit_fn, call_cb, info.name, function)
+            fn = functools.partial(unit_fn, call_cb, info.name, function)
             setattr(parent, segments[-1], fn)
 
         setattr(units, info.name, unit)
@@ -48,18 +134,11 @@ def _create_units(infos, call_cb):
 
 
 def _unit_fn(call_cb, unit_name, function_name, *args):
-    if not all(_is_valid_arg(arg) for arg in args):
+    if not validation.are_valid_args(args):
         raise ValueError('unsupported argument type')
 
     return call_cb(unit_name, function_name, args)
 
 
-def _is_valid_arg(arg):
-    if isinstance(arg, dict):
-        return all(isinstance(k, str) and _is_valid_arg(v)
-                   for k, v in arg.items())
-
-    if isinstance(arg, list):
-        return all(_is_valid_arg(i) for i in arg)
-
-    return arg is None or isinstance(arg, (bool, int, float, str))
+def _unit_fn_unchecked(call_cb, unit_name, function_name, *args):
+    return call_cb(unit_name, function_name, args)
@@ -0,0 +1,269 @@
+"""Python sub-interpreter evaluator
+
+Sub-interpreter can not access main interpreter objects. Unit functions
+available in sub-interpreter send JSON encoded requests to main interpreter
+by writing to pipe. Requests are processed by main interpreter bridge thread
+which calls `call_cb` and writes JSON encoded response to another pipe
+(posted requests are passed to `post_cb` without response). Requests and
+responses are encoded by `hat.controller.evaluators.bridge`.
+
+If `timeout` is set, sub-interpreter code is executed with trace function
+which aborts execution with `TimeoutError` once timeout expires.
+
+"""
+
+from collections.abc import Iterable
+import inspect
+import json
+import os
+import threading
+
+from hat.controller import interpreters
+from hat.controller.evaluators import bridge
+from hat.controller.evaluators import common
+from hat.controller.evaluators import validation
+
+
+class PySubinterpreterEvaluator(common.Evaluator):
+
+    def __init__(self,
+                 interpreter: interpreters.PySubinterpreter,
+                 action_codes: dict[common.ActionName, str],
+                 infos: Iterable[common.UnitInfo],
+                 call_cb: common.CallCb,
+                 post_cb: common.PostCb | None = None,
+                 validate_args: bool = True,
+                 lazy_actions: bool = False,
+                 timeout: float | None = None):
+        self._interpreter = interpreter
+        self._timeout = timeout
+        self._call_cb = call_cb
+        self._post_cb = post_cb or common.create_post_cb(call_cb)
+
+        request_r_fd, self._request_w_fd = os.pipe()
+        self._response_r_fd, self._response_w_fd = os.pipe()
+        self._request_r_file = os.fdopen(request_r_fd, 'rb')
+
+        self._thread = threading.Thread(target=self._ext_bridge_loop,
+                                        name='hat-controller-subinterpreter',
+                                        daemon=True)
+        self._thread.start()
+
+        conf = {'request_fd': self._request_w_fd,
+                'response_fd': self._response_r_fd,
+                'units': {info.name: list(info.functions) for info in infos},
+                'actions': action_codes,
+                'validate_args': validate_args,
+                'validation_code': inspect.getsource(validation),
+                'bridge_code': inspect.getsource(bridge),
+                'lazy_actions': lazy_actions,
+                'timeout': timeout,
+                'timeout_error': _timeout_error}
+
+        try:
+            interpreter.exec(f'{_init_code}\n'
+                             f'_hat_init({json.dumps(conf)!r})\n'
+                             f'del _hat_init\n')
+
+        except BaseException:
+            self.close()
+            raise
+
+    def eval_code(self, code: str):
+        if self._timeout is None:
+            self._interpreter.exec(code)
+
+        else:
+            self._exec(f'_hat_eval_code({code!r})')
+
+    def eval_action(self, action: common.ActionName):
+        self._exec(f'_hat_eval_action({action!r})')
+
+    def _exec(self, code):
+        try:
+            self._interpreter.exec(code)
+
+        except Exception as e:
+            if _timeout_error in str(e):
+                raise TimeoutError('execution timeout') from e
+
+            raise
+
+    def close(self):
+        try:
+            self._interpreter.close()
+
+        finally:
+            os.close(self._request_w_fd)
+            self._thread.join()
+
+    def _ext_bridge_loop(self):
+        try:
+            for line in self._request_r_file:
+                unit_name, function, args, post = bridge.decode(line)
+
+                if post:
+                    self._post_cb(unit_name, function, tuple(args))
+                    continue
+
+                try:
+                    result = self._call_cb(unit_name, function, tuple(args))
+                    response = {'result': result}
+
+                except Exception as e:
+                    response = {'error': str(e)}
+
+                data = (bridge.encode(response) + '\n').encode()
+                while data:
+                    data = data[os.write(self._response_w_fd, data):]
+
+        finally:
+            self._request_r_file.close()
+            os.close(self._response_r_fd)
+            os.close(self._response_w_fd)
+
+
+_timeout_error = 'hat controller execution timeout'
+
+
+_init_code = r'''
+def _hat_init(conf):
+    import functools
+    import json
+    import os
+    import sys
+    import time
+
+    conf = json.loads(conf)
+    request_fd = conf['request_fd']
+    response_file = os.fdopen(conf['response_fd'], 'rb', closefd=False)
+    actions = {}
+
+    def compile_action(action):
+        code = conf['actions'][action]
+
+        try:
+            actions[action] = compile(code, action, 'exec')
+
+        except Exception as e:
+            raise Exception(f'action {action} error: {e}') from e
+
+        return actions[action]
+
+    if not conf['lazy_actions']:
+        for action in conf['actions'].keys():
+            compile_action(action)
+
+    validate_args = conf['validate_args']
+
+    # validation and bridge modules can not be imported by isolated
+    # sub-interpreter
+    validation = {}
+    exec(conf['validation_code'], validation)
+    are_valid_args = validation['are_valid_args']
+
+    bridge = {}
+    exec(conf['bridge_code'], bridge)
+    bridge_encode = bridge['encode']
+    bridge_decode = bridge['decode']
+
+    def send_request(unit_name, function_name, args, post):
+        if validate_args and not are_valid_args(args):
+            raise ValueError('unsupported argument type')
+
+        data = bridge_encode([unit_name, function_name, args, post]) + '\n'
+        data = data.encode()
+        while data:
+            data = data[os.write(request_fd, data):]
+
+    def unit_post_fn(unit_name, function_name, *args):
+        send_request(unit_name, function_name, args, True)
+
+    def unit_fn(unit_name, function_name, *args):
+        send_request(unit_name, function_name, args, False)
+
+        line = response_file.readline()
+        if not line:
+            raise Exception('bridge closed')
+
+        response = bridge_decode(line)
+        if 'error' in response:
+            raise Exception(response['error'])
+
+        return response['result']
+
+    timeout = conf['timeout']
+    deadline = None
+
+    def trace_call(frame, event, arg):
+        if (frame.f_globals is not globals() or
+                frame.f_code in untraced_codes):
+            return
+
+        frame.f_trace_opcodes = True
+        return trace_opcode(frame, event, arg)
+
+    def trace_opcode(frame, event, arg):
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(conf['timeout_error'])
+
+        return trace_opcode
+
+    def exec_code(code, locals):
+        nonlocal deadline
+
+        if timeout is None or deadline is not None:
+            exec(code, globals(), locals)
+            return
+
+        trace = sys.gettrace()
+        deadline = time.monotonic() + timeout
+        sys.settrace(trace_call)
+
+        try:
+            exec(code, globals(), locals)
+
+        finally:
+            sys.settrace(trace)
+            deadline = None
+
+    def eval_code(code):
+        exec_code(code, globals())
+
+    def eval_action(action):
+        code = actions.get(action)
+        if code is None:
+            code = compile_action(action)
+
+        exec_code(code, {})
+
+    def create_units(fn):
+        units = type('units', (), {})
+        for unit_name, functions in conf['units'].items():
+            unit = type(unit_name, (), {})
+
+            for function in functions:
+                segments = function.split('.')
+                parent = unit
+
+                for segment in segments[:-1]:
+                    if not hasattr(parent, segment):
+                        setattr(parent, segment, type(segment, (), {}))
+
+                    parent = getattr(parent, segment)
+
+                setattr(parent, segments[-1],
+                        functools.partial(fn, unit_name, function))
+
+            setattr(units, unit_name, unit)
+
+        return units
+
+    untraced_codes = {fn.__code__
+                      for fn in [send_request, unit_post_fn, unit_fn]}
+
+    globals()['units'] = create_units(unit_fn)
+    globals()['unitsPost'] = create_units(unit_post_fn)
+    globals()['_hat_eval_code'] = eval_code
+    globals()['_hat_eval_action'] = eval_action
+'''
@@ -0,0 +1,113 @@
+"""Unit function arguments validation
+
+This module depends only on standard library - its source is also executed
+by Python sub-interpreter evaluator.
+
+"""
+
+from collections.abc import Iterable
+import array
+import typing
+
+
+def are_valid_args(args: Iterable[typing.Any]) -> bool:
+    """Check if unit function arguments contain only supported data
+
+    Supported data are ``None``, ``bool``, ``int``, ``float``, ``str``,
+    ``bytes``, ``array.array`` and lists and dicts (with ``str`` keys) of
+    supported data. Lists and dicts which contain themselves (directly or
+    through other lists and dicts) are not supported.
+
+    """
+    # containers are tracked only for detection of repeated visits - if
+    # any container is visited more than once, arguments are validated
+    # again with tracking of nested containers which distinguishes shared
+    # containers from cyclic references
+    stack = list(args)
+    visited = set()
+
+    while stack:
+        arg = stack.pop()
+
+        if type(arg) in _scalar_types:
+            continue
+
+        if isinstance(arg, dict):
+            if not all(isinstance(k, str) for k in arg):
+                return False
+
+            items = arg.values()
+
+        elif isinstance(arg, list):
+            items = arg
+
+        elif isinstance(arg, (bool, int, float, str)):
+            continue
+
+        else:
+            return False
+
+        arg_id = id(arg)
+        if arg_id in visited:
+            return _are_valid_shared_args(args)
+
+        visited.add(arg_id)
+        stack.extend(items)
+
+    return True
+
+
+def _are_valid_shared_args(args):
+    stack = list(args)
+
+    # ids of containers whose items are being validated and ids of already
+    # validated containers (same container can be referenced multiple times)
+    path = set()
+    valid = set()
+
+    while stack:
+        arg = stack.pop()
+
+        if type(arg) in _scalar_types:
+            continue
+
+        if arg is _exit_marker:
+            arg_id = stack.pop()
+            path.remove(arg_id)
+            valid.add(arg_id)
+            continue
+
+        if isinstance(arg, dict):
+            items = arg.values()
+
+        elif isinstance(arg, list):
+            items = arg
+
+        elif isinstance(arg, (bool, int, float, str)):
+            continue
+
+        else:
+            return False
+
+        arg_id = id(arg)
+        if arg_id in valid:
+            continue
+
+        if arg_id in path:
+            return False
+
+        if items is not arg and not all(isinstance(k, str) for k in arg):
+            return False
+
+        path.add(arg_id)
+        stack.append(arg_id)
+        stack.append(_exit_marker)
+        stack.extend(items)
+
+    return True
+
+
+_scalar_types = frozenset([type(None), bool, int, float, str, bytes,
+                           array.array])
+
+_exit_marker = object()
@@ -1,39 +1,74 @@
 from hat.controller.interpreters.common import (Data,
                                                 InterpreterType,
+                                                LuaGcMode,
                                                 JsInterpreter,
                                                 LuaInterpreter,
                                                 PyInterpreter,
+                                                PySubinterpreter,
                                                 Interpreter)
 from hat.controller.interpreters.cpython import CPython
+from hat.controller.interpreters.subinterpreter import CPythonSubinterpreter
 from hat.controller.interpreters.duktape import Duktape
 from hat.controller.interpreters.lua import Lua
-from hat.controller.interpreters.quickjs import QuickJS
+from hat.controller.interpreters.quickjs import QuickJSRuntime, QuickJS
 
 
 __all__ = ['Data',
            'InterpreterType',
+           'LuaGcMode',
            'JsInterpreter',
            'LuaInterpreter',
            'PyInterpreter',
+           'PySubinterpreter',
            'Interpreter',
            'CPython',
+           'CPythonSubinterpreter',
            'Duktape',
            'Lua',
+           'QuickJSRuntime',
            'QuickJS',
            'create_interpreter']
 
 
-def create_interpreter(interpreter_type: InterpreterType) -> Interpreter:
+def create_interpreter(interpreter_type: InterpreterType,
+                       quickjs_runtime: QuickJSRuntime | None = None,
+                       memory_limit: int | None = None,
+                       gc_threshold: int | None = None,
+                       lua_gc_mode: LuaGcMode = LuaGcMode.INCREMENTAL,
+                       timeout: float | None = None
+                       ) -> Interpreter:
+    """Create interpreter
+
+    Arguments `quickjs_runtime` and `gc_threshold` are used only by QuickJS
+    interpreter. Argument `memory_limit` is used only by QuickJS and Lua
+    interpreters. Argument `lua_gc_mode` is used only by Lua interpreter.
+
+    If `quickjs_runtime` is provided, `memory_limit` and `gc_threshold` are
+    ignored (QuickJS interpreter uses settings of provided runtime).
+
+    Argument `timeout` is not used by Python sub-interpreter (sub-interpreter
+    code is executed without access to interpreter instance).
+
+    """
     if interpreter_type == InterpreterType.CPYTHON:
-        return CPython()
+        return CPython(timeout=timeout)
+
+    if interpreter_type == InterpreterType.CPYTHON_SUBINTERPRETER:
+        return CPythonSubinterpreter()
 
     if interpreter_type == InterpreterType.DUKTAPE:
-        return Duktape()
+        return Duktape(timeout=timeout)
 
     if interpreter_type == InterpreterType.LUA:
-        return Lua()
+        return Lua(memory_limit=memory_limit,
+                   gc_mode=lua_gc_mode,
+                   timeout=timeout)
 
     if interpreter_type == InterpreterType.QUICKJS:
-        return QuickJS()
+        if quickjs_runtime is None:
+            quickjs_runtime = QuickJSRuntime(memory_limit=memory_limit,
+                                             gc_threshold=gc_threshold)
+
+        return QuickJS(quickjs_runtime, timeout=timeout)
 
     raise ValueError('unsupported interpreter type')
@@ -3,11 +3,14 @@ from hat.controller.common import *  # NOQA
 from collections.abc import Callable
 
 import abc
+import array
 import enum
+import types
 import typing
 
 
-Data: typing.TypeAlias = (None | bool | int | float | str |
+Data: typing.TypeAlias = (None | bool | int | float | str | bytes |
+                          array.array |
                           typing.List['Data'] |
                           typing.Dict[str, 'Data'] |
                           Callable)
@@ -16,25 +19,60 @@ Data: typing.TypeAlias = (None | bool | int | float | str |
 
 class InterpreterType(enum.Enum):
     CPYTHON = 'CPYTHON'
+    CPYTHON_SUBINTERPRETER = 'CPYTHON_SUBINTERPRETER'
     DUKTAPE = 'DUKTAPE'
     LUA = 'LUA'
     QUICKJS = 'QUICKJS'
 
 
+class LuaGcMode(enum.Enum):
+    INCREMENTAL = 'INCREMENTAL'
+    GENERATIONAL = 'GENERATIONAL'
+
+
 class JsInterpreter(abc.ABC):
     """JavaScript interpreter"""
 
     @abc.abstractmethod
-    def eval(self, code: str) -> Data:
-        """Evaluate code"""
+    def eval(self, code: str | bytes) -> Data:
+        """Evaluate code
+
+        If `code` is ``bytes``, it should be result of `dump`.
+
+        """
+
+    @abc.abstractmethod
+    def dump(self, code: str) -> bytes:
+        """Compile code to engine specific bytecode
+
+        Resulting bytecode is not validated when evaluated and should be
+        loaded only by the same engine build.
+
+        """
 
 
 class LuaInterpreter(abc.ABC):
     """Lua interpreter"""
 
     @abc.abstractmethod
-    def load(self, code: str, name: str | None = None) -> Callable[[], Data]:
-        """Load code"""
+    def load(self,
+             code: str | bytes,
+             name: str | None = None
+             ) -> Callable[[], Data]:
+        """Load code
+
+        If `code` is ``bytes``, it should be result of `dump`.
+
+        """
+
+    @abc.abstractmethod
+    def dump(self, code: str, name: str | None = None) -> bytes:
+        """Compile code to Lua bytecode
+
+        Resulting bytecode is not validated when loaded and should be
+        loaded only by the same engine build.
+
+        """
 
 
 class PyInterpreter(abc.ABC):
@@ -46,8 +84,37 @@ class PyInterpreter(abc.ABC):
         """Global variables"""
 
     @abc.abstractmethod
-    def eval(self, code: str, locals: dict[str, typing.Any] | None):
+    def compile(self,
+                code: str,
+                name: str | None = None
+                ) -> types.CodeType:
+        """Compile code"""
+
+    @abc.abstractmethod
+    def eval(self,
+             code: str | types.CodeType,
+             locals: dict[str, typing.Any] | None):
         """Evaluate code"""
 
 
-Interpreter: typing.TypeAlias = JsInterpreter | LuaInterpreter | PyInterpreter
+class PySubinterpreter(abc.ABC):
+    """Python sub-interpreter
+
+    Code is executed in isolated sub-interpreter with its own GIL. Objects
+    can not be shared between sub-interpreter and main interpreter.
+
+    """
+
+    @abc.abstractmethod
+    def exec(self, code: str):
+        """Execute code in sub-interpreter's main module"""
+
+    @abc.abstractmethod
+    def close(self):
+        """Destroy sub-interpreter"""
+
+
+Interpreter: typing.TypeAlias = (JsInterpreter |
+                                 LuaInterpreter |
+                                 PyInterpreter |
+                                 PySubinterpreter)
@@ -1,18 +1,70 @@
+import sys
+import time
+import types
 import typing
 
 from hat.controller.interpreters import common
 
 
 class CPython(common.PyInterpreter):
+    """CPython interpreter
 
-    def __init__(self):
+    If `timeout` (in seconds) is set, execution of each evaluated code is
+    limited with trace function which raises `TimeoutError` once timeout
+    expires. Trace function is active only in frames of code evaluated with
+    interpreter's globals (functions provided by units are not traced), but
+    it significantly slows down execution of traced code (trace function is
+    called for each executed opcode).
+
+    """
+
+    def __init__(self, timeout: float | None = None):
         self._globals = {}
+        self._timeout = timeout
+        self._deadline = None
 
     @property
     def globals(self) -> dict[str, typing.Any]:
         return self._globals
 
-    def eval(self, code: str, locals: dict[str, typing.Any] | None):
+    def compile(self,
+                code: str,
+                name: str | None = None
+                ) -> types.CodeType:
+        return compile(code, name or '<string>', 'exec')
+
+    def eval(self,
+             code: str | types.CodeType,
+             locals: dict[str, typing.Any] | None):
+        if self._timeout is None or self._deadline is not None:
+            self._exec(code, locals)
+            return
+
+        trace = sys.gettrace()
+        self._deadline = time.monotonic() + self._timeout
+        sys.settrace(self._trace_call)
+
+        try:
+            self._exec(code, locals)
+
+        finally:
+            sys.settrace(trace)
+            self._deadline = None
+
+    def _exec(self, code, locals):
         exec(code,
              self._globals,
              (locals if locals is not None else self._globals))
+
+    def _trace_call(self, frame, event, arg):
+        if frame.f_globals is not self._globals:
+            return
+
+        frame.f_trace_opcodes = True
+        return self._trace_opcode(frame, event, arg)
+
+    def _trace_opcode(self, frame, event, arg):
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise TimeoutError('execution timeout')
+
+        return self._trace_opcode
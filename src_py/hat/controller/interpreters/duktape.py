@@ -3,9 +3,18 @@ from hat.controller.interpreters import common
 
 
 class Duktape(common.JsInterpreter):
+    """Duktape interpreter
 
-    def __init__(self):
-        self._interpreter = _duktape.Interpreter()
+    If `timeout` (in seconds) is set, execution of each evaluated code or
+    function call is aborted with `TimeoutError` once timeout expires.
 
-    def eval(self, code: str) -> common.Data:
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self._interpreter = _duktape.Interpreter(timeout)
+
+    def eval(self, code: str | bytes) -> common.Data:
         return self._interpreter.eval(code)
+
+    def dump(self, code: str) -> bytes:
+        return self._interpreter.dump(code)
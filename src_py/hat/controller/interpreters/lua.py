@@ -5,12 +5,34 @@ from hat.controller.interpreters import common
 
 
 class Lua(common.LuaInterpreter):
+    """Lua interpreter
 
-    def __init__(self):
-        self._interpreter = _lua.Interpreter()
+    If `memory_limit` (in bytes) is set, allocations exceeding limit fail
+    and result in Lua ``not enough memory`` error.
+
+    If `timeout` (in seconds) is set, execution of each function call is
+    aborted with `TimeoutError` once timeout expires.
+
+    """
+
+    def __init__(self,
+                 memory_limit: int | None = None,
+                 gc_mode: common.LuaGcMode = common.LuaGcMode.INCREMENTAL,
+                 timeout: float | None = None):
+        self._interpreter = _lua.Interpreter(memory_limit,
+                                             gc_mode.value.lower(),
+                                             timeout)
+
+    @property
+    def memory_usage(self) -> int:
+        """Number of bytes currently allocated by interpreter"""
+        return self._interpreter.memory_usage
 
     def load(self,
-             code: str,
+             code: str | bytes,
              name: str | None = None
              ) -> Callable[[], common.Data]:
         return self._interpreter.load(code, name)
+
+    def dump(self, code: str, name: str | None = None) -> bytes:
+        return self._interpreter.dump(code, name)
@@ -2,10 +2,52 @@ from hat.controller.interpreters import _quickjs
 from hat.controller.interpreters import common
 
 
+class QuickJSRuntime:
+    """QuickJS runtime
+
+    Runtime can be shared by multiple interpreters, each with its own
+    context (global object) - this reduces memory usage because atoms,
+    shapes and garbage collector state are not duplicated for each
+    interpreter.
+
+    Interpreters sharing the same runtime can be used from different
+    threads, but their execution is serialized.
+
+    If `memory_limit` (in bytes) is set, allocations exceeding limit fail
+    and result in JavaScript ``out of memory`` error. Garbage collection
+    cycle is started each time allocated memory grows over `gc_threshold`
+    bytes since previous cycle. Both settings apply to all interpreters
+    sharing runtime.
+
+    """
+
+    def __init__(self,
+                 memory_limit: int | None = None,
+                 gc_threshold: int | None = None):
+        self._runtime = _quickjs.Runtime(memory_limit, gc_threshold)
+
+    @property
+    def memory_usage(self) -> int:
+        """Number of bytes currently allocated by runtime"""
+        return self._runtime.memory_usage
+
+
 class QuickJS(common.JsInterpreter):
+    """QuickJS interpreter
+
+    If `timeout` (in seconds) is set, execution of each evaluated code or
+    function call is aborted with `TimeoutError` once timeout expires.
 
-    def __init__(self):
-        self._interpreter = _quickjs.Interpreter()
+    """
 
-    def eval(self, code: str) -> common.Data:
+    def __init__(self,
+                 runtime: QuickJSRuntime | None = None,
+                 timeout: float | None = None):
+        self._interpreter = _quickjs.Interpreter(
+            runtime._runtime if runtime else None, timeout)
+
+    def eval(self, code: str | bytes) -> common.Data:
         return self._interpreter.eval(code)
+
+    def dump(self, code: str) -> bytes:
+        return self._interpreter.dump(code)
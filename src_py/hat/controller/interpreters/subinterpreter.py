@@ -0,0 +1,66 @@
+"""CPython sub-interpreter (PEP 684)
+
+Sub-interpreters with their own GIL are available on Python 3.12 and later.
+
+"""
+
+import sys
+
+from hat.controller.interpreters import common
+
+
+if sys.version_info >= (3, 14):
+    from concurrent import interpreters as _interpreters
+
+    def _create():
+        return _interpreters.create()
+
+    def _exec(interpreter, code):
+        interpreter.exec(code)
+
+    def _destroy(interpreter):
+        interpreter.close()
+
+elif sys.version_info >= (3, 13):
+    import _interpreters
+
+    def _create():
+        return _interpreters.create()
+
+    def _exec(interpreter, code):
+        excinfo = _interpreters.exec(interpreter, code)
+        if excinfo is not None:
+            raise Exception(excinfo.formatted)
+
+    def _destroy(interpreter):
+        _interpreters.destroy(interpreter)
+
+elif sys.version_info >= (3, 12):
+    import _xxsubinterpreters as _interpreters
+
+    def _create():
+        return _interpreters.create(isolated=True)
+
+    def _exec(interpreter, code):
+        _interpreters.run_string(interpreter, code)
+
+    def _destroy(interpreter):
+        _interpreters.destroy(interpreter)
+
+else:
+    _interpreters = None
+
+
+class CPythonSubinterpreter(common.PySubinterpreter):
+
+    def __init__(self):
+        if _interpreters is None:
+            raise Exception('sub-interpreters require Python 3.12 or later')
+
+        self._interpreter = _create()
+
+    def exec(self, code: str):
+        _exec(self._interpreter, code)
+
+    def close(self):
+        _destroy(self._interpreter)
@@ -14,6 +14,8 @@ from hat import json
 
 from hat.controller import common
 from hat.controller.runner import MainRunner
+import hat.controller.evaluators
+import hat.controller.interpreters
 
 
 user_conf_dir: Path = Path(appdirs.user_config_dir('hat'))
@@ -27,6 +29,10 @@ def create_argument_parser() -> argparse.ArgumentParser:
         '--conf', metavar='PATH', type=Path, default=None,
         help="configuration defined by hat-controller://controller.yaml "
              "(default $XDG_CONFIG_HOME/hat/controller.{yaml|yml|toml|json})")
+    parser.add_argument(
+        '--check', action='store_true',
+        help="validate configuration and compile all environment actions "
+             "without running controller")
     return parser
 
 
@@ -35,13 +41,56 @@ def main():
     parser = create_argument_parser()
     args = parser.parse_args()
     conf = json.read_conf(args.conf, user_conf_dir / 'controller')
+
+    if args.check:
+        return check(conf)
+
     sync_main(conf)
 
 
-def sync_main(conf: json.Data):
-    """Sync main entry point"""
-    aio.init_asyncio()
+def check(conf: json.Data) -> int:
+    """Validate configuration and compile environment actions
+
+    Actions are compiled (without execution of actions and init code)
+    regardless of environment's `lazy_actions` property. Errors are printed
+    to stderr. Returns process exit code.
+
+    """
+    try:
+        validate_conf(conf)
+
+    except Exception as e:
+        print(f'configuration error: {e}', file=sys.stderr)
+        return 1
+
+    infos = [common.import_unit_info(unit_conf['module'])
+             for unit_conf in conf['units']]
+    result = 0
+
+    def call_cb(unit_name, function, args):
+        raise Exception('unit calls not supported during check')
 
+    for env_conf in conf['environments']:
+        interpreter_type = hat.controller.interpreters.InterpreterType(
+            env_conf['interpreter'])
+        action_codes = {action_conf['name']: action_conf['code']
+                        for action_conf in env_conf['actions']}
+
+        try:
+            evaluator = hat.controller.evaluators.create_evaluator(
+                interpreter_type, action_codes, infos, call_cb)
+            evaluator.close()
+
+        except Exception as e:
+            print(f"environment {env_conf['name']} error: {e}",
+                  file=sys.stderr)
+            result = 1
+
+    return result
+
+
+def validate_conf(conf: json.Data):
+    """Validate configuration and configurations of all units"""
     validator = json.DefaultSchemaValidator(common.json_schema_repo)
     validator.validate('hat-controller://controller.yaml', conf)
 
@@ -51,6 +100,13 @@ def sync_main(conf: json.Data):
             validator = json.DefaultSchemaValidator(info.json_schema_repo)
             validator.validate(info.json_schema_id, unit_conf)
 
+
+def sync_main(conf: json.Data):
+    """Sync main entry point"""
+    aio.init_asyncio()
+
+    validate_conf(conf)
+
     log_conf = conf.get('log')
     if log_conf:
         logging.config.dictConfig(log_conf)
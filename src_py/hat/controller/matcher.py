@@ -0,0 +1,129 @@
+"""Trigger matcher
+
+Trigger queries are compiled into segment tries (trie of type queries where
+each type query leads to trie of name queries). Matching cost depends on
+trigger type/name depth and number of wildcard branches, not on number of
+registered queries.
+
+"""
+
+from collections.abc import Iterable
+import typing
+
+from hat.controller import common
+
+
+T = typing.TypeVar('T')
+
+
+class Matcher(typing.Generic[T]):
+    """Trigger matcher
+
+    Values are associated with pairs of type and name queries. Matching
+    returns values whose queries match trigger type and name, ordered by
+    their first registration.
+
+    """
+
+    def __init__(self,
+                 entries: Iterable[tuple[common.TriggerQuery,
+                                         common.TriggerQuery,
+                                         T]] = []):
+        self._root = _Node()
+        self._values = []
+        self._value_indexes = {}
+
+        for type_query, name_query, value in entries:
+            self.add(type_query, name_query, value)
+
+    @property
+    def values(self) -> list[T]:
+        """Registered values"""
+        return list(self._values)
+
+    def add(self,
+            type_query: common.TriggerQuery,
+            name_query: common.TriggerQuery,
+            value: T):
+        """Associate value with type and name queries"""
+        value_index = self._value_indexes.get(value)
+        if value_index is None:
+            value_index = len(self._values)
+            self._values.append(value)
+            self._value_indexes[value] = value_index
+
+        type_node = _get_node(self._root, type_query)
+        if type_node.value is None:
+            type_node.value = _Node()
+
+        name_node = _get_node(type_node.value, name_query)
+        if name_node.value is None:
+            name_node.value = set()
+
+        name_node.value.add(value_index)
+
+    def match(self, trigger: common.Trigger) -> list[T]:
+        """Get values matching trigger"""
+        value_indexes = set()
+
+        for name_root in _match_node(self._root, trigger.type, 0):
+            for indexes in _match_node(name_root, trigger.name, 0):
+                value_indexes.update(indexes)
+
+        return [self._values[i] for i in sorted(value_indexes)]
+
+
+class _Node:
+    __slots__ = ['children', 'value', 'rest_value']
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+        self.rest_value = None
+
+
+def _get_node(node, query):
+    if query and query[-1] == '*':
+        for segment in query[:-1]:
+            node = _get_child(node, segment)
+
+        if node.rest_value is None:
+            node.rest_value = _Node()
+
+        return node.rest_value
+
+    for segment in query:
+        node = _get_child(node, segment)
+
+    return node
+
+
+def _get_child(node, segment):
+    child = node.children.get(segment)
+    if child is None:
+        child = _Node()
+        node.children[segment] = child
+
+    return child
+
+
+def _match_node(node, segments, index):
+    if node.rest_value is not None and node.rest_value.value is not None:
+        yield node.rest_value.value
+
+    if index == len(segments):
+        if node.value is not None:
+            yield node.value
+
+        return
+
+    segment = segments[index]
+
+    child = node.children.get(segment)
+    if child is not None:
+        yield from _match_node(child, segments, index + 1)
+
+    if segment != '?':
+        child = node.children.get('?')
+        if child is not None:
+            yield from _match_node(child, segments, index + 1)
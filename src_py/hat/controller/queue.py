@@ -0,0 +1,376 @@
+"""Trigger queue"""
+
+from collections.abc import Iterable
+import asyncio
+import collections
+import contextlib
+import enum
+import time
+import typing
+
+from hat import aio
+
+from hat.controller import common
+
+
+class OverflowPolicy(enum.Enum):
+    """Trigger queue overflow policy
+
+    Policies:
+
+        * BLOCK - triggers are never dropped; `TriggerQueue.put` waits for
+          available space in queue and `TriggerQueue.put_nowait` raises
+          `aio.QueueFullError`
+        * DROP_OLDEST - oldest queued trigger is dropped
+        * DROP_NEWEST - newly enqueued trigger is dropped
+        * KEEP_LATEST - queued trigger with the same type and name is
+          replaced with newly enqueued trigger (which is queued according to
+          its own priority); if there is no such trigger and queue is full,
+          oldest queued trigger is dropped
+
+    """
+    BLOCK = 'BLOCK'
+    DROP_OLDEST = 'DROP_OLDEST'
+    DROP_NEWEST = 'DROP_NEWEST'
+    KEEP_LATEST = 'KEEP_LATEST'
+
+
+class TriggerQueueEntry(typing.NamedTuple):
+    trigger: common.Trigger
+    enqueue_time: float
+    """monotonic time of first enqueue"""
+
+
+class LatencyStats(typing.NamedTuple):
+    """Queue latency statistics of single trigger priority"""
+    count: int
+    """number of dequeued triggers"""
+    total: float
+    """sum of dequeued triggers queue latencies (in seconds)"""
+    max: float
+    """maximum queue latency (in seconds)"""
+
+    @property
+    def average(self) -> float:
+        """average queue latency (in seconds)"""
+        return self.total / self.count if self.count else 0
+
+
+class TriggerQueue:
+    """Trigger queue
+
+    Triggers with higher priority are dequeued first. Triggers with the same
+    priority are dequeued in order of their enqueueing. To prevent starvation
+    of lower priority triggers, after `starvation_limit` consecutive dequeues
+    which bypassed older lower priority triggers, the oldest queued trigger
+    is dequeued.
+
+    Enqueuing triggers with `put_nowait` never blocks - if queue is full,
+    overflow policy is applied. Dropped triggers are selected from the lowest
+    priority, including the newly enqueued trigger. With
+    `OverflowPolicy.BLOCK`, `put_nowait` raises `aio.QueueFullError` instead.
+
+    If `maxsize` is less than or equal to zero, the queue size is infinite.
+
+    """
+
+    def __init__(self,
+                 maxsize: int = 0,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 starvation_limit: int = 16):
+        self._maxsize = maxsize
+        self._overflow_policy = overflow_policy
+        self._starvation_limit = starvation_limit
+        self._starvation_count = 0
+        self._entries = {}
+        self._priorities = []
+        self._size = 0
+        self._next_seq = 0
+        self._latest_entries = {}
+        self._latencies = {}
+        self._getters = collections.deque()
+        self._putters = collections.deque()
+        self._dropped_count = 0
+        self._closed = False
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def maxsize(self) -> int:
+        """Maximum number of triggers in the queue"""
+        return self._maxsize
+
+    @property
+    def overflow_policy(self) -> OverflowPolicy:
+        """Overflow policy"""
+        return self._overflow_policy
+
+    @property
+    def dropped_count(self) -> int:
+        """Number of dropped triggers"""
+        return self._dropped_count
+
+    @property
+    def latencies(self) -> dict[int, LatencyStats]:
+        """Queue latency statistics for each trigger priority"""
+        return {priority: LatencyStats(*latency)
+                for priority, latency in self._latencies.items()}
+
+    @property
+    def is_closed(self) -> bool:
+        """Is queue closed"""
+        return self._closed
+
+    def empty(self) -> bool:
+        """``True`` if queue is empty, ``False`` otherwise"""
+        return not self._size
+
+    def full(self) -> bool:
+        """``True`` if queue is full, ``False`` otherwise"""
+        if self._maxsize > 0:
+            return self._size >= self._maxsize
+
+        return False
+
+    def close(self):
+        """Close the queue"""
+        if self._closed:
+            return
+
+        self._closed = True
+        self._wakeup_all(self._getters)
+        self._wakeup_all(self._putters)
+
+    def put_nowait(self, trigger: common.Trigger):
+        """Put trigger into the queue without blocking
+
+        Raises:
+            aio.QueueClosedError
+            aio.QueueFullError
+
+        """
+        if self._closed:
+            raise aio.QueueClosedError()
+
+        key = None
+        enqueue_time = None
+
+        if self._overflow_policy == OverflowPolicy.KEEP_LATEST:
+            key = trigger.type, trigger.name
+            entry = self._latest_entries.get(key)
+            if entry is not None:
+                self._dropped_count += 1
+
+                if entry.trigger.priority == trigger.priority:
+                    entry.trigger = trigger
+                    return
+
+                # trigger with different priority is moved to entries of
+                # its priority (keeping time of first enqueue)
+                self._entries[entry.trigger.priority].remove(entry)
+                self._remove_entry(entry)
+                enqueue_time = entry.enqueue_time
+
+        if self.full():
+            if self._overflow_policy == OverflowPolicy.BLOCK:
+                raise aio.QueueFullError()
+
+            entries = self._get_lowest_priority_entries()
+
+            if trigger.priority < entries[0].trigger.priority:
+                self._dropped_count += 1
+                return
+
+            if self._overflow_policy == OverflowPolicy.DROP_NEWEST:
+                if trigger.priority == entries[0].trigger.priority:
+                    self._dropped_count += 1
+                    return
+
+                self._remove_entry(entries.pop())
+
+            else:
+                self._remove_entry(entries.popleft())
+
+            self._dropped_count += 1
+
+        entries = self._entries.get(trigger.priority)
+        if entries is None:
+            entries = collections.deque()
+            self._entries[trigger.priority] = entries
+            self._priorities.append(trigger.priority)
+            self._priorities.sort(reverse=True)
+
+        if enqueue_time is None:
+            enqueue_time = time.monotonic()
+
+        entry = _Entry(trigger, enqueue_time, key, self._next_seq)
+        entries.append(entry)
+        self._next_seq += 1
+        self._size += 1
+
+        if key is not None:
+            self._latest_entries[key] = entry
+
+        self._wakeup_next(self._getters)
+
+    async def put(self, trigger: common.Trigger):
+        """Put trigger into the queue
+
+        If queue is full, wait until available space is available (regardless
+        of overflow policy).
+
+        Raises:
+            aio.QueueClosedError
+
+        """
+        await self._wait(self._putters, self.full)
+        self.put_nowait(trigger)
+
+    def get_nowait(self) -> TriggerQueueEntry:
+        """Return an entry if one is immediately available, else raise
+        `aio.QueueEmptyError`
+
+        Raises:
+            aio.QueueEmptyError
+
+        """
+        if not self._size:
+            raise aio.QueueEmptyError()
+
+        entry = self._get_next_entries().popleft()
+        self._remove_entry(entry)
+
+        latency = time.monotonic() - entry.enqueue_time
+        stats = self._latencies.get(entry.trigger.priority)
+        if stats is None:
+            stats = [0, 0, 0]
+            self._latencies[entry.trigger.priority] = stats
+
+        stats[0] += 1
+        stats[1] += latency
+        stats[2] = max(stats[2], latency)
+
+        self._wakeup_next(self._putters)
+
+        return TriggerQueueEntry(trigger=entry.trigger,
+                                 enqueue_time=entry.enqueue_time)
+
+    async def get(self) -> TriggerQueueEntry:
+        """Remove and return an entry from the queue
+
+        If queue is empty, wait until an entry is available.
+
+        Raises:
+            aio.QueueClosedError
+
+        """
+        await self._wait(self._getters, self.empty)
+        return self.get_nowait()
+
+    async def _wait(self, waiters, condition):
+        loop = asyncio.get_running_loop()
+
+        while condition():
+            if self._closed:
+                raise aio.QueueClosedError()
+
+            waiter = loop.create_future()
+            waiters.append(waiter)
+
+            try:
+                await waiter
+
+            except BaseException:
+                waiter.cancel()
+
+                with contextlib.suppress(ValueError):
+                    waiters.remove(waiter)
+
+                if not waiter.cancelled():
+                    if not condition() or self._closed:
+                        self._wakeup_next(waiters)
+
+                raise
+
+    def _get_next_entries(self):
+        highest = None
+        oldest = None
+
+        for priority in self._priorities:
+            entries = self._entries[priority]
+            if not entries:
+                continue
+
+            if highest is None:
+                highest = entries
+
+            if oldest is None or entries[0].seq < oldest[0].seq:
+                oldest = entries
+
+        if oldest is highest:
+            self._starvation_count = 0
+            return highest
+
+        if self._starvation_count >= self._starvation_limit:
+            self._starvation_count = 0
+            return oldest
+
+        self._starvation_count += 1
+        return highest
+
+    def _get_lowest_priority_entries(self):
+        for priority in reversed(self._priorities):
+            entries = self._entries[priority]
+            if entries:
+                return entries
+
+    def _remove_entry(self, entry):
+        self._size -= 1
+
+        if (entry.key is not None and
+                self._latest_entries.get(entry.key) is entry):
+            del self._latest_entries[entry.key]
+
+    def _wakeup_next(self, waiters):
+        while waiters:
+            waiter = waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    def _wakeup_all(self, waiters):
+        while waiters:
+            waiter = waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+def merge_latencies(latencies: Iterable[dict[int, LatencyStats]]
+                    ) -> dict[int, LatencyStats]:
+    """Merge latency statistics of multiple queues"""
+    result = {}
+
+    for i in latencies:
+        for priority, stats in i.items():
+            merged = result.get(priority)
+            if merged is not None:
+                stats = LatencyStats(count=merged.count + stats.count,
+                                     total=merged.total + stats.total,
+                                     max=max(merged.max, stats.max))
+
+            result[priority] = stats
+
+    return result
+
+
+class _Entry:
+    __slots__ = ['trigger', 'enqueue_time', 'key', 'seq']
+
+    def __init__(self, trigger, enqueue_time, key, seq):
+        self.trigger = trigger
+        self.enqueue_time = enqueue_time
+        self.key = key
+        self.seq = seq
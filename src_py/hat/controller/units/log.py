@@ -49,7 +49,9 @@ info = common.UnitInfo(name='log',
                        functions={'log', 'debug', 'info', 'warning', 'error'},
                        create=LogUnit,
                        json_schema_id='hat-controller://units/log.yaml',
-                       json_schema_repo=common.json_schema_repo)
+                       json_schema_repo=common.json_schema_repo,
+                       thread_safe_functions={'log', 'debug', 'info',
+                                              'warning', 'error'})
 
 
 def _get_log_level(name):
@@ -40,6 +40,25 @@ class OsUnit(common.Unit):
 
             return await self._executor.spawn(_ext_append_file, path, text)
 
+        if function == 'readBinaryFile':
+            path = Path(args[0])
+
+            return await self._executor.spawn(_ext_read_binary_file, path)
+
+        if function == 'writeBinaryFile':
+            path = Path(args[0])
+            data = _get_binary_data(args[1])
+
+            return await self._executor.spawn(_ext_write_binary_file, path,
+                                              data)
+
+        if function == 'appendBinaryFile':
+            path = Path(args[0])
+            data = _get_binary_data(args[1])
+
+            return await self._executor.spawn(_ext_append_binary_file, path,
+                                              data)
+
         if function == 'deleteFile':
             path = Path(args[0])
 
@@ -61,12 +80,26 @@ class OsUnit(common.Unit):
 
 info = common.UnitInfo(name='os',
                        functions={'readFile', 'writeFile', 'appendFile',
-                                  'deleteFile', 'execute'},
+                                  'readBinaryFile', 'writeBinaryFile',
+                                  'appendBinaryFile', 'deleteFile',
+                                  'execute'},
                        create=OsUnit,
                        json_schema_id='hat-controller://units/os.yaml',
                        json_schema_repo=common.json_schema_repo)
 
 
+def _get_binary_data(data):
+    # lua strings which are valid utf-8 are converted to str - encoding
+    # them as utf-8 results in original lua string bytes
+    if isinstance(data, str):
+        return data.encode('utf-8')
+
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise Exception('invalid data type')
+
+    return data
+
+
 def _ext_read_file(path):
     return path.read_text(encoding='utf-8', errors='ignore')
 
@@ -80,6 +113,19 @@ def _ext_append_file(path, text):
         f.write(text)
 
 
+def _ext_read_binary_file(path):
+    return path.read_bytes()
+
+
+def _ext_write_binary_file(path, data):
+    path.write_bytes(data)
+
+
+def _ext_append_binary_file(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
 def _ext_delete_file(path):
     path.unlink(missing_ok=True)
 
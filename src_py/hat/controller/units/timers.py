@@ -1,6 +1,7 @@
 import asyncio
 import datetime
 import logging
+import threading
 import time
 import zoneinfo
 
@@ -17,6 +18,8 @@ class TimersUnit(common.Unit):
 
     def __init__(self, conf, raise_trigger_cb):
         self._raise_trigger_cb = raise_trigger_cb
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
         self._async_group = aio.Group()
         self._tzinfo = zoneinfo.ZoneInfo(conf['timezone'])
         self._timer_confs = {}
@@ -39,17 +42,45 @@ class TimersUnit(common.Unit):
         return self._async_group
 
     def call(self, function, args, trigger):
+        if function == 'start':
+            fn = self._call_start
+
+        elif function == 'stop':
+            fn = self._call_stop
+
+        else:
+            raise Exception('unsupported function')
+
+        if len(args) != 1:
+            raise Exception('invalid arguments')
+
         name = args[0]
-        if name not in self._timer_confs:
+        if not isinstance(name, str) or name not in self._timer_confs:
             raise Exception('invalid timer name')
 
-        if function == 'start':
-            return self._call_start(name)
+        if not self.is_open:
+            raise Exception('unit closed')
+
+        return self._call_threadsafe(fn, name)
 
-        if function == 'stop':
-            return self._call_stop(name)
+    def _call_threadsafe(self, fn, name):
+        if threading.get_ident() == self._loop_thread_id:
+            fn(name)
 
-        raise Exception('unsupported function')
+        else:
+            # arguments are validated by caller so scheduled call can not
+            # fail unless unit is closed in the meantime
+            self._loop.call_soon_threadsafe(self._call_if_open, fn, name)
+
+    def _call_if_open(self, fn, name):
+        if not self.is_open:
+            return
+
+        try:
+            fn(name)
+
+        except Exception as e:
+            mlog.error('timer %s call error: %s', name, e, exc_info=e)
 
     async def _absolute_timer_loop(self, name):
         try:
@@ -76,9 +107,11 @@ class TimersUnit(common.Unit):
                     await asyncio.sleep(duration)
                     continue
 
-                trigger = common.Trigger(type=('timers', 'timer'),
-                                         name=tuple(name.split('/')),
-                                         data=t_next_utc.timestamp() * 1000)
+                trigger = common.Trigger(
+                    type=('timers', 'timer'),
+                    name=tuple(name.split('/')),
+                    data=t_next_utc.timestamp() * 1000,
+                    priority=timer_conf.get('priority', 0))
                 await self._raise_trigger(trigger)
 
                 if not repeat:
@@ -102,9 +135,11 @@ class TimersUnit(common.Unit):
             while True:
                 await asyncio.sleep(duration)
 
-                trigger = common.Trigger(type=('timers', 'timer'),
-                                         name=tuple(name.split('/')),
-                                         data=time.time() * 1000)
+                trigger = common.Trigger(
+                    type=('timers', 'timer'),
+                    name=tuple(name.split('/')),
+                    data=time.time() * 1000,
+                    priority=timer_conf.get('priority', 0))
                 await self._raise_trigger(trigger)
 
                 if not repeat:
@@ -146,4 +181,5 @@ info = common.UnitInfo(name='timers',
                        functions={'start', 'stop'},
                        create=TimersUnit,
                        json_schema_id='hat-controller://units/timers.yaml',
-                       json_schema_repo=common.json_schema_repo)
+                       json_schema_repo=common.json_schema_repo,
+                       thread_safe_functions={'start', 'stop'})
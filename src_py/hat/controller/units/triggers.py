@@ -15,7 +15,7 @@ class TriggersUnit(common.Unit):
     def async_group(self):
         return self._async_group
 
-    async def call(self, function, args, trigger):
+    def call(self, function, args, trigger):
         if function == 'getCurrent':
             if not trigger:
                 return
@@ -42,11 +42,9 @@ class TriggersUnit(common.Unit):
             if delay > 0:
                 self.async_group.spawn(self._raise_trigger_with_delay,
                                        t, delay)
+                return
 
-            else:
-                await self._raise_trigger(t)
-
-            return
+            return self._raise_trigger(t)
 
         raise Exception('unsupported function')
 
@@ -65,4 +63,5 @@ info = common.UnitInfo(name='triggers',
                        functions={'getCurrent', 'raise'},
                        create=TriggersUnit,
                        json_schema_id=None,
-                       json_schema_repo=None)
+                       json_schema_repo=None,
+                       thread_safe_functions={'getCurrent'})
@@ -0,0 +1,64 @@
+import time
+
+import hat.controller.cache
+import hat.controller.interpreters
+
+
+def test_code_cache(tmp_path):
+    path = tmp_path / 'cache'
+    cache = hat.controller.cache.CodeCache(path)
+    assert cache.path == path
+
+    assert cache.get('abc') is None
+
+    cache.set('abc', b'123')
+    assert cache.get('abc') == b'123'
+
+    cache.set('abc', b'456')
+    assert cache.get('abc') == b'456'
+
+    cache = hat.controller.cache.CodeCache(path)
+    assert cache.get('abc') == b'456'
+
+    assert [i.name for i in path.iterdir()] == ['abc']
+
+
+def test_code_cache_error(tmp_path):
+    path = tmp_path / 'cache'
+    path.write_bytes(b'')
+
+    cache = hat.controller.cache.CodeCache(path)
+    cache.set('abc', b'123')
+    assert cache.get('abc') is None
+
+
+def test_code_cache_max_count(tmp_path):
+    cache = hat.controller.cache.CodeCache(tmp_path, max_count=2)
+    assert cache.max_count == 2
+
+    for key in ['a', 'b', 'c']:
+        cache.set(key, key.encode())
+        time.sleep(0.01)
+
+    assert {i.name for i in tmp_path.iterdir()} == {'b', 'c'}
+
+    assert cache.get('b') == b'b'
+    time.sleep(0.01)
+
+    cache.set('d', b'd')
+    assert {i.name for i in tmp_path.iterdir()} == {'b', 'd'}
+
+
+def test_get_cache_key():
+    duktape = hat.controller.interpreters.Duktape()
+    quickjs = hat.controller.interpreters.QuickJS()
+
+    keys = {hat.controller.cache.get_cache_key(duktape, 'abc'),
+            hat.controller.cache.get_cache_key(duktape, 'abd'),
+            hat.controller.cache.get_cache_key(duktape, 'ab', 'c'),
+            hat.controller.cache.get_cache_key(quickjs, 'abc')}
+    assert len(keys) == 4
+
+    key = hat.controller.cache.get_cache_key(
+        hat.controller.interpreters.Duktape(), 'abc')
+    assert key in keys
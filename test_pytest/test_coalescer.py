@@ -0,0 +1,123 @@
+import asyncio
+
+from hat import aio
+
+from hat.controller import common
+import hat.controller.coalescer
+
+
+def create_trigger(name, data=None):
+    return common.Trigger(type=('a', ),
+                          name=(name, ),
+                          data=data)
+
+
+def create_rule(debounce=None, throttle=None):
+    return hat.controller.coalescer.CoalescingRule(type_query=('a', ),
+                                                   name_query=('*', ),
+                                                   debounce=debounce,
+                                                   throttle=throttle)
+
+
+async def test_no_rules():
+    trigger_queue = aio.Queue()
+    coalescer = hat.controller.coalescer.Coalescer([],
+                                                   trigger_queue.put_nowait)
+
+    for i in range(10):
+        coalescer.process(create_trigger('x', i))
+
+    for i in range(10):
+        assert trigger_queue.get_nowait() == create_trigger('x', i)
+
+    assert trigger_queue.empty()
+
+    coalescer.close()
+
+
+async def test_collapse():
+    trigger_queue = aio.Queue()
+    coalescer = hat.controller.coalescer.Coalescer([create_rule()],
+                                                   trigger_queue.put_nowait)
+
+    for i in range(10):
+        coalescer.process(create_trigger('x', i))
+        coalescer.process(create_trigger('y', i))
+
+    coalescer.process(common.Trigger(type=('b', ), name=('x', ), data=None))
+    assert trigger_queue.qsize() == 1
+    assert coalescer.pending_count == 2
+    assert coalescer.coalesced_count == 18
+
+    await asyncio.sleep(0)
+
+    assert trigger_queue.get_nowait().type == ('b', )
+    assert trigger_queue.get_nowait() == create_trigger('x', 9)
+    assert trigger_queue.get_nowait() == create_trigger('y', 9)
+    assert trigger_queue.empty()
+    assert coalescer.pending_count == 0
+
+    coalescer.close()
+
+
+async def test_debounce():
+    trigger_queue = aio.Queue()
+    coalescer = hat.controller.coalescer.Coalescer(
+        [create_rule(debounce=0.05)], trigger_queue.put_nowait)
+
+    for i in range(5):
+        coalescer.process(create_trigger('x', i))
+        await asyncio.sleep(0.02)
+
+    assert trigger_queue.empty()
+
+    await asyncio.sleep(0.1)
+    assert trigger_queue.get_nowait() == create_trigger('x', 4)
+    assert trigger_queue.empty()
+
+    coalescer.close()
+
+
+async def test_throttle():
+    trigger_queue = aio.Queue()
+    coalescer = hat.controller.coalescer.Coalescer(
+        [create_rule(throttle=0.05)], trigger_queue.put_nowait)
+
+    coalescer.process(create_trigger('x', 0))
+    await asyncio.sleep(0)
+    assert trigger_queue.get_nowait() == create_trigger('x', 0)
+
+    for i in range(1, 5):
+        coalescer.process(create_trigger('x', i))
+        await asyncio.sleep(0.005)
+
+    assert trigger_queue.empty()
+
+    await asyncio.sleep(0.1)
+    assert trigger_queue.get_nowait() == create_trigger('x', 4)
+    assert trigger_queue.empty()
+
+    await asyncio.sleep(0.1)
+    assert coalescer.pending_count == 0
+
+    coalescer.process(create_trigger('x', 5))
+    await asyncio.sleep(0)
+    assert trigger_queue.get_nowait() == create_trigger('x', 5)
+
+    coalescer.close()
+
+
+async def test_close():
+    trigger_queue = aio.Queue()
+    coalescer = hat.controller.coalescer.Coalescer(
+        [create_rule(debounce=0.01)], trigger_queue.put_nowait)
+
+    coalescer.process(create_trigger('x'))
+    coalescer.close()
+
+    await asyncio.sleep(0.05)
+    assert trigger_queue.empty()
+
+    coalescer.process(create_trigger('x'))
+    await asyncio.sleep(0.05)
+    assert trigger_queue.empty()
@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 import importlib
 import itertools
@@ -72,10 +73,12 @@ def create_unit_module():
 def mock_environment(monkeypatch):
 
     env_queue = None
+    delivery_event = None
 
     class MockEnvironment(aio.Resource):
 
-        def __init__(self, environment_conf, proxies, trigger_queue_size=4096):
+        def __init__(self, environment_conf, proxies, trigger_queue_size=4096,
+                     code_cache=None, quickjs_runtime=None):
             self._async_group = aio.Group()
             self._conf = environment_conf
             self._trigger_queue = aio.Queue()
@@ -88,9 +91,13 @@ def mock_environment(monkeypatch):
         def async_group(self):
             return self._async_group
 
-        async def enqueue_trigger(self, trigger):
+        def enqueue_trigger(self, trigger):
             self._trigger_queue.put_nowait(trigger)
 
+        async def wait_delivery(self):
+            if delivery_event is not None:
+                await delivery_event.wait()
+
         @property
         def conf(self):
             return self._conf
@@ -104,9 +111,11 @@ def mock_environment(monkeypatch):
             return self._unit_proxies
 
     @contextlib.contextmanager
-    def mock_environment(environment_queue=None):
+    def mock_environment(environment_queue=None, environment_delivery=None):
         nonlocal env_queue
+        nonlocal delivery_event
         env_queue = environment_queue
+        delivery_event = environment_delivery
 
         with monkeypatch.context() as ctx:
             ctx.setattr(
@@ -240,7 +249,11 @@ async def test_trigger(create_unit_module, mock_environment):
     unit_conf = {'module': unit_module}
     environments_conf = [{'name': f'env{i}',
                           'init_code': "",
-                          'actions': []} for i in range(3)]
+                          'actions': [{'name': 'a1',
+                                       'triggers': [{'type': 'test/type',
+                                                     'name': 'test/name'}],
+                                       'code': ""}]}
+                         for i in range(3)]
 
     conf = {'units': [unit_conf],
             'environments': environments_conf}
@@ -251,8 +264,8 @@ async def test_trigger(create_unit_module, mock_environment):
 
         unit = await unit_queue.get()
 
-        trigger = common.Trigger(type='test/type',
-                                 name='test/name',
+        trigger = common.Trigger(type=('test', 'type'),
+                                 name=('test', 'name'),
                                  data={'test': 123})
         await aio.call(unit.raise_trigger_cb, trigger)
 
@@ -266,3 +279,212 @@ async def test_trigger(create_unit_module, mock_environment):
     await engine.async_close()
     await unit.wait_closed()
     await environment.wait_closed()
+
+
+async def test_trigger_delivery(create_unit_module, mock_environment):
+    unit_queue = aio.Queue()
+    unit_module = create_unit_module(unit_queue)
+    unit_conf = {'module': unit_module}
+    environments_conf = [{'name': 'env1',
+                          'init_code': "",
+                          'actions': [{'name': 'a1',
+                                       'triggers': [{'type': 'test',
+                                                     'name': '*'}],
+                                       'code': ""}]}]
+
+    conf = {'units': [unit_conf],
+            'environments': environments_conf}
+
+    environment_queue = aio.Queue()
+    delivery_event = asyncio.Event()
+    with mock_environment(environment_queue, delivery_event):
+        engine = await hat.controller.engine.create_engine(
+            conf, trigger_queue_size=2)
+
+        unit = await unit_queue.get()
+        environment = await environment_queue.get()
+
+        triggers = [common.Trigger(type=('test', ),
+                                   name=(str(i), ),
+                                   data=None)
+                    for i in range(4)]
+
+        for trigger in triggers[:3]:
+            await aio.call(unit.raise_trigger_cb, trigger)
+
+        # first trigger is routed and engine waits for its delivery while
+        # following triggers fill engine's queue
+        raise_trigger_future = asyncio.ensure_future(
+            aio.call(unit.raise_trigger_cb, triggers[3]))
+        await asyncio.sleep(0.01)
+
+        assert environment.trigger_queue.qsize() == 1
+        assert not raise_trigger_future.done()
+
+        delivery_event.set()
+        await raise_trigger_future
+
+        for trigger in triggers:
+            assert trigger == await environment.trigger_queue.get()
+
+    await engine.async_close()
+
+
+async def test_trigger_routing(create_unit_module, mock_environment):
+    unit_queue = aio.Queue()
+    unit_module = create_unit_module(unit_queue)
+    unit_conf = {'module': unit_module}
+    environments_conf = [
+        {'name': 'env1',
+         'init_code': "",
+         'actions': [{'name': 'a1',
+                      'triggers': [{'type': 'a/*',
+                                    'name': '*'}],
+                      'code': ""}]},
+        {'name': 'env2',
+         'init_code': "",
+         'actions': [{'name': 'a1',
+                      'triggers': [{'type': 'b',
+                                    'name': '?'}],
+                      'code': ""},
+                     {'name': 'a2',
+                      'triggers': [{'type': 'a/x',
+                                    'name': 'y'}],
+                      'code': ""}]},
+        {'name': 'env3',
+         'init_code': "",
+         'actions': []}]
+
+    conf = {'units': [unit_conf],
+            'environments': environments_conf}
+
+    environment_queue = aio.Queue()
+    with mock_environment(environment_queue):
+        engine = await hat.controller.engine.create_engine(conf)
+
+        unit = await unit_queue.get()
+        env1 = await environment_queue.get()
+        env2 = await environment_queue.get()
+        env3 = await environment_queue.get()
+
+        triggers = [common.Trigger(type=('a', 'x'), name=('y', ), data=1),
+                    common.Trigger(type=('b', ), name=('y', ), data=2),
+                    common.Trigger(type=('a', ), name=('z', ), data=3),
+                    common.Trigger(type=('c', ), name=('y', ), data=4)]
+
+        for trigger in triggers:
+            await aio.call(unit.raise_trigger_cb, trigger)
+
+        assert await env1.trigger_queue.get() == triggers[0]
+        assert await env1.trigger_queue.get() == triggers[2]
+        assert await env2.trigger_queue.get() == triggers[0]
+        assert await env2.trigger_queue.get() == triggers[1]
+
+        await asyncio.sleep(0.01)
+        assert env1.trigger_queue.empty()
+        assert env2.trigger_queue.empty()
+        assert env3.trigger_queue.empty()
+
+    await engine.async_close()
+
+
+async def test_trigger_coalescing(create_unit_module, mock_environment):
+    unit_queue = aio.Queue()
+    unit_module = create_unit_module(unit_queue)
+    unit_conf = {'module': unit_module}
+    environments_conf = [
+        {'name': 'env1',
+         'init_code': "",
+         'actions': [{'name': 'a1',
+                      'triggers': [{'type': '*',
+                                    'name': '*'}],
+                      'code': ""}]}]
+    coalescing_conf = [{'type': 'a',
+                        'name': '*'}]
+
+    conf = {'units': [unit_conf],
+            'environments': environments_conf,
+            'coalescing': coalescing_conf}
+
+    environment_queue = aio.Queue()
+    with mock_environment(environment_queue):
+        engine = await hat.controller.engine.create_engine(conf)
+
+        unit = await unit_queue.get()
+        env = await environment_queue.get()
+
+        for i in range(10):
+            await aio.call(unit.raise_trigger_cb,
+                           common.Trigger(type=('a', ),
+                                          name=('x', ),
+                                          data=i))
+            await aio.call(unit.raise_trigger_cb,
+                           common.Trigger(type=('b', ),
+                                          name=('x', ),
+                                          data=i))
+
+        for i in range(10):
+            trigger = await env.trigger_queue.get()
+            assert trigger == common.Trigger(type=('b', ),
+                                             name=('x', ),
+                                             data=i)
+
+        trigger = await env.trigger_queue.get()
+        assert trigger == common.Trigger(type=('a', ),
+                                         name=('x', ),
+                                         data=9)
+
+        await asyncio.sleep(0.01)
+        assert env.trigger_queue.empty()
+
+    await engine.async_close()
+
+
+async def test_trigger_priority(create_unit_module, mock_environment):
+    unit_queue = aio.Queue()
+    unit_module = create_unit_module(unit_queue)
+    unit_conf = {'module': unit_module}
+    environments_conf = [
+        {'name': 'env1',
+         'init_code': "",
+         'actions': [{'name': 'a1',
+                      'triggers': [{'type': '*',
+                                    'name': '*'}],
+                      'code': ""}]}]
+    priorities_conf = [{'type': 'a',
+                        'name': 'x',
+                        'priority': 2},
+                       {'type': 'a',
+                        'name': '*',
+                        'priority': 1}]
+
+    conf = {'units': [unit_conf],
+            'environments': environments_conf,
+            'priorities': priorities_conf}
+
+    environment_queue = aio.Queue()
+    with mock_environment(environment_queue):
+        engine = await hat.controller.engine.create_engine(conf)
+
+        unit = await unit_queue.get()
+        env = await environment_queue.get()
+
+        for trigger_type, trigger_name in [('b', 'x'),
+                                           ('a', 'y'),
+                                           ('a', 'x'),
+                                           ('b', 'y')]:
+            await aio.call(unit.raise_trigger_cb,
+                           common.Trigger(type=(trigger_type, ),
+                                          name=(trigger_name, ),
+                                          data=None))
+
+        triggers = [await env.trigger_queue.get() for _ in range(4)]
+        assert [(trigger.type[0], trigger.name[0], trigger.priority)
+                for trigger in triggers] == [('a', 'x', 2),
+                                             ('a', 'y', 1),
+                                             ('b', 'x', 0),
+                                             ('b', 'y', 0)]
+
+        assert engine.trigger_latencies.keys() == {0, 1, 2}
+
+    await engine.async_close()
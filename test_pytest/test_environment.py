@@ -1,5 +1,7 @@
 import asyncio
 import functools
+import threading
+
 import pytest
 
 from hat import aio
@@ -17,12 +19,30 @@ class MockEvaluator(hat.controller.evaluators.Evaluator):
                  action_codes,
                  infos,
                  call_cb,
+                 post_cb=None,
+                 validate_args=True,
+                 code_cache=None,
+                 lazy_actions=False,
+                 quickjs_runtime=None,
+                 memory_limit=None,
+                 gc_threshold=None,
+                 lua_gc_mode=None,
+                 timeout=None,
                  eval_code_cb=None,
                  eval_action_cb=None):
         self._interpreter_type = interpreter_type
         self._action_codes = action_codes
         self._infos = infos
         self._call_cb = call_cb
+        self._post_cb = post_cb
+        self._validate_args = validate_args
+        self._code_cache = code_cache
+        self._lazy_actions = lazy_actions
+        self._quickjs_runtime = quickjs_runtime
+        self._memory_limit = memory_limit
+        self._gc_threshold = gc_threshold
+        self._lua_gc_mode = lua_gc_mode
+        self._timeout = timeout
         self._eval_code_cb = eval_code_cb
         self._eval_action_cb = eval_action_cb
 
@@ -111,9 +131,10 @@ async def test_create_evaluator(monkeypatch, interpreter_type):
     loop = asyncio.get_running_loop()
     evaluator_args_queue = aio.Queue()
 
-    def ext_create_mock_evaluator(*args):
-        loop.call_soon_threadsafe(evaluator_args_queue.put_nowait, args)
-        return MockEvaluator(*args)
+    def ext_create_mock_evaluator(*args, **kwargs):
+        loop.call_soon_threadsafe(evaluator_args_queue.put_nowait,
+                                  (*args, kwargs['post_cb']))
+        return MockEvaluator(*args, **kwargs)
 
     with monkeypatch.context() as ctx:
         ctx.setattr(hat.controller.evaluators, 'create_evaluator',
@@ -126,13 +147,15 @@ async def test_create_evaluator(monkeypatch, interpreter_type):
         (interpreter_type_arg,
          action_codes,
          infos,
-         call_cb) = await evaluator_args_queue.get()
+         call_cb,
+         post_cb) = await evaluator_args_queue.get()
 
         assert interpreter_type_arg == interpreter_type
         assert action_codes == {'a1': a1_code,
                                 'a2': a2_code}
         assert list(infos) == [unit_info]
         assert callable(call_cb)
+        assert callable(post_cb)
 
         await env.async_close()
 
@@ -197,7 +220,7 @@ async def test_action(monkeypatch):
         await asyncio.sleep(0.01)
         assert action_queue.empty()
 
-        enqueue_trigger_res = await env.enqueue_trigger(common.Trigger(
+        enqueue_trigger_res = env.enqueue_trigger(common.Trigger(
             type=('test', ),
             name=('a1', ),
             data=None))
@@ -209,6 +232,363 @@ async def test_action(monkeypatch):
         await env.async_close()
 
 
+async def test_trigger_queue_full(monkeypatch):
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'QUICKJS',
+        'init_code': "",
+        'actions': [
+            {'name': 'a1',
+             'triggers': [{'type': 'test',
+                           'name': '*'}],
+             'code': ''}]}
+
+    loop = asyncio.get_running_loop()
+    action_queue = aio.Queue()
+    action_event = threading.Event()
+
+    def ext_on_eval_action(action):
+        action_event.wait()
+        loop.call_soon_threadsafe(action_queue.put_nowait, action)
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    functools.partial(
+                        MockEvaluator,
+                        eval_action_cb=ext_on_eval_action))
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[],
+            trigger_queue_size=2)
+
+        await asyncio.sleep(0.01)
+
+        for i in range(10):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(str(i), ),
+                                               data=None))
+
+        await asyncio.sleep(0.01)
+        assert env.queued_triggers_count == 9
+
+        action_event.set()
+
+        for _ in range(10):
+            action = await action_queue.get()
+            assert action == 'a1'
+
+        assert env.queued_triggers_count == 0
+        assert env.trigger_lag > 0
+
+        await env.async_close()
+
+
+async def test_trigger_queue_delivery(monkeypatch):
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'QUICKJS',
+        'init_code': "",
+        'trigger_queue_size': 2,
+        'trigger_queue_overflow': 'BLOCK',
+        'actions': [
+            {'name': 'a1',
+             'triggers': [{'type': 'test',
+                           'name': '*'}],
+             'code': ''}]}
+
+    loop = asyncio.get_running_loop()
+    action_queue = aio.Queue()
+    action_event = threading.Event()
+
+    def ext_on_eval_action(action):
+        action_event.wait()
+        loop.call_soon_threadsafe(action_queue.put_nowait, action)
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    functools.partial(
+                        MockEvaluator,
+                        eval_action_cb=ext_on_eval_action))
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[])
+
+        await asyncio.sleep(0.01)
+
+        for i in range(3):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(str(i), ),
+                                               data=None))
+
+        # first trigger is processed and remaining are queued
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(env.wait_delivery(), 0.1)
+
+        for i in range(3, 5):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(str(i), ),
+                                               data=None))
+
+        assert env.queued_triggers_count == 4
+
+        wait_delivery_future = asyncio.ensure_future(env.wait_delivery())
+        await asyncio.sleep(0.01)
+        assert not wait_delivery_future.done()
+
+        action_event.set()
+        await wait_delivery_future
+
+        for _ in range(5):
+            await action_queue.get()
+
+        assert env.dropped_triggers_count == 0
+
+        await env.async_close()
+
+
+@pytest.mark.parametrize('overflow, actions, dropped_count', [
+    ('BLOCK', ['0', '1', '2', '3', '4', '5'], 0),
+    ('DROP_OLDEST', ['0', '4', '5'], 3),
+    ('DROP_NEWEST', ['0', '1', '2'], 3),
+    ('KEEP_LATEST', ['0', '4', '5'], 3)])
+async def test_trigger_queue_overflow(monkeypatch, overflow, actions,
+                                      dropped_count):
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'QUICKJS',
+        'init_code': "",
+        'trigger_queue_size': 2,
+        'trigger_queue_overflow': overflow,
+        'actions': [
+            {'name': str(i),
+             'triggers': [{'type': 'test',
+                           'name': str(i)}],
+             'code': ''}
+            for i in range(6)]}
+
+    loop = asyncio.get_running_loop()
+    action_queue = aio.Queue()
+    action_event = threading.Event()
+
+    def ext_on_eval_action(action):
+        action_event.wait()
+        loop.call_soon_threadsafe(action_queue.put_nowait, action)
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    functools.partial(
+                        MockEvaluator,
+                        eval_action_cb=ext_on_eval_action))
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[])
+
+        await asyncio.sleep(0.01)
+
+        for i in range(6):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(str(i), ),
+                                               data=None))
+            await asyncio.sleep(0.01)
+
+        assert env.dropped_triggers_count == dropped_count
+
+        action_event.set()
+
+        for action in actions:
+            assert action == await action_queue.get()
+
+        await asyncio.sleep(0.01)
+        assert action_queue.empty()
+
+        await env.async_close()
+
+
+@pytest.mark.parametrize('batch_size, batch_lengths', [
+    (1, [1, 1, 1, 1, 1, 1]),
+    (2, [1, 2, 2, 1]),
+    (0, [1, 5])])
+async def test_trigger_batch(monkeypatch, batch_size, batch_lengths):
+    unit_call_queue = aio.Queue()
+
+    def on_unit_call(function, args, trigger):
+        unit_call_queue.put_nowait((args[0], trigger.name[0]))
+
+    create_unit = functools.partial(MockUnit, call_cb=on_unit_call)
+    unit = create_unit(None)
+    unit_proxy = hat.controller.environment.UnitProxy(
+        unit=unit,
+        info=common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=create_unit,
+            json_schema_id=None,
+            json_schema_repo=None))
+
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'QUICKJS',
+        'init_code': "",
+        'trigger_batch_size': batch_size,
+        'actions': [
+            {'name': action,
+             'triggers': [{'type': 'test',
+                           'name': '*'}],
+             'code': ''}
+            for action in ['a1', 'a2']]}
+
+    action_event = threading.Event()
+    batches = []
+
+    def ext_on_eval_action(call_cb, action):
+        action_event.wait()
+        call_cb('u1', 'f1', (action, ))
+
+    def mock_create_evaluator(*args, **kwargs):
+        _, _, _, call_cb = args
+        return MockEvaluator(
+            *args, **kwargs,
+            eval_action_cb=functools.partial(ext_on_eval_action, call_cb))
+
+    ext_eval_batch = hat.controller.environment.Environment._ext_eval_batch
+
+    def mock_ext_eval_batch(self, replica, evaluator, batch):
+        batches.append(batch)
+        ext_eval_batch(self, replica, evaluator, batch)
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    mock_create_evaluator)
+        ctx.setattr(hat.controller.environment.Environment, '_ext_eval_batch',
+                    mock_ext_eval_batch)
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[unit_proxy])
+
+        await asyncio.sleep(0.01)
+
+        for i in range(6):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(str(i), ),
+                                               data=None))
+            await asyncio.sleep(0.01)
+
+        action_event.set()
+
+        for i in range(6):
+            for action in ['a1', 'a2']:
+                assert (action, str(i)) == await unit_call_queue.get()
+
+        await asyncio.sleep(0.01)
+        assert unit_call_queue.empty()
+        assert [len(batch) for batch in batches] == batch_lengths
+
+        await env.async_close()
+
+
+async def test_replicas(monkeypatch):
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'QUICKJS',
+        'init_code': "init",
+        'replicas': 2,
+        'actions': [
+            {'name': 'a1',
+             'triggers': [{'type': 'test',
+                           'name': '*'}],
+             'code': ''}]}
+
+    names = {}
+    for i in range(100):
+        names.setdefault(hash((str(i), )) % 2, str(i))
+        if len(names) == 2:
+            break
+
+    blocked_name, name = names.values()
+
+    loop = asyncio.get_running_loop()
+    init_queue = aio.Queue()
+    trigger_queue = aio.Queue()
+    action_event = threading.Event()
+
+    def on_unit_call(function, args, trigger):
+        trigger_queue.put_nowait(trigger)
+
+    def ext_on_eval_code(code):
+        loop.call_soon_threadsafe(init_queue.put_nowait,
+                                  threading.current_thread())
+
+    def ext_on_eval_action(call_cb, action):
+        call_cb('u1', 'f1', ())
+        action_event.wait()
+
+    def mock_create_evaluator(*args, **kwargs):
+        _, _, _, call_cb = args
+        return MockEvaluator(
+            *args, **kwargs,
+            eval_code_cb=ext_on_eval_code,
+            eval_action_cb=functools.partial(ext_on_eval_action, call_cb))
+
+    create_unit = functools.partial(MockUnit, call_cb=on_unit_call)
+    unit_proxy = hat.controller.environment.UnitProxy(
+        unit=create_unit(None),
+        info=common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=create_unit,
+            json_schema_id=None,
+            json_schema_repo=None))
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    mock_create_evaluator)
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[unit_proxy])
+
+        assert env.replicas_count == 2
+
+        thread1 = await init_queue.get()
+        thread2 = await init_queue.get()
+        assert thread1 is not thread2
+
+        for i in range(3):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(blocked_name, ),
+                                               data=i))
+
+        trigger = await trigger_queue.get()
+        assert trigger.name == (blocked_name, )
+        assert trigger.data == 0
+
+        for i in range(3):
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(name, ),
+                                               data=i))
+
+        trigger = await trigger_queue.get()
+        assert trigger.name == (name, )
+        assert trigger.data == 0
+
+        await asyncio.sleep(0.01)
+        assert trigger_queue.empty()
+        assert env.queued_triggers_count == 4
+
+        action_event.set()
+
+        triggers = [await trigger_queue.get() for _ in range(4)]
+        for trigger_name in [blocked_name, name]:
+            assert [trigger.data for trigger in triggers
+                    if trigger.name == (trigger_name, )] == [1, 2]
+
+        await env.async_close()
+
+
 async def test_unit_call_cb_init(monkeypatch):
     unit_call_args_queue = aio.Queue()
     unit_call_result = {'unit': 'result',
@@ -244,10 +624,10 @@ async def test_unit_call_cb_init(monkeypatch):
         result = call_cb(unit_name, unit_fn, ('x', 'y', 123, None))
         loop.call_soon_threadsafe(call_result_queue.put_nowait, result)
 
-    def mock_create_evaluator(*args):
+    def mock_create_evaluator(*args, **kwargs):
         _, _, _, call_cb = args
         return MockEvaluator(
-            *args,
+            *args, **kwargs,
             eval_code_cb=functools.partial(ext_on_init_code, call_cb))
 
     with monkeypatch.context() as ctx:
@@ -308,10 +688,10 @@ async def test_unit_call_cb_action(monkeypatch):
         result = call_cb(unit_name, unit_fn, (['a'], 123.4, {'1': 1, '2': 2}))
         loop.call_soon_threadsafe(call_result_queue.put_nowait, result)
 
-    def mock_create_evaluator(*args):
+    def mock_create_evaluator(*args, **kwargs):
         _, _, _, call_cb = args
         return MockEvaluator(
-            *args,
+            *args, **kwargs,
             eval_action_cb=functools.partial(ext_on_eval_action, call_cb))
 
     with monkeypatch.context() as ctx:
@@ -325,7 +705,7 @@ async def test_unit_call_cb_action(monkeypatch):
         trigger = common.Trigger(type=('test', ),
                                  name=('a1', ),
                                  data={'test_trigger_data': 123})
-        await env.enqueue_trigger(trigger)
+        env.enqueue_trigger(trigger)
         await asyncio.sleep(0.01)
 
         function, args, unit_trigger = await unit_call_args_queue.get()
@@ -339,6 +719,136 @@ async def test_unit_call_cb_action(monkeypatch):
         await env.async_close()
 
 
+async def test_unit_call_thread_safe(monkeypatch):
+    loop = asyncio.get_running_loop()
+    loop_thread = threading.current_thread()
+    unit_call_queue = aio.Queue()
+
+    def on_unit_call(function, args, trigger):
+        loop.call_soon_threadsafe(unit_call_queue.put_nowait,
+                                  (function, threading.current_thread()))
+
+    create_unit = functools.partial(MockUnit, call_cb=on_unit_call)
+    unit_proxy = hat.controller.environment.UnitProxy(
+        unit=create_unit(None),
+        info=common.UnitInfo(
+            name='u1',
+            functions={'f1', 'f2'},
+            create=create_unit,
+            thread_safe_functions={'f2'}))
+
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'LUA',
+        'init_code': "",
+        'actions': [
+            {'name': 'a1',
+             'triggers': [{'type': 'test',
+                           'name': 'a1'}],
+             'code': ''}]}
+
+    def ext_on_eval_action(call_cb, action):
+        call_cb('u1', 'f1', ())
+        call_cb('u1', 'f2', ())
+
+    def mock_create_evaluator(*args, **kwargs):
+        _, _, _, call_cb = args
+        return MockEvaluator(
+            *args, **kwargs,
+            eval_action_cb=functools.partial(ext_on_eval_action, call_cb))
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    mock_create_evaluator)
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[unit_proxy])
+
+        env.enqueue_trigger(common.Trigger(type=('test', ),
+                                           name=('a1', ),
+                                           data=None))
+
+        function, thread = await unit_call_queue.get()
+        assert function == 'f1'
+        assert thread is loop_thread
+
+        function, thread = await unit_call_queue.get()
+        assert function == 'f2'
+        assert thread is not loop_thread
+
+        await env.async_close()
+
+
+async def test_unit_post(monkeypatch, caplog):
+    loop = asyncio.get_running_loop()
+    unit_call_queue = aio.Queue()
+    action_queue = aio.Queue()
+
+    async def on_unit_call(function, args, trigger):
+        await asyncio.sleep(args[0])
+        unit_call_queue.put_nowait((function, trigger))
+
+        if function == 'error':
+            raise Exception('unit error')
+
+    create_unit = functools.partial(MockUnit, call_cb=on_unit_call)
+    unit_proxy = hat.controller.environment.UnitProxy(
+        unit=create_unit(None),
+        info=common.UnitInfo(
+            name='u1',
+            functions={'f1', 'f2', 'error'},
+            create=create_unit))
+
+    env_conf = {
+        'name': 'env1',
+        'interpreter': 'CPYTHON',
+        'init_code': "",
+        'actions': [
+            {'name': 'a1',
+             'triggers': [{'type': 'test',
+                           'name': 'a1'}],
+             'code': ''}]}
+
+    def ext_on_eval_action(post_cb, action):
+        post_cb('u1', 'f1', (0.02, ))
+        post_cb('u1', 'error', (0, ))
+        post_cb('u1', 'f2', (0, ))
+        loop.call_soon_threadsafe(action_queue.put_nowait, action)
+
+    def mock_create_evaluator(*args, post_cb, **kwargs):
+        return MockEvaluator(
+            *args,
+            post_cb=post_cb,
+            **kwargs,
+            eval_action_cb=functools.partial(ext_on_eval_action, post_cb))
+
+    with monkeypatch.context() as ctx:
+        ctx.setattr(hat.controller.evaluators, 'create_evaluator',
+                    mock_create_evaluator)
+
+        env = hat.controller.environment.Environment(
+            environment_conf=env_conf,
+            proxies=[unit_proxy])
+
+        trigger = common.Trigger(type=('test', ),
+                                 name=('a1', ),
+                                 data=None)
+        env.enqueue_trigger(trigger)
+
+        action = await action_queue.get()
+        assert action == 'a1'
+        assert unit_call_queue.empty()
+
+        for function in ['f1', 'error', 'f2']:
+            assert (function, trigger) == await unit_call_queue.get()
+
+        assert 'unit error' in caplog.text
+        assert env.is_open
+
+        await env.async_close()
+
+
 async def test_action_exception(monkeypatch, caplog):
     env_conf = {
         'name': 'env1',
@@ -376,7 +886,7 @@ async def test_action_exception(monkeypatch, caplog):
             type=('test', ),
             name=('action_w_exc', ),
             data=None)
-        await env.enqueue_trigger(trigger_action_w_exc)
+        env.enqueue_trigger(trigger_action_w_exc)
         action = await eval_action_queue.get()
         assert action == 'action_w_exc'
 
@@ -385,7 +895,7 @@ async def test_action_exception(monkeypatch, caplog):
         assert env.is_open
 
         # action is run again after exception
-        await env.enqueue_trigger(trigger_action_w_exc)
+        env.enqueue_trigger(trigger_action_w_exc)
         action = await eval_action_queue.get()
         assert action == 'action_w_exc'
 
@@ -397,7 +907,7 @@ async def test_action_exception(monkeypatch, caplog):
         trigger_action_wo_exc = common.Trigger(type=('test', ),
                                                name=('action_wo_exc', ),
                                                data=None)
-        await env.enqueue_trigger(trigger_action_wo_exc)
+        env.enqueue_trigger(trigger_action_wo_exc)
         action = await eval_action_queue.get()
         assert action == 'action_wo_exc'
 
@@ -517,7 +1027,7 @@ async def test_trigger_subscription(trigger_type, trigger_name,
         trigger = common.Trigger(type=tuple(trigger_type.split('/')),
                                  name=tuple(trigger_name.split('/')),
                                  data={'test_data': 123})
-        await env.enqueue_trigger(trigger)
+        env.enqueue_trigger(trigger)
 
         triggered_actions_res = set()
         for _ in range(len(triggered_actions)):
@@ -529,3 +1039,61 @@ async def test_trigger_subscription(trigger_type, trigger_name,
         assert action_queue.empty()
 
         await env.async_close()
+
+
+@pytest.mark.parametrize('interpreter_type, a1_code, a2_code', [
+    ('DUKTAPE', 'while (true) {}', 'units.u1.f1(123);'),
+    ('QUICKJS', 'while (true) {}', 'units.u1.f1(123);'),
+    ('LUA', 'while true do end', 'units.u1.f1(123)'),
+    ('CPYTHON', 'while True: pass', 'units.u1.f1(123)')])
+async def test_execution_timeout(interpreter_type, a1_code, a2_code):
+    unit_call_queue = aio.Queue()
+
+    def on_unit_call(function, args, trigger):
+        unit_call_queue.put_nowait(args)
+
+    create_unit = functools.partial(MockUnit, call_cb=on_unit_call)
+    unit = create_unit(None)
+    unit_proxy = hat.controller.environment.UnitProxy(
+        unit=unit,
+        info=common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=create_unit,
+            json_schema_id=None,
+            json_schema_repo=None))
+
+    env_conf = {
+        'name': 'env1',
+        'interpreter': interpreter_type,
+        'init_code': "",
+        'execution_timeout': 0.05,
+        'actions': [
+            {'name': 'a1',
+             'triggers': [{'type': 'test',
+                           'name': 'a1'}],
+             'code': a1_code},
+            {'name': 'a2',
+             'triggers': [{'type': 'test',
+                           'name': 'a2'}],
+             'code': a2_code}]}
+
+    env = hat.controller.environment.Environment(
+        environment_conf=env_conf,
+        proxies=[unit_proxy])
+
+    assert env.timed_out_actions_count == 0
+
+    for i in range(2):
+        for action in ['a1', 'a2']:
+            env.enqueue_trigger(common.Trigger(type=('test', ),
+                                               name=(action, ),
+                                               data=None))
+
+        args = await aio.wait_for(unit_call_queue.get(), 1)
+        assert list(args) == [123]
+        assert env.timed_out_actions_count == i + 1
+
+    assert env.is_open
+
+    await env.async_close()
@@ -1,9 +1,14 @@
+import array
 import collections
+import sys
+
 import pytest
 
 from hat import aio
 
 from hat.controller import common
+from hat.controller.evaluators import bridge
+import hat.controller.cache
 from hat.controller import evaluators
 from hat.controller import interpreters
 
@@ -21,11 +26,18 @@ class MockUnit(common.Unit):
         pass
 
 
-@pytest.mark.parametrize('interpreter_type, evaluator_type', [
+evaluator_types = [
     (interpreters.InterpreterType.DUKTAPE, evaluators.JsEvaluator),
     (interpreters.InterpreterType.QUICKJS, evaluators.JsEvaluator),
     (interpreters.InterpreterType.CPYTHON, evaluators.PyEvaluator),
-    (interpreters.InterpreterType.LUA, evaluators.LuaEvaluator)])
+    pytest.param(interpreters.InterpreterType.CPYTHON_SUBINTERPRETER,
+                 evaluators.PySubinterpreterEvaluator,
+                 marks=pytest.mark.skipif(sys.version_info < (3, 12),
+                                          reason='requires Python 3.12')),
+    (interpreters.InterpreterType.LUA, evaluators.LuaEvaluator)]
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
 def test_evaluators(interpreter_type, evaluator_type):
     unit_name = 'u1'
     fn_name = 'f1'
@@ -73,3 +85,498 @@ def test_evaluators(interpreter_type, evaluator_type):
     assert called_unit_name == unit_name
     assert called_fn == fn_name
     assert list(called_args) == ['a2']
+
+    evaluator.close()
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_post(interpreter_type, evaluator_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1', 'x.f2'},
+            create=MockUnit)]
+
+    unit_call_args_queue = collections.deque()
+    unit_post_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append((unit_name, fn_name, args))
+        return 123
+
+    def on_unit_post(unit_name, fn_name, args):
+        unit_post_args_queue.append((unit_name, fn_name, args))
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={'a1': 'unitsPost.u1.x.f2("a1");'},
+        infos=infos,
+        call_cb=on_unit_call,
+        post_cb=on_unit_post)
+
+    evaluator.eval_code("unitsPost.u1.f1(123, 'abc');")
+    evaluator.eval_action('a1')
+    evaluator.close()
+
+    assert not unit_call_args_queue
+
+    called_unit_name, called_fn, called_args = unit_post_args_queue.popleft()
+    assert called_unit_name == 'u1'
+    assert called_fn == 'f1'
+    assert list(called_args) == [123, 'abc']
+
+    called_unit_name, called_fn, called_args = unit_post_args_queue.popleft()
+    assert called_unit_name == 'u1'
+    assert called_fn == 'x.f2'
+    assert list(called_args) == ['a1']
+
+    assert not unit_post_args_queue
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_bytes(interpreter_type, evaluator_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'read', 'write'},
+            create=MockUnit)]
+
+    data = bytes(range(256))
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append((fn_name, args))
+        if fn_name == 'read':
+            return data
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={},
+        infos=infos,
+        call_cb=on_unit_call)
+
+    evaluator.eval_code('units.u1.write(units.u1.read())')
+    evaluator.close()
+
+    assert unit_call_args_queue.popleft() == ('read', ())
+    assert unit_call_args_queue.popleft() == ('write', (data, ))
+    assert not unit_call_args_queue
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_float64_array(interpreter_type, evaluator_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'read', 'write'},
+            create=MockUnit)]
+
+    data = array.array('d', [i + 0.5 for i in range(1000)])
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append((fn_name, args))
+        if fn_name == 'read':
+            return data
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={},
+        infos=infos,
+        call_cb=on_unit_call)
+
+    evaluator.eval_code('units.u1.write(units.u1.read())')
+    evaluator.close()
+
+    assert unit_call_args_queue.popleft() == ('read', ())
+
+    fn_name, args = unit_call_args_queue.popleft()
+    assert fn_name == 'write'
+    assert len(args) == 1
+    assert list(args[0]) == list(data)
+
+    assert not unit_call_args_queue
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_reserved_keys(interpreter_type, evaluator_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'read', 'write'},
+            create=MockUnit)]
+
+    data = [{'$hat_controller_bytes': 'x'},
+            {'$hat_controller_float64_array': 123},
+            {'$hat_controller_escaped': ['a', 'b']},
+            {'$hat_controller_bytes': {'$hat_controller_bytes': '!'}}]
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append((fn_name, args))
+        if fn_name == 'read':
+            return data
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={},
+        infos=infos,
+        call_cb=on_unit_call)
+
+    evaluator.eval_code('units.u1.write(units.u1.read())')
+    evaluator.close()
+
+    assert unit_call_args_queue.popleft() == ('read', ())
+    assert unit_call_args_queue.popleft() == ('write', (data, ))
+    assert not unit_call_args_queue
+
+
+@pytest.mark.parametrize('data', [
+    None,
+    [1, 'a', {'b': [True, 1.5]}],
+    b'abc',
+    {'$hat_controller_bytes': 'x'},
+    {'$hat_controller_bytes': 'YWJj'},
+    {'$hat_controller_float64_array': 'x'},
+    {'$hat_controller_escaped': ['$hat_controller_bytes', 'x']},
+    {'$hat_controller_bytes': b'abc'},
+    [b'abc', {'$hat_controller_bytes': [b'abc']}],
+    {'$hat_controller_bytes': 'x', 'a': 1},
+    '"$hat_controller_bytes"'])
+def test_bridge(data):
+    encoded = bridge.encode(data)
+    decoded = bridge.decode(encoded)
+    assert decoded == data
+
+
+def test_bridge_float64_array():
+    data = {'$hat_controller_float64_array': array.array('d', [1.5, 2.5])}
+    encoded = bridge.encode(data)
+    decoded = bridge.decode(encoded)
+
+    assert list(decoded) == ['$hat_controller_float64_array']
+    assert list(decoded['$hat_controller_float64_array']) == [1.5, 2.5]
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_action_syntax_error(interpreter_type, evaluator_type):
+    with pytest.raises(Exception, match='action a1 error'):
+        evaluators.create_evaluator(
+            interpreter_type=interpreter_type,
+            action_codes={'a1': '('},
+            infos=[],
+            call_cb=lambda unit_name, fn_name, args: None)
+
+
+@pytest.mark.parametrize('interpreter_type', [
+    interpreters.InterpreterType.CPYTHON,
+    pytest.param(interpreters.InterpreterType.CPYTHON_SUBINTERPRETER,
+                 marks=pytest.mark.skipif(sys.version_info < (3, 12),
+                                          reason='requires Python 3.12'))])
+@pytest.mark.parametrize('validate_args', [True, False])
+def test_py_validate_args(interpreter_type, validate_args):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(args)
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={},
+        infos=infos,
+        call_cb=on_unit_call,
+        validate_args=validate_args)
+
+    evaluator.eval_code('units.u1.f1(None, True, 1, 1.5, "a", b"\\x00b", '
+                        '[1, [2, {"a": [3]}]], {"b": {"c": None}})')
+    assert unit_call_args_queue.popleft() == (
+        None, True, 1, 1.5, 'a', b'\x00b', [1, [2, {'a': [3]}]],
+        {'b': {'c': None}})
+
+    for args in ['[{1: 2}]', '{"a": [(1, 2)]}']:
+        code = f'units.u1.f1({args})'
+
+        if validate_args:
+            with pytest.raises(Exception, match='unsupported argument type'):
+                evaluator.eval_code(code)
+
+        elif interpreter_type == interpreters.InterpreterType.CPYTHON:
+            evaluator.eval_code(code)
+            assert unit_call_args_queue.popleft() == (eval(args), )
+
+    assert not unit_call_args_queue
+
+    evaluator.close()
+
+
+@pytest.mark.parametrize('interpreter_type', [
+    interpreters.InterpreterType.CPYTHON,
+    pytest.param(interpreters.InterpreterType.CPYTHON_SUBINTERPRETER,
+                 marks=pytest.mark.skipif(sys.version_info < (3, 12),
+                                          reason='requires Python 3.12'))])
+def test_py_validate_cyclic_args(interpreter_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(args)
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={},
+        infos=infos,
+        call_cb=on_unit_call)
+
+    evaluator.eval_code('x = [1]\n'
+                        'units.u1.f1([x, x], {"a": x, "b": [x]})')
+    assert unit_call_args_queue.popleft() == ([[1], [1]],
+                                              {'a': [1], 'b': [[1]]})
+
+    for code in ['a = []\n'
+                 'a.append(a)\n'
+                 'units.u1.f1(a)',
+
+                 'd = {}\n'
+                 'd["d"] = d\n'
+                 'units.u1.f1(d)',
+
+                 'd = {"a": []}\n'
+                 'd["a"].append([1, d])\n'
+                 'units.u1.f1(1, d)']:
+        with pytest.raises(Exception, match='unsupported argument type'):
+            evaluator.eval_code(code)
+
+    assert not unit_call_args_queue
+
+    evaluator.close()
+
+
+@pytest.mark.parametrize('interpreter_type, init_code, action_code', [
+    (interpreters.InterpreterType.DUKTAPE,
+     'var x = 1;',
+     'units.u1.f1(x);'),
+    (interpreters.InterpreterType.QUICKJS,
+     'var x = 1;',
+     'units.u1.f1(x);'),
+    (interpreters.InterpreterType.LUA,
+     'x = 1',
+     'units.u1.f1(x)'),
+    (interpreters.InterpreterType.CPYTHON,
+     'x = 1',
+     'units.u1.f1(x)')])
+def test_code_cache(tmp_path, interpreter_type, init_code, action_code):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(list(args))
+
+    code_cache = hat.controller.cache.CodeCache(tmp_path)
+
+    for i in range(2):
+        evaluator = evaluators.create_evaluator(
+            interpreter_type=interpreter_type,
+            action_codes={'a1': action_code},
+            infos=infos,
+            call_cb=on_unit_call,
+            code_cache=code_cache)
+
+        evaluator.eval_code(init_code)
+        evaluator.eval_action('a1')
+
+        assert unit_call_args_queue.popleft() == [1]
+        assert len(list(tmp_path.iterdir())) == 2
+
+    with pytest.raises(Exception, match='action a1 error'):
+        evaluators.create_evaluator(
+            interpreter_type=interpreter_type,
+            action_codes={'a1': '('},
+            infos=infos,
+            call_cb=on_unit_call,
+            code_cache=code_cache)
+
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+@pytest.mark.parametrize('data', [b'',
+                                  b'garbage',
+                                  b'\xe3\x00',
+                                  b'i\x01\x00\x00\x00'])
+def test_py_code_cache_invalid(tmp_path, data):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(list(args))
+
+    code_cache = hat.controller.cache.CodeCache(tmp_path)
+
+    for i in range(2):
+        # cache entries created by first evaluator are corrupted
+        for path in tmp_path.iterdir():
+            path.write_bytes(data)
+
+        evaluator = evaluators.create_evaluator(
+            interpreter_type=interpreters.InterpreterType.CPYTHON,
+            action_codes={'a1': 'units.u1.f1(x)'},
+            infos=infos,
+            call_cb=on_unit_call,
+            code_cache=code_cache)
+
+        evaluator.eval_code('x = 1')
+        evaluator.eval_action('a1')
+
+        assert unit_call_args_queue.popleft() == [1]
+        assert len(list(tmp_path.iterdir())) == 2
+
+        for path in tmp_path.iterdir():
+            assert path.read_bytes() != data
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_lazy_actions(interpreter_type, evaluator_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(list(args))
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={'a1': 'units.u1.f1(123)',
+                      'a2': '('},
+        infos=infos,
+        call_cb=on_unit_call,
+        lazy_actions=True)
+
+    for _ in range(2):
+        evaluator.eval_action('a1')
+        assert unit_call_args_queue.popleft() == [123]
+
+    for _ in range(2):
+        with pytest.raises(Exception, match='action a2 error'):
+            evaluator.eval_action('a2')
+
+    assert not unit_call_args_queue
+
+    evaluator.close()
+
+
+@pytest.mark.parametrize('interpreter_type, action_code', [
+    (interpreters.InterpreterType.QUICKJS,
+     'var t = []; for (var i = 0; i < 1000000; ++i) t.push("abc" + i);'),
+    (interpreters.InterpreterType.LUA,
+     'local t = {}; for i = 1, 1000000 do t[i] = "abc" .. i end')])
+def test_memory_limit(interpreter_type, action_code):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(list(args))
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={'a1': action_code,
+                      'a2': 'units.u1.f1(123)'},
+        infos=infos,
+        call_cb=on_unit_call,
+        memory_limit=1024 * 1024,
+        gc_threshold=64 * 1024)
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            evaluator.eval_action('a1')
+
+        evaluator.eval_action('a2')
+        assert unit_call_args_queue.popleft() == [123]
+
+    evaluator.close()
+
+
+@pytest.mark.parametrize('interpreter_type, evaluator_type', evaluator_types)
+def test_timeout(interpreter_type, evaluator_type):
+    infos = [
+        common.UnitInfo(
+            name='u1',
+            functions={'f1'},
+            create=MockUnit,
+            json_schema_id=None,
+            json_schema_repo=None)]
+
+    unit_call_args_queue = collections.deque()
+
+    def on_unit_call(unit_name, fn_name, args):
+        unit_call_args_queue.append(list(args))
+
+    if evaluator_type == evaluators.JsEvaluator:
+        loop_code = 'while (true) {}'
+
+    elif evaluator_type == evaluators.LuaEvaluator:
+        loop_code = 'while true do end'
+
+    else:
+        loop_code = 'while True: pass'
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={'a1': loop_code,
+                      'a2': 'units.u1.f1(123)'},
+        infos=infos,
+        call_cb=on_unit_call,
+        timeout=0.05)
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            evaluator.eval_action('a1')
+
+        evaluator.eval_action('a2')
+        assert unit_call_args_queue.popleft() == [123]
+
+    if interpreter_type != interpreters.InterpreterType.LUA:
+        with pytest.raises(TimeoutError):
+            evaluator.eval_code(loop_code)
+
+    evaluator.close()
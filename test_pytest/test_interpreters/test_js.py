@@ -1,3 +1,8 @@
+import array
+import gc
+import sys
+import threading
+
 import pytest
 
 from hat import json
@@ -23,7 +28,9 @@ interpreter_types = [hat.controller.interpreters.InterpreterType.DUKTAPE,
     ('[]', []),
     ('[1, true, "42"]', [1, True, '42']),
     ('({})', {}),
-    ('({"abc": 123})', {'abc': 123})
+    ('({"abc": 123})', {'abc': 123}),
+    ('[1, , 3]', [1, None, 3]),
+    ('var a = [1]; a[3] = 4; a', [1, None, None, 4])
 ])
 def test_eval(interpreter_type, code, result):
     interpreter = hat.controller.interpreters.create_interpreter(
@@ -41,6 +48,10 @@ def test_eval(interpreter_type, code, result):
     ('(function (x) { return x; })', [[1, 2, 3]], [1, 2, 3]),
     ('(function (x) { return x; })', [{}], {}),
     ('(function (x) { return x; })', [{'a': [{}]}], {'a': [{}]}),
+    ('(function (x) { return x; })', [list(range(1000))], list(range(1000))),
+    ('(function (x) { return x; })',
+     [{f'key{i}': [i] for i in range(1000)}],
+     {f'key{i}': [i] for i in range(1000)}),
     ('(function (x, y) { return x + y; })', [1, 2], 3),
     ('(function () { return Array.prototype.slice.call(arguments); })',
      [1, True, {'a': {}}, ['abc']],
@@ -184,3 +195,229 @@ def test_t6(interpreter_type):
     except Exception as e:
         lines = str(e).split('\n')
         assert lines[0].endswith('abc')
+
+
+@pytest.mark.parametrize('interpreter_type', interpreter_types)
+def test_dump(interpreter_type):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type)
+    data = interpreter.dump('var x = 40; (function (y) { return x + y; })')
+    assert isinstance(data, bytes)
+
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type)
+    fn = interpreter.eval(data)
+    assert fn(2) == 42
+    assert interpreter.eval('x') == 40
+
+    with pytest.raises(Exception):
+        interpreter.dump('(')
+
+
+def test_quickjs_shared_runtime():
+    runtime = hat.controller.interpreters.QuickJSRuntime()
+    interpreter1 = hat.controller.interpreters.QuickJS(runtime)
+    interpreter2 = hat.controller.interpreters.QuickJS(runtime)
+
+    interpreter1.eval('var x = 1;')
+    interpreter2.eval('var x = 2;')
+    fn1 = interpreter1.eval('(function (f) { return f(x); })')
+    fn2 = interpreter2.eval('(function (f) { return f(x); })')
+
+    assert fn1(lambda x: x + 10) == 11
+    assert fn2(lambda x: x + 20) == 22
+    assert fn1(lambda x: fn2(lambda y: x + y)) == 3
+
+    del interpreter1
+    assert fn1(lambda x: x) == 1
+
+
+def test_quickjs_shared_runtime_threads():
+    runtime = hat.controller.interpreters.QuickJSRuntime()
+    interpreters = [hat.controller.interpreters.QuickJS(runtime)
+                    for _ in range(4)]
+    results = [None] * len(interpreters)
+    barrier = threading.Barrier(len(interpreters))
+
+    def run(i):
+        interpreter = interpreters[i]
+        fn = interpreter.eval('(function (f, n) {'
+                              '    var result = 0;'
+                              '    for (var i = 0; i < n; ++i)'
+                              '        result = f(result);'
+                              '    return result;'
+                              '})')
+        barrier.wait()
+
+        for _ in range(10):
+            # functions created in other threads are freed in this thread
+            other_fn = interpreters[(i + 1) % len(interpreters)].eval(
+                '(function (x) { return x + 1; })')
+            results[i] = fn(other_fn, 1000)
+
+    threads = [threading.Thread(target=run, args=(i, ))
+               for i in range(len(interpreters))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1000] * len(interpreters)
+
+
+def test_quickjs_memory_limit():
+    runtime = hat.controller.interpreters.QuickJSRuntime(
+        memory_limit=1024 * 1024,
+        gc_threshold=64 * 1024)
+    interpreter1 = hat.controller.interpreters.QuickJS(runtime)
+    interpreter2 = hat.controller.interpreters.QuickJS(runtime)
+
+    with pytest.raises(Exception, match='out of memory'):
+        interpreter1.eval('(function () {'
+                          '    var s = "";'
+                          '    for (var i = 0; i < 1000000; ++i)'
+                          '        s += "abc" + i;'
+                          '})()')
+
+    assert runtime.memory_usage <= 1024 * 1024
+    assert interpreter1.eval('1 + 1') == 2
+    assert interpreter2.eval('2 + 2') == 4
+
+
+def test_quickjs_strings():
+    interpreter = hat.controller.interpreters.QuickJS()
+    result = interpreter.eval('({"abc": "abc",'
+                              '  "\\u010d": "\\u010d\\ud83d\\ude00",'
+                              '  "a\\u0000b": "a\\u0000b",'
+                              '  "123": [""]})')
+    assert result == {'abc': 'abc',
+                      '\u010d': '\u010d\U0001f600',
+                      'a\x00b': 'a\x00b',
+                      '123': ['']}
+
+    fn = interpreter.eval('(function (x) { return x; })')
+    assert fn(result) == result
+
+
+@pytest.mark.parametrize('interpreter_type', interpreter_types)
+def test_object_keys(interpreter_type):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type)
+    fn = interpreter.eval('(function (keys) {'
+                          '    var r = [];'
+                          '    for (var i = 0; i < 3; ++i) {'
+                          '        var o = {};'
+                          '        for (var j = 0; j < keys.length; ++j)'
+                          '            o[keys[j]] = j;'
+                          '        r.push(o);'
+                          '    }'
+                          '    return r;'
+                          '})')
+    keys = ['a', '\u010d', 'a\x00b', '', *(f'key{i}' for i in range(1000))]
+
+    for _ in range(3):
+        result = fn(keys)
+        assert result == [{key: i for i, key in enumerate(keys)}] * 3
+
+
+@pytest.mark.parametrize('interpreter_type', interpreter_types)
+def test_object_keys_release(interpreter_type):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type)
+    fn = interpreter.eval('(function () { return {cached_key: 1}; })')
+
+    key = next(iter(fn()))
+    for _ in range(3):
+        assert fn() == {key: 1}
+
+    count = sys.getrefcount(key)
+    del fn, interpreter
+    gc.collect()
+    assert sys.getrefcount(key) < count
+
+
+@pytest.mark.parametrize('interpreter_type', interpreter_types)
+def test_bytes(interpreter_type):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type)
+    fn = interpreter.eval('(function (x) {'
+                          '    var r = [];'
+                          '    for (var i = 0; i < x.length; ++i)'
+                          '        r.push(x[i]);'
+                          '    x[0] = 0xff;'
+                          '    return [x instanceof Uint8Array, r, x];'
+                          '})')
+    data = bytes(range(256)) * 100
+
+    assert fn(b'') == [True, [], b'']
+    assert fn(b'\x00\x01') == [True, [0, 1], b'\xff\x01']
+    assert fn(bytearray(b'abc')) == [True, [97, 98, 99], b'\xffbc']
+    assert fn(memoryview(b'abcd')[1:3]) == [True, [98, 99], b'\xffc']
+    assert fn(data)[2] == b'\xff' + data[1:]
+    assert data[0] == 0
+
+    result = interpreter.eval('var a = new Uint8Array([1, 2, 3, 4]);'
+                              '[a, a.buffer, a.subarray(1, 3),'
+                              ' {x: new ArrayBuffer(2)}]')
+    assert result == [b'\x01\x02\x03\x04', b'\x01\x02\x03\x04', b'\x02\x03',
+                      {'x': b'\x00\x00'}]
+
+    result = interpreter.eval('new Int8Array([1, 2])')
+    assert result == {'0': 1, '1': 2}
+
+
+@pytest.mark.parametrize('interpreter_type', interpreter_types)
+def test_float64_array(interpreter_type):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type)
+    fn = interpreter.eval('(function (x) {'
+                          '    var r = [];'
+                          '    for (var i = 0; i < x.length; ++i)'
+                          '        r.push(x[i]);'
+                          '    x[0] = -1;'
+                          '    return [x instanceof Float64Array, r, x];'
+                          '})')
+    data = array.array('d', [i + 0.5 for i in range(10000)])
+
+    assert fn(array.array('d')) == [True, [], array.array('d')]
+    assert fn(array.array('d', [1.5, 2])) == [
+        True, [1.5, 2], array.array('d', [-1, 2])]
+    assert fn(memoryview(data)[1:6:2]) == [True, [1.5, 3.5, 5.5],
+                                           array.array('d', [-1, 3.5, 5.5])]
+    assert fn(data)[2] == array.array('d', [-1, *data[1:]])
+    assert data[0] == 0.5
+
+    result = fn(array.array('i', [1, 2]))
+    assert result == [False, [1, 0, 0, 0, 2, 0, 0, 0],
+                      b'\xff\x00\x00\x00\x02\x00\x00\x00']
+
+    result = interpreter.eval('var a = new Float64Array([1.5, 2.5, 3.5]);'
+                              '[a, a.subarray(1), {x: a.subarray(3)}]')
+    assert result == [array.array('d', [1.5, 2.5, 3.5]),
+                      array.array('d', [2.5, 3.5]),
+                      {'x': array.array('d')}]
+
+    with pytest.raises(Exception, match='unsupported type'):
+        fn(object())
+
+
+@pytest.mark.parametrize('interpreter_type', interpreter_types)
+def test_timeout(interpreter_type):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        interpreter_type, timeout=0.05)
+    loop = interpreter.eval('(function (f) {'
+                            '    while (true) {'
+                            '        try { f(); } catch (e) {}'
+                            '    }'
+                            '})')
+
+    with pytest.raises(TimeoutError):
+        interpreter.eval('while (true) {}')
+
+    with pytest.raises(TimeoutError):
+        loop(lambda: None)
+
+    with pytest.raises(TimeoutError):
+        loop(interpreter.eval('(function () { while (true) {} })'))
+
+    assert interpreter.eval('1 + 1') == 2
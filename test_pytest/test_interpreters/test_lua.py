@@ -1,3 +1,7 @@
+import array
+import gc
+import sys
+
 import pytest
 
 import hat.controller.interpreters
@@ -12,7 +16,11 @@ import hat.controller.interpreters
     ('"abc"', 'abc'),
     ('{}', []),
     ('{1, 2, 3}', [1, 2, 3]),
-    ('{a=123}', {'a': 123})
+    ('{1, nil, 3}', [1]),
+    ('(function() local t = {} for i = 1, 100 do t[i] = i end return t end)()',
+     list(range(1, 101))),
+    ('{a=123}', {'a': 123}),
+    ('{a=1, [2]=2, [1.5]=3}', {'a': 1, '2': 2, '1.5': 3})
 ])
 def test_lua_to_py_data(data, result):
     interpreter = hat.controller.interpreters.create_interpreter(
@@ -23,7 +31,8 @@ def test_lua_to_py_data(data, result):
 
 
 @pytest.mark.parametrize('data', [
-    None, True, False, 123, 1.5, 'abc', {'xyz': {'abc': 42, '': [{'a': 'b'}]}}
+    None, True, False, 123, 1.5, 'abc', {'xyz': {'abc': 42, '': [{'a': 'b'}]}},
+    list(range(1000)), {f'key{i}': i for i in range(1000)}
 ])
 def test_lua_to_py_fn(data):
     interpreter = hat.controller.interpreters.create_interpreter(
@@ -34,6 +43,83 @@ def test_lua_to_py_fn(data):
     assert val == data
 
 
+def test_table_keys():
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA)
+    fn = interpreter.load('return function (keys)\n'
+                          '    local r = {}\n'
+                          '    for i = 1, 3 do\n'
+                          '        local t = {}\n'
+                          '        for j, key in ipairs(keys) do\n'
+                          '            t[key] = j\n'
+                          '        end\n'
+                          '        r[i] = t\n'
+                          '    end\n'
+                          '    return r\n'
+                          'end')()
+    keys = ['a', '\u010d', 'a\x00b', '', *(f'key{i}' for i in range(1000))]
+
+    for _ in range(3):
+        result = fn(keys)
+        assert result == [{key: i for i, key in enumerate(keys, 1)}] * 3
+
+
+def test_table_keys_release():
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA)
+    fn = interpreter.load('return function ()\n'
+                          '    return {cached_key=1}\n'
+                          'end')()
+
+    key = next(iter(fn()))
+    for _ in range(3):
+        assert fn() == {key: 1}
+
+    # converted results are referenced until lua garbage collection
+    interpreter.load('collectgarbage()')()
+
+    count = sys.getrefcount(key)
+    del fn, interpreter
+    gc.collect()
+    assert sys.getrefcount(key) < count
+
+
+def test_bytes():
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA)
+    fn = interpreter.load('return function (x)\n'
+                          '    return {x, #x, x:byte(1, -1)}\n'
+                          'end')()
+    data = bytes(range(256)) * 100
+
+    assert fn(b'') == ['', 0]
+    assert fn(b'\x00\xff') == [b'\x00\xff', 2, 0, 255]
+    assert fn(bytearray(b'abc')) == ['abc', 3, 97, 98, 99]
+    assert fn(memoryview(b'abcd')[1:3]) == ['bc', 2, 98, 99]
+    assert fn(data)[:2] == [data, len(data)]
+
+    result = interpreter.load('return {"\\xff\\x00", "\\xc4\\x8d"}')()
+    assert result == [b'\xff\x00', '\u010d']
+
+
+def test_float64_array():
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA)
+    fn = interpreter.load('return function (x)\n'
+                          '    return {type(x), #x, x}\n'
+                          'end')()
+    data = array.array('d', [i + 0.5 for i in range(10000)])
+
+    assert fn(array.array('d')) == ['table', 0, []]
+    assert fn(array.array('d', [1.5, 2])) == ['table', 2, [1.5, 2]]
+    assert fn(memoryview(data)[1:6:2]) == ['table', 3, [1.5, 3.5, 5.5]]
+    assert fn(data) == ['table', len(data), list(data)]
+    assert fn(array.array('i', [-1])) == ['string', 4, b'\xff\xff\xff\xff']
+
+    with pytest.raises(Exception, match='unsupported type'):
+        fn(object())
+
+
 def test_lua_error():
     interpreter = hat.controller.interpreters.create_interpreter(
         hat.controller.interpreters.InterpreterType.LUA)
@@ -57,3 +143,55 @@ def test_py_error():
 
     except Exception as e:
         assert str(e).endswith('abc')
+
+
+def test_dump():
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA)
+    data = interpreter.dump('x = 40; return function(y) return x + y end')
+    assert isinstance(data, bytes)
+
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA)
+    fn = interpreter.load(data)()
+    assert fn(2) == 42
+    assert interpreter.load('return x')() == 40
+
+    with pytest.raises(Exception):
+        interpreter.dump('(')
+
+
+@pytest.mark.parametrize('gc_mode', hat.controller.interpreters.LuaGcMode)
+def test_memory_limit(gc_mode):
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA,
+        memory_limit=256 * 1024,
+        lua_gc_mode=gc_mode)
+    fn = interpreter.load('local t = {}\n'
+                          'for i = 1, 1000000 do t[i] = {i} end')
+
+    with pytest.raises(Exception, match='not enough memory'):
+        fn()
+
+    assert interpreter.memory_usage <= 256 * 1024
+    assert interpreter.load('return 1 + 1')() == 2
+
+
+def test_timeout():
+    interpreter = hat.controller.interpreters.create_interpreter(
+        hat.controller.interpreters.InterpreterType.LUA,
+        timeout=0.05)
+    loop = interpreter.load('return function(f)\n'
+                            '    while true do pcall(f) end\n'
+                            'end')()
+
+    with pytest.raises(TimeoutError):
+        interpreter.load('while true do end')()
+
+    with pytest.raises(TimeoutError):
+        loop(lambda: None)
+
+    with pytest.raises(TimeoutError):
+        loop(interpreter.load('return function() while true do end end')())
+
+    assert interpreter.load('return 1 + 1')() == 2
@@ -0,0 +1,99 @@
+import itertools
+
+import pytest
+
+from hat.controller import common
+import hat.controller.matcher
+
+
+def match_query(value, query):
+    if query and query[-1] == '*':
+        query = query[:-1]
+        value = value[:len(query)]
+
+    if len(value) != len(query):
+        return False
+
+    return all(q == '?' or v == q for v, q in zip(value, query))
+
+
+def match_scan(entries, trigger):
+    result = []
+    for type_query, name_query, value in entries:
+        if value in result:
+            continue
+
+        if not match_query(trigger.type, type_query):
+            continue
+
+        if not match_query(trigger.name, name_query):
+            continue
+
+        result.append(value)
+
+    return result
+
+
+def test_empty():
+    matcher = hat.controller.matcher.Matcher()
+    trigger = common.Trigger(type=('a', ), name=('b', ), data=None)
+
+    assert matcher.values == []
+    assert matcher.match(trigger) == []
+
+
+@pytest.mark.parametrize(
+    'type_query, name_query, trigger_type, trigger_name, matches',
+    [(('a', ), ('b', ), ('a', ), ('b', ), True),
+     (('a', ), ('b', ), ('a', ), ('c', ), False),
+     (('a', ), ('b', ), ('a', 'b'), ('b', ), False),
+     (('?', ), ('b', ), ('x', ), ('b', ), True),
+     (('?', ), ('b', ), (), ('b', ), False),
+     (('?', ), ('b', ), ('x', 'y'), ('b', ), False),
+     (('*', ), ('*', ), (), (), True),
+     (('*', ), ('*', ), ('x', 'y', 'z'), ('b', ), True),
+     (('a', '*'), ('b', ), ('a', ), ('b', ), True),
+     (('a', '*'), ('b', ), ('a', 'x', 'y'), ('b', ), True),
+     (('a', '*'), ('b', ), ('x', ), ('b', ), False),
+     (('?', '*'), ('b', ), (), ('b', ), False),
+     (('?', '*'), ('b', ), ('x', ), ('b', ), True),
+     (('a', '*', 'b'), ('b', ), ('a', 'x', 'b'), ('b', ), False),
+     (('a', '*', 'b'), ('b', ), ('a', '*', 'b'), ('b', ), True),
+     (('a', ), ('?', '?'), ('a', ), ('?', 'x'), True)])
+def test_match(type_query, name_query, trigger_type, trigger_name, matches):
+    matcher = hat.controller.matcher.Matcher([(type_query, name_query, 1)])
+    trigger = common.Trigger(type=trigger_type, name=trigger_name, data=None)
+
+    assert matcher.match(trigger) == ([1] if matches else [])
+
+
+def test_order():
+    entries = [(('a', ), ('*', ), 'v3'),
+               (('*', ), ('b', ), 'v1'),
+               (('a', ), ('b', ), 'v2'),
+               (('?', ), ('b', ), 'v1'),
+               (('x', ), ('y', ), 'v4')]
+    matcher = hat.controller.matcher.Matcher(entries)
+    trigger = common.Trigger(type=('a', ), name=('b', ), data=None)
+
+    assert matcher.values == ['v3', 'v1', 'v2', 'v4']
+    assert matcher.match(trigger) == ['v3', 'v1', 'v2']
+
+
+def test_match_scan():
+    segments = ['a', 'b', '?', '*']
+    queries = [
+        query
+        for length in range(3)
+        for query in itertools.product(segments, repeat=length)]
+
+    entries = [(type_query, name_query, i)
+               for i, (type_query, name_query) in enumerate(
+                   itertools.product(queries[::3], queries[::2]))]
+    matcher = hat.controller.matcher.Matcher(entries)
+
+    for trigger_type, trigger_name in itertools.product(queries, queries):
+        trigger = common.Trigger(type=trigger_type,
+                                 name=trigger_name,
+                                 data=None)
+        assert matcher.match(trigger) == match_scan(entries, trigger)
@@ -0,0 +1,151 @@
+import types
+
+import pytest
+
+from hat.controller import common
+from hat.controller import evaluators
+from hat.controller import interpreters
+import hat.controller.cache
+import hat.controller.evaluators.validation
+
+
+pytestmark = pytest.mark.perf
+
+
+action_code = """
+result = 0
+for i in range(10):
+    if i % 2:
+        result += i
+    else:
+        result -= i
+units.u1.f1(result)
+"""
+
+
+@pytest.mark.parametrize('trigger_count', [10000, 100000])
+def test_py_action(duration, trigger_count):
+    infos = [common.UnitInfo(name='u1',
+                             functions={'f1'},
+                             create=None)]
+
+    def on_unit_call(unit_name, fn_name, args):
+        pass
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreters.InterpreterType.CPYTHON,
+        action_codes={'a1': action_code},
+        infos=infos,
+        call_cb=on_unit_call)
+
+    interpreter = interpreters.CPython()
+    interpreter.globals['units'] = types.SimpleNamespace(
+        u1=types.SimpleNamespace(
+            f1=lambda *args: on_unit_call('u1', 'f1', args)))
+
+    with duration(f'source - triggers: {trigger_count}'):
+        for _ in range(trigger_count):
+            interpreter.eval(action_code, {})
+
+    with duration(f'compiled - triggers: {trigger_count}'):
+        for _ in range(trigger_count):
+            evaluator.eval_action('a1')
+
+
+def _is_valid_arg(arg):
+    if isinstance(arg, dict):
+        return all(isinstance(k, str) and _is_valid_arg(v)
+                   for k, v in arg.items())
+
+    if isinstance(arg, list):
+        return all(_is_valid_arg(i) for i in arg)
+
+    return arg is None or isinstance(arg, (bool, int, float, str))
+
+
+@pytest.mark.parametrize('call_count', [10000])
+@pytest.mark.parametrize('arg_size', [1, 100])
+def test_py_validate_args(duration, call_count, arg_size):
+    args = ('a', 1, [{'x': i, 'y': [1.5, True, None], 'z': 'abc'}
+                     for i in range(arg_size)])
+
+    with duration(f'recursive - size: {arg_size}, calls: {call_count}'):
+        for _ in range(call_count):
+            assert all(_is_valid_arg(arg) for arg in args)
+
+    with duration(f'iterative - size: {arg_size}, calls: {call_count}'):
+        for _ in range(call_count):
+            assert hat.controller.evaluators.validation.are_valid_args(args)
+
+
+@pytest.mark.parametrize('interpreter_type, action_code', [
+    (interpreters.InterpreterType.DUKTAPE,
+     'for (var i = 0; i < 100; ++i) units.u1.f1(i, "abc");'),
+    (interpreters.InterpreterType.QUICKJS,
+     'for (var i = 0; i < 100; ++i) units.u1.f1(i, "abc");'),
+    (interpreters.InterpreterType.LUA,
+     'for i = 1, 100 do units.u1.f1(i, "abc") end')])
+@pytest.mark.parametrize('trigger_count', [1000])
+def test_unit_call(duration, interpreter_type, action_code, trigger_count):
+    infos = [common.UnitInfo(name='u1',
+                             functions={'f1'},
+                             create=None)]
+
+    def on_unit_call(unit_name, fn_name, args):
+        pass
+
+    evaluator = evaluators.create_evaluator(
+        interpreter_type=interpreter_type,
+        action_codes={'a1': action_code},
+        infos=infos,
+        call_cb=on_unit_call)
+
+    with duration(f'{interpreter_type.name} - triggers: {trigger_count}'):
+        for _ in range(trigger_count):
+            evaluator.eval_action('a1')
+
+
+@pytest.mark.parametrize('interpreter_type, action_code', [
+    (interpreters.InterpreterType.DUKTAPE,
+     'var result = 0;\n'
+     'for (var i = 0; i < 10; ++i) result += i;\n'
+     'units.u1.f1(result, {{a: [{i}]}});'),
+    (interpreters.InterpreterType.QUICKJS,
+     'var result = 0;\n'
+     'for (var i = 0; i < 10; ++i) result += i;\n'
+     'units.u1.f1(result, {{a: [{i}]}});'),
+    (interpreters.InterpreterType.LUA,
+     'local result = 0\n'
+     'for i = 1, 10 do result = result + i end\n'
+     'units.u1.f1(result, {{a = {{{i}}}}})'),
+    (interpreters.InterpreterType.CPYTHON,
+     'result = 0\n'
+     'for i in range(10):\n'
+     '    result += i\n'
+     'units.u1.f1(result, {{"a": [{i}]}})')])
+@pytest.mark.parametrize('action_count', [1000])
+def test_code_cache(duration, tmp_path, interpreter_type, action_code,
+                    action_count):
+    infos = [common.UnitInfo(name='u1',
+                             functions={'f1'},
+                             create=None)]
+    action_codes = {f'a{i}': action_code.format(i=i)
+                    for i in range(action_count)}
+    code_cache = hat.controller.cache.CodeCache(tmp_path)
+
+    def create_evaluator(code_cache):
+        return evaluators.create_evaluator(
+            interpreter_type=interpreter_type,
+            action_codes=action_codes,
+            infos=infos,
+            call_cb=lambda unit_name, fn_name, args: None,
+            code_cache=code_cache)
+
+    with duration(f'{interpreter_type.name} - no cache'):
+        create_evaluator(None)
+
+    with duration(f'{interpreter_type.name} - cold cache'):
+        create_evaluator(code_cache)
+
+    with duration(f'{interpreter_type.name} - warm cache'):
+        create_evaluator(code_cache)
@@ -0,0 +1,186 @@
+import array
+import json
+
+import pytest
+
+from hat.controller import interpreters
+
+
+pytestmark = pytest.mark.perf
+
+# measured crossover of element-wise conversion and serialization to JSON
+# (JSON.stringify with json.loads and json.dumps with JSON.parse):
+#
+#   * Duktape to Python - serialization is faster only for arrays of objects
+#     (from ~4 items, ~2x from 16 items), numbers and strings are faster
+#     element-wise; result of serialization equals element-wise conversion
+#     only if values encoded differently (toJSON, boxed primitives, custom
+#     prototypes) are first excluded by walking the whole value, which makes
+#     serialization slower for every payload
+#   * QuickJS to Python and Python to Duktape or QuickJS - element-wise
+#     conversion is faster for all sizes (2-15x)
+#
+# all interpreters therefore convert data element-wise
+
+
+js_data_codes = {
+    'numbers': 'var r = [];\n'
+               'for (var i = 0; i < {size}; ++i) r.push(i + 0.5);',
+    'strings': 'var r = [];\n'
+               'for (var i = 0; i < {size}; ++i) r.push("item" + i);',
+    'objects': 'var r = [];\n'
+               'for (var i = 0; i < {size}; ++i)\n'
+               '    r.push({{id: i, name: "item" + i, flags: [true, null]}});'}
+
+py_data_fns = {
+    'numbers': lambda size: [i + 0.5 for i in range(size)],
+    'strings': lambda size: [f'item{i}' for i in range(size)],
+    'objects': lambda size: [{'id': i, 'name': f'item{i}',
+                              'flags': [True, None]}
+                             for i in range(size)]}
+
+sizes = [1, 4, 8, 16, 64, 1024]
+
+
+@pytest.mark.parametrize('interpreter_type', [
+    interpreters.InterpreterType.DUKTAPE,
+    interpreters.InterpreterType.QUICKJS])
+@pytest.mark.parametrize('data_type', list(js_data_codes))
+@pytest.mark.parametrize('size', sizes)
+@pytest.mark.parametrize('call_count', [1000])
+def test_js_to_py(duration, interpreter_type, data_type, size, call_count):
+    interpreter = interpreters.create_interpreter(interpreter_type)
+    interpreter.eval(f'var data = (function () {{\n'
+                     f'{js_data_codes[data_type].format(size=size)}\n'
+                     f'return r;\n'
+                     f'}})();')
+    get_data = interpreter.eval('(function () { return data; })')
+    get_json = interpreter.eval('(function () { '
+                                'return JSON.stringify(data); })')
+
+    with duration(f'{interpreter_type.name} element-wise - '
+                  f'{data_type}: {size}, calls: {call_count}'):
+        for _ in range(call_count):
+            get_data()
+
+    with duration(f'{interpreter_type.name} json - '
+                  f'{data_type}: {size}, calls: {call_count}'):
+        for _ in range(call_count):
+            json.loads(get_json())
+
+
+@pytest.mark.parametrize('interpreter_type', [
+    interpreters.InterpreterType.DUKTAPE,
+    interpreters.InterpreterType.QUICKJS])
+@pytest.mark.parametrize('data_type', list(py_data_fns))
+@pytest.mark.parametrize('size', sizes)
+@pytest.mark.parametrize('call_count', [1000])
+def test_py_to_js(duration, interpreter_type, data_type, size, call_count):
+    interpreter = interpreters.create_interpreter(interpreter_type)
+    set_data = interpreter.eval('(function (x) { data = x; })')
+    set_json = interpreter.eval('(function (x) { data = JSON.parse(x); })')
+    data = py_data_fns[data_type](size)
+
+    with duration(f'{interpreter_type.name} element-wise - '
+                  f'{data_type}: {size}, calls: {call_count}'):
+        for _ in range(call_count):
+            set_data(data)
+
+    with duration(f'{interpreter_type.name} json - '
+                  f'{data_type}: {size}, calls: {call_count}'):
+        for _ in range(call_count):
+            set_json(json.dumps(data))
+
+
+@pytest.mark.parametrize('data_type, code', [
+    ('numbers', 'for (var i = 0; i < {size}; ++i) r.push(i + 0.5);'),
+    ('ascii strings', 'for (var i = 0; i < {size}; ++i) r.push("item" + i);'),
+    ('unicode strings',
+     'for (var i = 0; i < {size}; ++i) r.push("\\u010d\\u0107" + i);'),
+    ('arrays', 'for (var i = 0; i < {size}; ++i) r.push([i, i]);'),
+    ('objects',
+     'for (var i = 0; i < {size}; ++i)\n'
+     '    r.push({{value: i, timestamp: 1.5, quality: "GOOD"}});'),
+    ('object keys',
+     'r = {{}};\n'
+     'for (var i = 0; i < {size}; ++i) r["key" + i] = i;')])
+@pytest.mark.parametrize('size', [10000])
+@pytest.mark.parametrize('call_count', [100])
+def test_quickjs_js_to_py(duration, data_type, code, size, call_count):
+    interpreter = interpreters.QuickJS()
+    interpreter.eval(f'var data = (function () {{\n'
+                     f'var r = [];\n'
+                     f'{code.format(size=size)}\n'
+                     f'return r;\n'
+                     f'}})();')
+    get_data = interpreter.eval('(function () { return data; })')
+
+    with duration(f'{data_type}: {size}, calls: {call_count}'):
+        for _ in range(call_count):
+            get_data()
+
+
+@pytest.mark.parametrize('interpreter_type', [
+    interpreters.InterpreterType.DUKTAPE,
+    interpreters.InterpreterType.LUA,
+    interpreters.InterpreterType.QUICKJS])
+@pytest.mark.parametrize('data_type, data', [
+    ('list', [i + 0.5 for i in range(10000)]),
+    ('dict', {f'key{i}': i for i in range(10000)}),
+    ('bytes', bytes(range(256)) * 4096),
+    ('float64 array', array.array('d', [i + 0.5 for i in range(10000)]))])
+@pytest.mark.parametrize('call_count', [100])
+def test_containers(duration, interpreter_type, data_type, data, call_count):
+    interpreter = interpreters.create_interpreter(interpreter_type)
+
+    if isinstance(interpreter, interpreters.Lua):
+        load = interpreter.load('local data\n'
+                                'return {function (x) data = x end,\n'
+                                '        function () return data end}')
+        set_data, get_data = load()
+
+    else:
+        set_data = interpreter.eval('(function (x) { data = x; })')
+        get_data = interpreter.eval('(function () { return data; })')
+
+    with duration(f'{interpreter_type.name} py to script - '
+                  f'{data_type}: {len(data)}, calls: {call_count}'):
+        for _ in range(call_count):
+            set_data(data)
+
+    with duration(f'{interpreter_type.name} script to py - '
+                  f'{data_type}: {len(data)}, calls: {call_count}'):
+        for _ in range(call_count):
+            get_data()
+
+
+@pytest.mark.parametrize('interpreter_type', [
+    interpreters.InterpreterType.DUKTAPE,
+    interpreters.InterpreterType.LUA,
+    interpreters.InterpreterType.QUICKJS])
+@pytest.mark.parametrize('data_type, data', [
+    ('repeated keys', {f'record{i}': {'value': i,
+                                      'timestamp': 1.5,
+                                      'quality': 'GOOD'}
+                       for i in range(10000)}),
+    ('unique keys', {f'key{i}': i for i in range(10000)})])
+@pytest.mark.parametrize('call_count', [100])
+def test_object_keys(duration, interpreter_type, data_type, data, call_count):
+    interpreter = interpreters.create_interpreter(interpreter_type)
+
+    if isinstance(interpreter, interpreters.Lua):
+        load = interpreter.load('local data\n'
+                                'return {function (x) data = x end,\n'
+                                '        function () return data end}')
+        set_data, get_data = load()
+
+    else:
+        set_data = interpreter.eval('(function (x) { data = x; })')
+        get_data = interpreter.eval('(function () { return data; })')
+
+    set_data(data)
+
+    with duration(f'{interpreter_type.name} script to py - '
+                  f'{data_type}: {len(data)}, calls: {call_count}'):
+        for _ in range(call_count):
+            get_data()
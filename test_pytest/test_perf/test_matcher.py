@@ -0,0 +1,66 @@
+import pytest
+
+from hat.controller import common
+import hat.controller.matcher
+
+
+pytestmark = pytest.mark.perf
+
+
+def match_query(value, query):
+    if query and query[-1] == '*':
+        query = query[:-1]
+        value = value[:len(query)]
+
+    if len(value) != len(query):
+        return False
+
+    for v, q in zip(value, query):
+        if q != '?' and v != q:
+            return False
+
+    return True
+
+
+def match_scan(action_triggers, trigger):
+    for action_name, queries in action_triggers.items():
+        for type_query, name_query in queries:
+            if not match_query(trigger.type, type_query):
+                continue
+
+            if not match_query(trigger.name, name_query):
+                continue
+
+            yield action_name
+            break
+
+
+@pytest.mark.parametrize('action_count', [10, 100, 1000, 5000])
+@pytest.mark.parametrize('trigger_count', [1000])
+def test_match(duration, action_count, trigger_count):
+    action_triggers = {
+        f'action{i}': [(('device', str(i % 100)), ('value', str(i), '?')),
+                       (('device', str(i % 100)), ('status', str(i), '*'))]
+        for i in range(action_count)}
+    action_triggers['all'] = [(('device', '*'), ('*', ))]
+
+    triggers = [common.Trigger(type=('device', str(i % 100)),
+                               name=('value', str(i % action_count), 'x'),
+                               data=None)
+                for i in range(trigger_count)]
+
+    matcher = hat.controller.matcher.Matcher(
+        (type_query, name_query, action_name)
+        for action_name, queries in action_triggers.items()
+        for type_query, name_query in queries)
+
+    with duration(f'scan - actions: {action_count}; '
+                  f'triggers: {trigger_count}'):
+        scan_results = [list(match_scan(action_triggers, trigger))
+                        for trigger in triggers]
+
+    with duration(f'matcher - actions: {action_count}; '
+                  f'triggers: {trigger_count}'):
+        matcher_results = [matcher.match(trigger) for trigger in triggers]
+
+    assert scan_results == matcher_results
@@ -0,0 +1,271 @@
+import asyncio
+import time
+
+import pytest
+
+from hat import aio
+
+from hat.controller import common
+import hat.controller.queue
+
+
+def create_trigger(name, data=None):
+    return common.Trigger(type=('test', ),
+                          name=(name, ),
+                          data=data)
+
+
+def get_triggers(queue):
+    triggers = []
+    while not queue.empty():
+        triggers.append(queue.get_nowait().trigger)
+    return triggers
+
+
+async def test_empty():
+    queue = hat.controller.queue.TriggerQueue()
+
+    assert queue.empty()
+    assert not queue.full()
+    assert len(queue) == 0
+    assert queue.dropped_count == 0
+
+    with pytest.raises(aio.QueueEmptyError):
+        queue.get_nowait()
+
+
+async def test_get():
+    queue = hat.controller.queue.TriggerQueue()
+    trigger = create_trigger('a')
+
+    get_future = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0.001)
+    assert not get_future.done()
+
+    queue.put_nowait(trigger)
+    entry = await get_future
+
+    assert entry.trigger == trigger
+    assert entry.enqueue_time <= time.monotonic()
+
+
+async def test_close():
+    queue = hat.controller.queue.TriggerQueue()
+    queue.put_nowait(create_trigger('a'))
+
+    get_future = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0.001)
+    assert get_future.done()
+
+    get_future = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0.001)
+    assert not get_future.done()
+
+    queue.close()
+    assert queue.is_closed
+
+    with pytest.raises(aio.QueueClosedError):
+        await get_future
+
+    with pytest.raises(aio.QueueClosedError):
+        queue.put_nowait(create_trigger('a'))
+
+
+@pytest.mark.parametrize('overflow_policy, names, result, dropped_count', [
+    (hat.controller.queue.OverflowPolicy.BLOCK,
+     ['a', 'b'],
+     ['a', 'b'],
+     0),
+    (hat.controller.queue.OverflowPolicy.DROP_OLDEST,
+     ['a', 'b', 'c', 'd'],
+     ['c', 'd'],
+     2),
+    (hat.controller.queue.OverflowPolicy.DROP_NEWEST,
+     ['a', 'b', 'c', 'd'],
+     ['a', 'b'],
+     2),
+    (hat.controller.queue.OverflowPolicy.KEEP_LATEST,
+     ['a', 'b', 'c', 'd'],
+     ['c', 'd'],
+     2),
+    (hat.controller.queue.OverflowPolicy.KEEP_LATEST,
+     ['a', 'b', 'a', 'b', 'a'],
+     ['a', 'b'],
+     3),
+])
+async def test_overflow_policy(overflow_policy, names, result, dropped_count):
+    queue = hat.controller.queue.TriggerQueue(maxsize=2,
+                                              overflow_policy=overflow_policy)
+
+    for name in names:
+        queue.put_nowait(create_trigger(name))
+
+    assert queue.dropped_count == dropped_count
+    assert [trigger.name[0] for trigger in get_triggers(queue)] == result
+
+
+async def test_block():
+    queue = hat.controller.queue.TriggerQueue(
+        maxsize=2,
+        overflow_policy=hat.controller.queue.OverflowPolicy.BLOCK)
+
+    for i in range(2):
+        queue.put_nowait(create_trigger('a', i))
+
+    with pytest.raises(aio.QueueFullError):
+        queue.put_nowait(create_trigger('a', 2))
+
+    put_future = asyncio.ensure_future(queue.put(create_trigger('a', 2)))
+    await asyncio.sleep(0.001)
+    assert not put_future.done()
+    assert len(queue) == 2
+
+    assert queue.get_nowait().trigger == create_trigger('a', 0)
+    await put_future
+
+    assert queue.dropped_count == 0
+    assert get_triggers(queue) == [create_trigger('a', i)
+                                   for i in range(1, 3)]
+
+
+async def test_keep_latest():
+    queue = hat.controller.queue.TriggerQueue(
+        maxsize=0,
+        overflow_policy=hat.controller.queue.OverflowPolicy.KEEP_LATEST)
+
+    for i in range(10):
+        queue.put_nowait(create_trigger('a', i))
+        queue.put_nowait(create_trigger('b', i))
+
+    assert get_triggers(queue) == [create_trigger('a', 9),
+                                   create_trigger('b', 9)]
+    assert queue.dropped_count == 18
+
+    queue.put_nowait(create_trigger('a', 10))
+    assert get_triggers(queue) == [create_trigger('a', 10)]
+
+
+async def test_keep_latest_priority():
+    queue = hat.controller.queue.TriggerQueue(
+        maxsize=3,
+        overflow_policy=hat.controller.queue.OverflowPolicy.KEEP_LATEST)
+
+    queue.put_nowait(create_trigger('a', 0))
+    queue.put_nowait(create_trigger('b', 0))
+    queue.put_nowait(create_trigger('c', 0)._replace(priority=1))
+
+    queue.put_nowait(create_trigger('b', 1)._replace(priority=2))
+    queue.put_nowait(create_trigger('c', 1))
+
+    assert len(queue) == 3
+    assert queue.dropped_count == 2
+    assert get_triggers(queue) == [create_trigger('b', 1)._replace(priority=2),
+                                   create_trigger('a', 0),
+                                   create_trigger('c', 1)]
+
+    queue.put_nowait(create_trigger('a', 2))
+    queue.put_nowait(create_trigger('a', 3)._replace(priority=1))
+    queue.put_nowait(create_trigger('a', 4)._replace(priority=1))
+
+    assert queue.dropped_count == 4
+    assert get_triggers(queue) == [create_trigger('a', 4)._replace(priority=1)]
+
+
+async def test_priority():
+    queue = hat.controller.queue.TriggerQueue()
+
+    for priority in [0, 2, 1, 2, 0]:
+        queue.put_nowait(create_trigger('a', priority)._replace(
+            priority=priority))
+
+    assert [trigger.data for trigger in get_triggers(queue)] == [2, 2, 1, 0, 0]
+
+
+async def test_starvation():
+    queue = hat.controller.queue.TriggerQueue(starvation_limit=2)
+
+    queue.put_nowait(create_trigger('low'))
+    for i in range(6):
+        queue.put_nowait(create_trigger('high', i)._replace(priority=1))
+
+    triggers = get_triggers(queue)
+    assert [trigger.name[0] for trigger in triggers] == [
+        'high', 'high', 'low', 'high', 'high', 'high', 'high']
+    assert [trigger.data for trigger in triggers
+            if trigger.name == ('high', )] == list(range(6))
+
+
+@pytest.mark.parametrize('overflow_policy, priorities, result', [
+    (hat.controller.queue.OverflowPolicy.DROP_OLDEST,
+     [0, 1, 0],
+     [1, 0]),
+    (hat.controller.queue.OverflowPolicy.DROP_OLDEST,
+     [1, 1, 0],
+     [1, 1]),
+    (hat.controller.queue.OverflowPolicy.DROP_NEWEST,
+     [0, 0, 1],
+     [1, 0]),
+    (hat.controller.queue.OverflowPolicy.DROP_NEWEST,
+     [1, 0, 0],
+     [1, 0]),
+])
+async def test_overflow_priority(overflow_policy, priorities, result):
+    queue = hat.controller.queue.TriggerQueue(maxsize=2,
+                                              overflow_policy=overflow_policy)
+
+    for i, priority in enumerate(priorities):
+        queue.put_nowait(create_trigger(str(i))._replace(priority=priority))
+
+    assert queue.dropped_count == 1
+    assert [trigger.priority for trigger in get_triggers(queue)] == result
+
+
+async def test_put():
+    queue = hat.controller.queue.TriggerQueue(maxsize=1)
+
+    await queue.put(create_trigger('a'))
+
+    put_future = asyncio.ensure_future(queue.put(create_trigger('b')))
+    await asyncio.sleep(0.001)
+    assert not put_future.done()
+    assert len(queue) == 1
+
+    entry = queue.get_nowait()
+    assert entry.trigger == create_trigger('a')
+
+    await put_future
+    entry = queue.get_nowait()
+    assert entry.trigger == create_trigger('b')
+
+    put_future = asyncio.ensure_future(queue.put(create_trigger('c')))
+    await asyncio.sleep(0.001)
+    assert put_future.done()
+
+    put_future = asyncio.ensure_future(queue.put(create_trigger('d')))
+    await asyncio.sleep(0.001)
+    queue.close()
+
+    with pytest.raises(aio.QueueClosedError):
+        await put_future
+
+
+async def test_latencies():
+    queue = hat.controller.queue.TriggerQueue()
+    assert queue.latencies == {}
+
+    queue.put_nowait(create_trigger('a')._replace(priority=1))
+    queue.put_nowait(create_trigger('b'))
+    queue.put_nowait(create_trigger('c'))
+    await asyncio.sleep(0.01)
+    get_triggers(queue)
+
+    latencies = queue.latencies
+    assert latencies.keys() == {0, 1}
+    assert latencies[0].count == 2
+    assert latencies[1].count == 1
+    assert latencies[0].max >= 0.01
+    assert latencies[0].average <= latencies[0].max
+
+    merged = hat.controller.queue.merge_latencies([latencies, latencies])
+    assert merged[0].count == 4
+    assert merged[0].max == latencies[0].max
@@ -16,6 +16,7 @@ def test_info():
         'info',
         'warning',
         'error'}
+    assert info.thread_safe_functions == info.functions
     assert isinstance(info.create, aio.AsyncCallable)
     assert isinstance(info.json_schema_repo, dict)
     assert isinstance(info.json_schema_id, str)
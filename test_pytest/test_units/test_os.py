@@ -1,3 +1,4 @@
+import asyncio
 import subprocess
 
 import pytest
@@ -5,6 +6,7 @@ import pytest
 from hat import aio
 from hat import json
 
+from hat.controller import interpreters
 from hat.controller.units.os import info
 
 
@@ -14,6 +16,9 @@ def test_info():
         'readFile',
         'writeFile',
         'appendFile',
+        'readBinaryFile',
+        'writeBinaryFile',
+        'appendBinaryFile',
         'deleteFile',
         'execute'}
     assert isinstance(info.create, aio.AsyncCallable)
@@ -108,6 +113,90 @@ async def test_append_file(tmp_path):
     await unit.async_close()
 
 
+async def test_read_binary_file(tmp_path):
+    unit = await aio.call(info.create, {}, None)
+
+    file_content = bytes(range(256))
+
+    file_path = tmp_path / 'file_to_read.bin'
+    file_path.write_bytes(file_content)
+
+    result = await aio.call(unit.call, 'readBinaryFile', [file_path], None)
+    assert result == file_content
+
+    await unit.async_close()
+
+
+@pytest.mark.parametrize('data, content', [
+    (b'\x00\xff\xfe', b'\x00\xff\xfe'),
+    (bytearray(b'\x00\xff\xfe'), b'\x00\xff\xfe'),
+    (memoryview(b'\x00\xff\xfe'), b'\x00\xff\xfe'),
+    ('\x00a\u010d', b'\x00a\xc4\x8d')])
+async def test_write_binary_file(tmp_path, data, content):
+    unit = await aio.call(info.create, {}, None)
+
+    file_path = tmp_path / 'file_to_write.bin'
+
+    result = await aio.call(
+        unit.call, 'writeBinaryFile', [file_path, data], None)
+    assert result is None
+
+    assert file_path.read_bytes() == content
+
+    await unit.async_close()
+
+
+async def test_append_binary_file(tmp_path):
+    unit = await aio.call(info.create, {}, None)
+
+    init_content = b'\x00\xff'
+    file_path = tmp_path / 'file_to_append.bin'
+    file_path.write_bytes(init_content)
+
+    append_content = b'\xfe\x01'
+    result = await aio.call(
+        unit.call, 'appendBinaryFile', [file_path, append_content], None)
+    assert result is None
+
+    assert file_path.read_bytes() == init_content + append_content
+
+    await unit.async_close()
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'\x00\x01\x02A',
+    '\u010d\u0107'.encode(),
+    bytes(range(256))])
+async def test_lua_binary_file_round_trip(tmp_path, content):
+    unit = await aio.call(info.create, {}, None)
+    loop = asyncio.get_running_loop()
+
+    src_path = tmp_path / 'src.bin'
+    src_path.write_bytes(content)
+
+    dst_path = tmp_path / 'dst.bin'
+    dst_path.write_bytes(content)
+
+    def call(function, *args):
+        coro = aio.call(unit.call, function, list(args), None)
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    interpreter = interpreters.Lua()
+    fn = interpreter.load('return function (call, src, dst)\n'
+                          '    local data = call("readBinaryFile", src)\n'
+                          '    call("appendBinaryFile", dst, data)\n'
+                          '    call("writeBinaryFile", src, data)\n'
+                          'end')()
+
+    await loop.run_in_executor(None, fn, call, str(src_path), str(dst_path))
+
+    assert src_path.read_bytes() == content
+    assert dst_path.read_bytes() == content + content
+
+    await unit.async_close()
+
+
 async def test_delete_file(tmp_path):
     unit = await aio.call(info.create, {}, None)
 
@@ -165,6 +254,9 @@ async def test_read_file_not_exists(tmp_path):
     'readFile',
     'writeFile',
     'appendFile',
+    'readBinaryFile',
+    'writeBinaryFile',
+    'appendBinaryFile',
     'deleteFile'])
 @pytest.mark.parametrize('path', [
     123,
@@ -178,6 +270,8 @@ async def test_invalid_path(tmp_path, function, path):
     args = [path]
     if function in ['writeFile', 'appendFile']:
         args.append(text)
+    elif function in ['writeBinaryFile', 'appendBinaryFile']:
+        args.append(text.encode())
     with pytest.raises(Exception):
         await aio.call(
             unit.call, function, args, None)
@@ -217,3 +311,19 @@ async def test_invalid_function(monkeypatch):
         await aio.call(unit.call, 'invalid', ['abc123'], None)
 
     await unit.async_close()
+
+
+@pytest.mark.parametrize('function', [
+    'writeBinaryFile',
+    'appendBinaryFile'])
+@pytest.mark.parametrize("data", [123, None, [1, 2]])
+async def test_invalid_data(tmp_path, function, data):
+    unit = await aio.call(info.create, {}, None)
+
+    file_path = tmp_path / 'file_to_write.bin'
+
+    with pytest.raises(Exception):
+        await aio.call(
+            unit.call, function, [file_path, data], None)
+
+    await unit.async_close()
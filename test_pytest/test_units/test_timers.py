@@ -36,6 +36,7 @@ async def assert_no_trigger(period, trigger_queue):
 def test_info():
     assert info.name == 'timers'
     assert info.functions == {'start', 'stop'}
+    assert info.thread_safe_functions == {'start', 'stop'}
     assert isinstance(info.create, aio.AsyncCallable)
     assert isinstance(info.json_schema_repo, dict)
     assert isinstance(info.json_schema_id, str)
@@ -141,6 +142,38 @@ async def test_start_stop(repeat):
     await unit.async_close()
 
 
+async def test_start_stop_thread_safe():
+    period = 0.1
+    conf = {
+        'timezone': 'Europe/Zagreb',
+        'timers': [
+            {'name': 't1',
+             'time': period,
+             'auto_start': False,
+             'repeat': True}]}
+
+    loop = asyncio.get_running_loop()
+    trigger_queue = aio.Queue()
+
+    unit = await aio.call(info.create, conf, trigger_queue.put_nowait)
+
+    result = await loop.run_in_executor(None, unit.call, 'start', ['t1'],
+                                        None)
+    assert result is None
+
+    trigger = await asyncio.wait_for(trigger_queue.get(), period * 3)
+    assert trigger.name == ('t1', )
+
+    result = await loop.run_in_executor(None, unit.call, 'stop', ['t1'],
+                                        None)
+    assert result is None
+
+    await asyncio.sleep(period * 2)
+    assert trigger_queue.empty()
+
+    await unit.async_close()
+
+
 @pytest.mark.parametrize('repeat', [True, False])
 async def test_stop_auto_start(repeat):
     period = 0.05
@@ -253,6 +286,7 @@ async def test_invalid_timer_name(function, name):
              'auto_start': False,
              'repeat': True}]}
 
+    loop = asyncio.get_running_loop()
     trigger_queue = aio.Queue()
 
     unit = await aio.call(info.create, conf, trigger_queue.put_nowait)
@@ -260,9 +294,52 @@ async def test_invalid_timer_name(function, name):
     with pytest.raises(Exception):
         await aio.call(unit.call, function, [name], None)
 
+    with pytest.raises(Exception):
+        await loop.run_in_executor(None, unit.call, function, [name], None)
+
     await unit.async_close()
 
 
+@pytest.mark.parametrize('function', ['start', 'stop'])
+@pytest.mark.parametrize('args', [
+    [],
+    ['t1', 't1']])
+async def test_invalid_arguments(function, args):
+    conf = {
+        'timezone': 'Europe/Zagreb',
+        'timers': [
+            {'name': 't1',
+             'time': 0.05,
+             'auto_start': False,
+             'repeat': True}]}
+
+    loop = asyncio.get_running_loop()
+    unit = await aio.call(info.create, conf, None)
+
+    with pytest.raises(Exception):
+        await loop.run_in_executor(None, unit.call, function, args, None)
+
+    await unit.async_close()
+
+
+@pytest.mark.parametrize('function', ['start', 'stop'])
+async def test_closed_thread_safe(function):
+    conf = {
+        'timezone': 'Europe/Zagreb',
+        'timers': [
+            {'name': 't1',
+             'time': 0.05,
+             'auto_start': False,
+             'repeat': True}]}
+
+    loop = asyncio.get_running_loop()
+    unit = await aio.call(info.create, conf, None)
+    await unit.async_close()
+
+    with pytest.raises(Exception):
+        await loop.run_in_executor(None, unit.call, function, ['t1'], None)
+
+
 async def test_invalid_function():
     period = 0.05
     conf = {